@@ -6,6 +6,7 @@ For more information check the 'LICENSE.txt' file.
 For complete license information of the dependencies, check the 'additional_licenses' directory.
 """
 
+import collections
 import re
 
 
@@ -295,3 +296,314 @@ class LineList(list):
 
     def _clear(self):
         del self[:]
+
+
+class LazyLineList:
+    """
+    List-like view of the lines of a CustomEditor that never copies the document.
+    Lines are read on demand from Scintilla (SCI_LINELENGTH / SCI_GETLINE through
+    QsciScintilla.text(line)) and the most recently read lines are kept in a small
+    LRU cache. Writes replace only the affected lines with SCI_REPLACETARGET,
+    every write is a single undo action.
+    Indexing is the same as in LineList: line numbers start at 1 (0 is also the
+    first line), slices are [first_line:last_line] with both lines included.
+    The lines do not contain the line ending characters.
+    """
+
+    # Number of decoded lines kept in the cache
+    CACHE_SIZE = 256
+    # Scintilla EOL modes
+    _EOL_STRINGS = {0: "\r\n", 1: "\r", 2: "\n"}
+
+    def __init__(self, parent, initial_text=None):
+        # The document is the storage, 'initial_text' is accepted for
+        # compatibility with LineList and ignored
+        self._parent = parent
+        self._cache = collections.OrderedDict()
+
+    """
+    Reading
+    """
+
+    def _read_line(self, index):
+        """Read the line at the 0-based index from the document"""
+        line_text = self._parent.text(index)
+        if line_text.endswith("\n"):
+            line_text = line_text[:-1]
+        if line_text.endswith("\r"):
+            line_text = line_text[:-1]
+        return line_text
+
+    def _line(self, index):
+        """Cached line at the 0-based index"""
+        cache = self._cache
+        line_text = cache.get(index)
+        if line_text is not None:
+            cache.move_to_end(index)
+            return line_text
+        line_text = self._read_line(index)
+        cache[index] = line_text
+        if len(cache) > self.CACHE_SIZE:
+            cache.popitem(last=False)
+        return line_text
+
+    @staticmethod
+    def _index(key):
+        """Convert the 1-based line number to a 0-based index"""
+        if key > 0:
+            return key - 1
+        return key
+
+    def _slice_range(self, key):
+        """Convert a 1-based inclusive slice to a 0-based range"""
+        length = len(self)
+        start = key.start
+        if start is None or start == 0:
+            first = 0
+        elif start < 0:
+            # Negative starts count from the end like in LineList
+            first = max(start + length, 0)
+        else:
+            first = start - 1
+        stop = key.stop
+        if stop is None or stop > length:
+            stop = length
+        if stop < 0:
+            stop += length
+        return range(first, max(stop, first))
+
+    def __len__(self):
+        return self._parent.lines()
+
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            index = self._index(key)
+            length = len(self)
+            if index < 0:
+                index += length
+            if index < 0 or index >= length:
+                raise IndexError("line index out of range")
+            return self._line(index)
+        elif isinstance(key, slice):
+            return [self._line(i) for i in self._slice_range(key)]
+        return None
+
+    def __iter__(self):
+        # Iteration reads the lines without filling the cache
+        for i in range(len(self)):
+            yield self._read_line(i)
+
+    def __reversed__(self):
+        for i in range(len(self) - 1, -1, -1):
+            yield self._read_line(i)
+
+    def __contains__(self, item):
+        return any(line == item for line in self)
+
+    def __eq__(self, other):
+        if isinstance(other, (list, LazyLineList)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self):
+        return "<LazyLineList: {} lines>".format(len(self))
+
+    def index(self, item):
+        """0-based index of the first line equal to item, like list.index"""
+        for i, line in enumerate(self):
+            if line == item:
+                return i
+        raise ValueError("{!r} is not in the line list".format(item))
+
+    def count(self, item):
+        return sum(1 for line in self if line == item)
+
+    def copy(self):
+        return list(self)
+
+    """
+    Writing
+    """
+
+    def _eol(self):
+        return self._EOL_STRINGS.get(
+            self._parent.SendScintilla(self._parent.SCI_GETEOLMODE), "\n"
+        )
+
+    def _replace_lines(self, first, last, new_lines):
+        """
+        Replace the lines [first, last) (0-based) with new_lines using one
+        SCI_REPLACETARGET call. first == last inserts, empty new_lines deletes.
+        """
+        parent = self._parent
+        send = parent.SendScintilla
+        eol = self._eol()
+        length = len(self)
+        if first < last:
+            start = send(parent.SCI_POSITIONFROMLINE, first)
+            end = send(parent.SCI_GETLINEENDPOSITION, last - 1)
+            text = eol.join(new_lines)
+            if len(new_lines) == 0:
+                if last < length:
+                    # Remove the line ending of the last removed line too
+                    end = send(parent.SCI_POSITIONFROMLINE, last)
+                elif first > 0:
+                    # Removing the last lines, remove the preceding line ending
+                    start = send(parent.SCI_GETLINEENDPOSITION, first - 1)
+        elif len(new_lines) == 0:
+            return
+        elif first < length:
+            start = end = send(parent.SCI_POSITIONFROMLINE, first)
+            text = eol.join(new_lines) + eol
+        else:
+            start = end = send(parent.SCI_GETTEXTLENGTH)
+            text = eol + eol.join(new_lines)
+        encoded_text = text.encode("utf-8")
+        parent.beginUndoAction()
+        try:
+            send(parent.SCI_SETTARGETSTART, start)
+            send(parent.SCI_SETTARGETEND, end)
+            send(parent.SCI_REPLACETARGET, len(encoded_text), encoded_text)
+        finally:
+            parent.endUndoAction()
+        # The SCN_MODIFIED notifications also invalidate the cache, but the
+        # view can be used on an editor that does not forward them
+        self._invalidate_from(first)
+
+    @staticmethod
+    def _check_lines(value):
+        if isinstance(value, str):
+            return [value]
+        if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+            raise Exception("Value has to be a list of strings or a string!")
+        return value
+
+    def __setitem__(self, key, value):
+        if isinstance(key, int):
+            if not isinstance(value, str):
+                raise Exception("Value has to be a string!")
+            index = self._index(key)
+            length = len(self)
+            if index < 0:
+                index += length
+            if index >= length:
+                # Same as LineList, setting a line past the end appends it
+                self._replace_lines(length, length, [value])
+            else:
+                self._replace_lines(index, index + 1, [value])
+        else:
+            value = self._check_lines(value)
+            line_range = self._slice_range(key)
+            if len(value) != len(line_range):
+                raise Exception("Ranges of assignment don't match!")
+            self._replace_lines(line_range.start, line_range.stop, value)
+
+    def __delitem__(self, key):
+        if isinstance(key, int):
+            index = self._index(key)
+            if index < 0:
+                index += len(self)
+            self._replace_lines(index, index + 1, [])
+        else:
+            line_range = self._slice_range(key)
+            self._replace_lines(line_range.start, line_range.stop, [])
+
+    def __iadd__(self, value):
+        """Overloaded '+=' operator"""
+        raise Exception("'+=' operator not implemented yet!")
+
+    def __isub__(self, value):
+        """Overloaded '-=' operator"""
+        raise Exception("'-=' operator not implemented yet!")
+
+    def __imul__(self, value):
+        """Overloaded '*=' operator"""
+        raise Exception("'*=' operator not implemented yet!")
+
+    def append(self, value, update_parent=True):
+        """The document is the storage, so 'update_parent' is always True"""
+        if not isinstance(value, str):
+            raise Exception("'append' parameter must be a string!")
+        length = len(self)
+        self._replace_lines(length, length, [value])
+
+    def extend(self, value, update_parent=True):
+        if not isinstance(value, list):
+            raise Exception("Extend parameter must be a list!")
+        value = self._check_lines(value)
+        length = len(self)
+        self._replace_lines(length, length, value)
+
+    def insert(self, index, value, update_parent=True):
+        if not isinstance(index, int):
+            raise Exception("Insert index parameter must be an integer!")
+        if not isinstance(value, str):
+            raise Exception("Insert parameter must be a string!")
+        index = max(index - 1, 0)
+        self._replace_lines(min(index, len(self)), min(index, len(self)), [value])
+
+    def pop(self, index=None, update_parent=True):
+        if index is None:
+            index = len(self)
+        if not isinstance(index, int):
+            raise Exception("Pop index parameter must be an integer!")
+        index = max(index - 1, 0)
+        line_text = self[index + 1]
+        self._replace_lines(index, index + 1, [])
+        return line_text
+
+    def remove(self, item, update_parent=True):
+        if not isinstance(item, str):
+            raise Exception("Remove item parameter must be a string!")
+        try:
+            index = self.index(item)
+        except ValueError:
+            raise Exception("Cannot remove item! Item is not in the list!")
+        self._replace_lines(index, index + 1, [])
+
+    def reverse(self, update_parent=True):
+        lines = list(self)
+        lines.reverse()
+        self._replace_lines(0, len(lines), lines)
+
+    def sort(self, update_parent=True, key=None, reverse=False):
+        lines = sorted(self, key=key, reverse=reverse)
+        self._replace_lines(0, len(lines), lines)
+
+    """
+    Synchronization with the document
+    """
+
+    def _invalidate_from(self, first_line):
+        for index in [i for i in self._cache if i >= first_line]:
+            del self._cache[index]
+
+    def update_from_modification(self, position, modification_type, lines_added):
+        """
+        Drop the cached lines from the first modified line on
+        (SCN_MODIFIED with SC_MOD_INSERTTEXT or SC_MOD_DELETETEXT)
+        """
+        if not self._cache:
+            return
+        parent = self._parent
+        first_line = parent.SendScintilla(parent.SCI_LINEFROMPOSITION, position)
+        if lines_added == 0:
+            self._cache.pop(first_line, None)
+        else:
+            self._invalidate_from(first_line)
+
+    def update_text_to_list(self, update_text=None):
+        """The lines are read from the document, only the cache is dropped"""
+        self._cache.clear()
+
+    def get_absolute_cursor_position(self):
+        """Get the absolute cursor position"""
+        line, index = self._parent.getCursorPosition()
+        absolute_position = 0
+        for i in range(line):
+            absolute_position += len(self._read_line(i))
+        absolute_position += index + 1
+        return absolute_position
+
+    def _clear(self):
+        self._cache.clear()
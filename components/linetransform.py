@@ -0,0 +1,437 @@
+"""
+Copyright (c) 2013-present Matic Kukovec.
+Released under the GNU GPL3 license.
+
+For more information check the 'LICENSE.txt' file.
+For complete license information of the dependencies, check the 'additional_licenses' directory.
+"""
+
+# Batched line transforms: the changed ranges are computed line by line (or with
+# a regular expression directly on the UTF-8 bytes) and only those ranges are
+# replaced with SCI_REPLACETARGET. The whole operation is a single undo step and
+# the unchanged lines keep their bookmarks and markers.
+
+import difflib
+import itertools
+import re
+
+import components.tracing
+
+# Changed ranges closer than this many bytes are merged into one replacement
+MERGE_GAP = 64
+# More replacements than this are merged into a single replacement
+MAX_HUNKS = 2000
+# Changed blocks with more lines than this are not diffed line by line
+MAX_DIFF_LINES = 20000
+# Block size for comparing the unchanged start and end of a document
+COMPARE_BLOCK = 1 << 16
+# Scintilla EOL modes
+EOL_STRINGS = {0: b"\r\n", 1: b"\r", 2: b"\n"}
+# Every character that str.strip() removes, except the line breaks,
+# so the bytes fast path treats the same lines as blank as line.strip() == ""
+def _whitespace_pattern():
+    """
+    Pattern for one whitespace character in UTF-8, the multibyte characters
+    are grouped by their leading bytes, which keeps the regex fast
+    """
+    single = []
+    multi = {}
+    for c in range(0x10000):
+        character = chr(c)
+        if not character.isspace() or character in "\r\n":
+            continue
+        encoded = character.encode("utf-8")
+        if len(encoded) == 1:
+            single.append(re.escape(encoded))
+        else:
+            multi.setdefault(encoded[:-1], []).append(re.escape(encoded[-1:]))
+    alternatives = [b"[" + b"".join(single) + b"]"]
+    for prefix, last_bytes in sorted(multi.items()):
+        alternatives.append(re.escape(prefix) + b"[" + b"".join(last_bytes) + b"]")
+    return b"(?:" + b"|".join(alternatives) + b")"
+
+
+_WHITESPACE = _whitespace_pattern()
+
+
+def document_eol(editor):
+    return EOL_STRINGS.get(editor.SendScintilla(editor.SCI_GETEOLMODE), b"\n")
+
+
+def document_bytes(editor, start=0, end=None):
+    """The UTF-8 bytes of the document between the byte positions"""
+    if start == 0 and end is None:
+        return editor.text().encode("utf-8")
+    if end is None:
+        end = editor.SendScintilla(editor.SCI_GETTEXTLENGTH)
+    return editor.text(start, end).encode("utf-8")
+
+
+def merge_hunks(data, hunks, base=0, max_gap=MERGE_GAP, max_hunks=MAX_HUNKS):
+    """
+    Merge sorted, non-overlapping (start, end, replacement) hunks that are
+    close together, 'data' holds the original bytes starting at 'base'
+    """
+    if not hunks:
+        return []
+    merged = [list(hunks[0])]
+    for start, end, replacement in hunks[1:]:
+        last = merged[-1]
+        if start - last[1] <= max_gap:
+            last[2] = last[2] + data[last[1] - base : start - base] + replacement
+            last[1] = end
+        else:
+            merged.append([start, end, replacement])
+    if len(merged) > max_hunks:
+        pieces = []
+        position = merged[0][0]
+        for start, end, replacement in merged:
+            pieces.append(data[position - base : start - base])
+            pieces.append(replacement)
+            position = end
+        merged = [[merged[0][0], merged[-1][1], b"".join(pieces)]]
+    return [tuple(h) for h in merged]
+
+
+def apply_hunks(editor, hunks):
+    """
+    Replace the byte ranges from the last to the first, so the positions of
+    the earlier hunks stay valid, all inside one undo action
+    """
+    if not hunks:
+        return 0
+    undo_budget = getattr(editor, "undo_budget", None)
+    if undo_budget is not None:
+        # Scintilla keeps the removed and the inserted bytes in the undo history
+        undo_budget.make_room(sum(end - start + len(r) for start, end, r in hunks))
+    send = editor.SendScintilla
+    with components.tracing.span("apply-line-hunks", "edit", hunks=len(hunks)):
+        editor.beginUndoAction()
+        try:
+            for start, end, replacement in reversed(hunks):
+                send(editor.SCI_SETTARGETSTART, start)
+                send(editor.SCI_SETTARGETEND, end)
+                send(editor.SCI_REPLACETARGET, len(replacement), replacement)
+        finally:
+            editor.endUndoAction()
+    return len(hunks)
+
+
+def line_hunks(data, function, eol=b"\n", base=0, none_deletes=True):
+    """
+    Stream the lines of 'data' through 'function' (str -> str or None) and
+    return the (start, end, replacement) byte hunks of the changed lines.
+    A None result deletes the line, unless 'none_deletes' is False, then the
+    whole transform is cancelled and None is returned.
+    """
+    hunks = []
+    lines = data.split(eol)
+    last_index = len(lines) - 1
+    eol_length = len(eol)
+    position = base
+    hunk_start = None
+    hunk_lines = []
+    for index, raw_line in enumerate(lines):
+        line = raw_line.decode("utf-8")
+        new_line = function(line)
+        line_end = position + len(raw_line)
+        next_position = line_end + eol_length
+        if new_line is None and not none_deletes:
+            return None
+        if new_line is not None and new_line == line:
+            if hunk_start is not None:
+                hunks.append((hunk_start, position, _join_lines(hunk_lines, eol, True)))
+                hunk_start = None
+            position = next_position
+            continue
+        if hunk_start is None:
+            hunk_start = position
+            hunk_lines = []
+        if new_line is not None:
+            hunk_lines.append(new_line.encode("utf-8"))
+        if index == last_index:
+            # The hunk reaches the end of the data, which has no line ending
+            if hunk_lines:
+                hunks.append((hunk_start, line_end, _join_lines(hunk_lines, eol, False)))
+            elif hunk_start > base:
+                # Every line up to the end was deleted, remove the line ending before them
+                hunks.append((hunk_start - eol_length, line_end, b""))
+            else:
+                hunks.append((hunk_start, line_end, b""))
+            hunk_start = None
+        position = next_position
+    return hunks
+
+
+def _join_lines(lines, eol, trailing_eol):
+    if not lines:
+        return b""
+    text = eol.join(lines)
+    if trailing_eol:
+        text += eol
+    return text
+
+
+def blank_line_hunks(data, eol=b"\n", base=0):
+    """
+    Hunks that delete every line containing only whitespace, found with
+    regular expressions on the bytes instead of decoding every line
+    """
+    escaped_eol = re.escape(eol)
+    if re.fullmatch(
+        b"(?:" + _WHITESPACE + b"*" + escaped_eol + b")*" + _WHITESPACE + b"*", data
+    ):
+        # Every line is blank
+        return [(base, base + len(data), b"")] if data else []
+    hunks = []
+    # Blank lines at the start are deleted with the line ending after them
+    leading = re.match(b"(?:" + _WHITESPACE + b"*" + escaped_eol + b")+", data)
+    position = 0
+    if leading is not None:
+        hunks.append((base, base + leading.end(), b""))
+        position = leading.end()
+    # The other blank lines are deleted with the line ending before them,
+    # the pattern starts with the line ending, so the search is fast
+    blank_lines = re.compile(
+        escaped_eol + _WHITESPACE + b"*(?=" + escaped_eol + b"|\\Z)"
+    )
+    for match in blank_lines.finditer(data, position):
+        hunks.append((base + match.start(), base + match.end(), b""))
+    return hunks
+
+
+def tab_hunks(data, tab_width, base=0):
+    """Hunks that replace every tab character with 'tab_width' spaces"""
+    if b"\t" not in data:
+        return []
+    return [
+        (base + m.start(), base + m.end(), b" " * (tab_width * (m.end() - m.start())))
+        for m in re.finditer(b"\t+", data)
+    ]
+
+
+def _is_continuation(data, index):
+    return index < len(data) and 0x80 <= data[index] < 0xC0
+
+
+def _trim_hunk(data, start, end, replacement, base):
+    """
+    Remove the bytes that the replacement has in common with the replaced
+    bytes at the start and at the end, without splitting UTF-8 characters
+    """
+    old = data[start - base : end - base]
+    limit = min(len(old), len(replacement))
+    prefix = 0
+    while prefix < limit and old[prefix] == replacement[prefix]:
+        prefix += 1
+    while prefix > 0 and (
+        _is_continuation(old, prefix) or _is_continuation(replacement, prefix)
+    ):
+        prefix -= 1
+    suffix = 0
+    limit -= prefix
+    while suffix < limit and old[-1 - suffix] == replacement[-1 - suffix]:
+        suffix += 1
+    while suffix > 0 and (
+        _is_continuation(old, len(old) - suffix)
+        or _is_continuation(replacement, len(replacement) - suffix)
+    ):
+        suffix -= 1
+    return (
+        start + prefix,
+        end - suffix,
+        replacement[prefix : len(replacement) - suffix],
+    )
+
+
+def _common_prefix_length(a, b, block=COMPARE_BLOCK):
+    limit = min(len(a), len(b))
+    position = 0
+    # Whole blocks are compared in C, only the differing block byte by byte
+    while position + block <= limit and (
+        a[position : position + block] == b[position : position + block]
+    ):
+        position += block
+    while position < limit and a[position] == b[position]:
+        position += 1
+    return position
+
+
+def _common_suffix_length(a, b, limit, block=COMPARE_BLOCK):
+    end_a = len(a)
+    end_b = len(b)
+    suffix = 0
+    while suffix + block <= limit and (
+        a[end_a - suffix - block : end_a - suffix]
+        == b[end_b - suffix - block : end_b - suffix]
+    ):
+        suffix += block
+    while suffix < limit and a[end_a - 1 - suffix] == b[end_b - 1 - suffix]:
+        suffix += 1
+    return suffix
+
+
+def text_hunks(old, new, eol=b"\n", base=0, max_diff_lines=MAX_DIFF_LINES):
+    """
+    Compact (start, end, replacement) hunks that turn the bytes 'old' into
+    'new': the common bytes at the start and end are skipped, the remaining
+    block is compared line by line (or with difflib when lines were added
+    or removed) and every hunk is trimmed to the changed bytes
+    """
+    if old == new:
+        return []
+    prefix = _common_prefix_length(old, new)
+    while prefix > 0 and (_is_continuation(old, prefix) or _is_continuation(new, prefix)):
+        prefix -= 1
+    suffix = _common_suffix_length(old, new, min(len(old), len(new)) - prefix)
+    while suffix > 0 and (
+        _is_continuation(old, len(old) - suffix)
+        or _is_continuation(new, len(new) - suffix)
+    ):
+        suffix -= 1
+    return _line_diff_hunks(
+        old[prefix : len(old) - suffix],
+        new[prefix : len(new) - suffix],
+        eol,
+        base + prefix,
+        max_diff_lines,
+    )
+
+
+def _line_diff_hunks(old, new, eol, base, max_diff_lines):
+    old_lines = old.split(eol)
+    new_lines = new.split(eol)
+    old_count = len(old_lines)
+    new_count = len(new_lines)
+    limit = min(old_count, new_count)
+    prefix = 0
+    while prefix < limit and old_lines[prefix] == new_lines[prefix]:
+        prefix += 1
+    suffix = 0
+    while (
+        suffix < limit - prefix
+        and old_lines[old_count - 1 - suffix] == new_lines[new_count - 1 - suffix]
+    ):
+        suffix += 1
+    old_end = old_count - suffix
+    new_end = new_count - suffix
+    # Byte offsets of the line starts in 'old'
+    eol_length = len(eol)
+    starts = [0]
+    starts.extend(
+        itertools.accumulate(len(line) + eol_length for line in old_lines[:-1])
+    )
+
+    def hunk(i1, i2, j1, j2):
+        replacement_lines = new_lines[j1:j2]
+        if i1 < i2 and replacement_lines:
+            start = starts[i1]
+            end = starts[i2 - 1] + len(old_lines[i2 - 1])
+            replacement = eol.join(replacement_lines)
+        elif i1 == i2:
+            if i1 < old_count:
+                start = end = starts[i1]
+                replacement = eol.join(replacement_lines) + eol
+            else:
+                start = end = len(old)
+                replacement = eol + eol.join(replacement_lines)
+        elif i2 < old_count:
+            start, end, replacement = starts[i1], starts[i2], b""
+        elif i1 > 0:
+            start, end, replacement = starts[i1] - eol_length, len(old), b""
+        else:
+            start, end, replacement = 0, len(old), b""
+        return _trim_hunk(old, base + start, base + end, replacement, base)
+
+    hunks = []
+    if old_end - prefix == new_end - prefix:
+        # Same number of lines, compare them in pairs
+        run_start = None
+        for i in range(prefix, old_end + 1):
+            changed = i < old_end and old_lines[i] != new_lines[i]
+            if changed and run_start is None:
+                run_start = i
+            elif not changed and run_start is not None:
+                hunks.append(hunk(run_start, i, run_start, i))
+                run_start = None
+    elif (old_end - prefix) + (new_end - prefix) <= max_diff_lines:
+        matcher = difflib.SequenceMatcher(
+            None, old_lines[prefix:old_end], new_lines[prefix:new_end], autojunk=False
+        )
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag != "equal":
+                hunks.append(hunk(prefix + i1, prefix + i2, prefix + j1, prefix + j2))
+    else:
+        hunks.append(hunk(prefix, old_end, prefix, new_end))
+    return [h for h in hunks if h[0] != h[1] or h[2]]
+
+
+def replace_text(editor, new_text):
+    """
+    Replace the document text with 'new_text' by replacing only the changed
+    ranges, as one undo action. Returns the number of replacements.
+    """
+    with components.tracing.span("replace-text", "edit"):
+        old = document_bytes(editor)
+        hunks = text_hunks(old, new_text.encode("utf-8"))
+        return apply_hunks(editor, merge_hunks(old, hunks))
+
+
+def selected_line_range(editor):
+    """
+    (first_line, last_line) of the selection (0-based, inclusive),
+    None when nothing or only part of a single line is selected
+    """
+    line_from, index_from, line_to, index_to = editor.getSelection()
+    if line_from == -1 or line_from == line_to:
+        return None
+    return line_from, line_to
+
+
+def line_range_bytes(editor, first_line, last_line):
+    """Byte range and bytes of the lines, without the last line ending"""
+    start = editor.SendScintilla(editor.SCI_POSITIONFROMLINE, first_line)
+    end = editor.SendScintilla(editor.SCI_GETLINEENDPOSITION, last_line)
+    return start, document_bytes(editor, start, end)
+
+
+def transform_lines(editor, function, line_range=None, none_deletes=True):
+    """
+    Apply 'function' to the lines of the document or of the (first, last)
+    0-based line range and replace only the changed lines, as one undo action.
+    Returns the number of replacements, or None if the function returned None
+    for a line and 'none_deletes' is False (nothing is changed then).
+    """
+    with components.tracing.span("transform-lines", "edit"):
+        eol = document_eol(editor)
+        if line_range is None:
+            base, data = 0, document_bytes(editor)
+        else:
+            base, data = line_range_bytes(editor, *line_range)
+        hunks = line_hunks(data, function, eol, base, none_deletes)
+        if hunks is None:
+            return None
+        return apply_hunks(editor, merge_hunks(data, hunks, base))
+
+
+def remove_blank_lines(editor, line_range=None):
+    """Delete the lines that contain only whitespace, as one undo action"""
+    with components.tracing.span("remove-blank-lines", "edit"):
+        eol = document_eol(editor)
+        if line_range is None:
+            base, data = 0, document_bytes(editor)
+        else:
+            base, data = line_range_bytes(editor, *line_range)
+        hunks = blank_line_hunks(data, eol, base)
+        return apply_hunks(editor, merge_hunks(data, hunks, base))
+
+
+def tabs_to_spaces(editor, tab_width, line_range=None):
+    """Replace the tab characters with spaces, as one undo action"""
+    with components.tracing.span("tabs-to-spaces", "edit"):
+        if line_range is None:
+            base, data = 0, document_bytes(editor)
+        else:
+            base, data = line_range_bytes(editor, *line_range)
+        hunks = tab_hunks(data, tab_width, base)
+        return apply_hunks(editor, merge_hunks(data, hunks, base))
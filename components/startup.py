@@ -0,0 +1,200 @@
+"""
+Copyright (c) 2013-present Matic Kukovec.
+Released under the GNU GPL3 license.
+
+For more information check the 'LICENSE.txt' file.
+For complete license information of the dependencies, check the 'additional_licenses' directory.
+"""
+
+# Faster startup: the main window modules are imported in the background and the
+# main window is built while the login dialog is shown. After the login the recent
+# books and replace record lists are prefetched concurrently, and the time until
+# the editor is editable is measured.
+
+import importlib
+import os
+import threading
+import time
+import traceback
+
+import components.tracing
+import qt
+import settings
+
+# Modules imported on a background thread while the login dialog is shown
+WARM_MODULES = (
+    "lexers",
+    "themes",
+    "gui.treedisplays",
+    "gui.customeditor",
+    "gui.mainwindow",
+)
+# Interval for polling the background imports, in milliseconds
+WARM_POLL_INTERVAL = 20
+# Recent files prefetched after the login and the bytes read of each file
+PREFETCH_RECENT_FILES = 5
+PREFETCH_FILE_BYTES = 16 * 1024 * 1024
+PREFETCH_CHUNK_SIZE = 1024 * 1024
+# Books whose replace record lists are prefetched after the login
+PREFETCH_BOOKS = 5
+
+
+class StartupTimer:
+    """Named timestamps of the startup phases, relative to the process start"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.marks = []
+        self._lock = threading.Lock()
+
+    def mark(self, name):
+        with self._lock:
+            self.marks.append((name, time.perf_counter() - self.start))
+        components.tracing.instant(name, "startup")
+
+    def get(self, name):
+        for mark_name, elapsed in self.marks:
+            if mark_name == name:
+                return elapsed
+        return None
+
+    def report(self):
+        lines = ["Startup timeline:"]
+        previous = 0.0
+        for name, elapsed in self.marks:
+            lines.append(
+                "    {:<28}{:>9.1f} ms  (+{:.1f} ms)".format(
+                    name, elapsed * 1000, (elapsed - previous) * 1000
+                )
+            )
+            previous = elapsed
+        return "\n".join(lines)
+
+
+timer = StartupTimer()
+
+
+class ModuleWarmer(threading.Thread):
+    """
+    Imports the heavy modules in a background thread while the UI thread
+    shows the login window. Only modules are imported here, all widgets are
+    still created in the UI thread.
+    """
+
+    def __init__(self, module_names=WARM_MODULES):
+        super().__init__(name="module-warmer", daemon=True)
+        self.module_names = module_names
+        self.errors = []
+
+    def run(self):
+        for name in self.module_names:
+            try:
+                with components.tracing.span("import " + name, "startup"):
+                    importlib.import_module(name)
+            except Exception:
+                # The UI thread imports the module again and reports the error
+                self.errors.append((name, traceback.format_exc()))
+        timer.mark("modules imported")
+
+
+class MainWindowBuilder(qt.QObject):
+    """
+    Builds the (hidden) main window in the UI thread as soon as the background
+    imports are done, so the window is ready when the login is accepted
+    """
+
+    def __init__(self, warmer, factory):
+        super().__init__()
+        self.warmer = warmer
+        self.factory = factory
+        self.main_window = None
+        self.error = None
+        self.poll_timer = qt.QTimer(self)
+        self.poll_timer.setInterval(WARM_POLL_INTERVAL)
+        self.poll_timer.timeout.connect(self.__poll)
+
+    def start(self):
+        self.poll_timer.start()
+
+    def __poll(self):
+        if self.warmer.is_alive():
+            return
+        self.poll_timer.stop()
+        self.build()
+
+    def build(self):
+        """Build the main window now if it does not exist yet"""
+        self.poll_timer.stop()
+        if self.main_window is None and self.error is None:
+            try:
+                # Theme dictionaries are cached by the settings module
+                with components.tracing.span("build main window", "startup"):
+                    settings.get_theme()
+                    self.main_window = self.factory()
+                timer.mark("main window built")
+            except Exception:
+                self.error = traceback.format_exc()
+        return self.main_window
+
+
+def _prefetch_file(file_path, max_bytes=PREFETCH_FILE_BYTES):
+    """Read the start of the file, so opening it is served from the OS cache"""
+    remaining = max_bytes
+    with components.tracing.span("prefetch file", "startup", path=file_path), open(
+        file_path, "rb"
+    ) as file:
+        while remaining > 0:
+            chunk = file.read(min(PREFETCH_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+
+
+def prefetch_after_login(executor=None):
+    """
+    Prefetch the user's recent books and the replace record lists of the
+    last used books concurrently in the service thread pool
+    """
+    from xc_service.async_service import AsyncBookService, get_service_executor
+    from xc_service.replace_record_cache import get_replace_record_cache
+
+    executor = executor or get_service_executor()
+    calls = []
+    recent_files = list(reversed(settings.get("recent_files") or []))
+    for file_path in recent_files[:PREFETCH_RECENT_FILES]:
+        if os.path.isfile(file_path):
+            calls.append(
+                executor.submit(("prefetch_file", file_path), _prefetch_file, file_path)
+            )
+    book_service = AsyncBookService(executor)
+    for cp_book_id, book_title in get_replace_record_cache().known_books(
+        PREFETCH_BOOKS
+    ):
+        calls.append(
+            book_service.replace_record_list(
+                {"cp_book_id": cp_book_id, "book_title": book_title}
+            )
+        )
+    return calls
+
+
+def report_time_to_editable(main_window):
+    """Mark and display the startup timeline once the event loop is idle"""
+
+    def editable():
+        timer.mark("editable")
+        login_accepted = timer.get("login accepted") or 0.0
+        message = timer.report()
+        message += "\n    Time to editable after login: {:.1f} ms".format(
+            (timer.get("editable") - login_accepted) * 1000
+        )
+        print(message)
+        main_window.display.repl_display_message(message)
+        main_window.display.write_to_statusbar(
+            "Editable {:.0f} ms after login".format(
+                (timer.get("editable") - login_accepted) * 1000
+            ),
+            5000,
+        )
+
+    qt.QTimer.singleShot(0, editable)
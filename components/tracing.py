@@ -0,0 +1,263 @@
+"""
+Copyright (c) 2013-present Matic Kukovec.
+Released under the GNU GPL3 license.
+
+For more information check the 'LICENSE.txt' file.
+For complete license information of the dependencies, check the 'additional_licenses' directory.
+"""
+
+# Performance tracing: nestable timed spans, recorded per thread into a fixed size
+# ring buffer and exportable as Chrome trace-event JSON (chrome://tracing or
+# https://ui.perfetto.dev). When disabled, span() returns a shared no-op context
+# and costs almost nothing.
+#
+# Usage:
+#     with components.tracing.span("open-file", "file", path=file_path):
+#         ...
+#     @components.tracing.traced("save", "file")
+#     def save_document(self): ...
+# Enable with the '--trace FILE' command line option or the EXCO_TRACE
+# environment variable (value is the output file).
+
+import collections
+import functools
+import json
+import os
+import threading
+import time
+
+# Number of finished spans kept in the ring buffer
+DEFAULT_CAPACITY = 100000
+
+
+class _NullSpan:
+    """Shared no-op span, used when tracing is disabled"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+_null_span = _NullSpan()
+
+
+class Span:
+    __slots__ = ("tracer", "name", "category", "args", "start", "depth")
+
+    def __init__(self, tracer, name, category, args):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+        self.start = 0.0
+        self.depth = 0
+
+    def set(self, **args):
+        """Add arguments to the span while it is open, e.g. a result size"""
+        self.args.update(args)
+
+    def __enter__(self):
+        stack = self.tracer._stack()
+        self.depth = len(stack)
+        stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        end = time.perf_counter()
+        stack = self.tracer._stack()
+        if stack and stack[-1] is self:
+            stack.pop()
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer._record(
+            "X", self.name, self.category, self.start, end - self.start, self.depth, self.args
+        )
+        return False
+
+
+class Tracer:
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.enabled = False
+        self.origin = time.perf_counter()
+        self.events = collections.deque(maxlen=capacity)
+        self._local = threading.local()
+        self._thread_names = {}
+
+    def enable(self, capacity=None):
+        if capacity is not None and capacity != self.events.maxlen:
+            self.events = collections.deque(self.events, maxlen=capacity)
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def clear(self):
+        self.events.clear()
+
+    def _stack(self):
+        try:
+            return self._local.stack
+        except AttributeError:
+            self._local.stack = []
+            return self._local.stack
+
+    def _record(self, phase, name, category, start, duration, depth, args):
+        thread = threading.current_thread()
+        if thread.ident not in self._thread_names:
+            self._thread_names[thread.ident] = thread.name
+        # deque.append with maxlen is thread safe and drops the oldest event
+        self.events.append(
+            (phase, name, category, start, duration, thread.ident, depth, args)
+        )
+
+    def span(self, name, category="", **args):
+        if not self.enabled:
+            return _null_span
+        return Span(self, name, category, args)
+
+    def instant(self, name, category="", **args):
+        """A point in time, e.g. a startup milestone"""
+        if not self.enabled:
+            return
+        self._record(
+            "i", name, category, time.perf_counter(), 0.0, len(self._stack()), args
+        )
+
+    def add_complete(self, name, category, start, end, **args):
+        """Record an already measured interval (perf_counter values)"""
+        if not self.enabled:
+            return
+        self._record("X", name, category, start, end - start, len(self._stack()), args)
+
+    def to_chrome_trace(self):
+        """Trace-event format dictionary, timestamps in microseconds"""
+        pid = os.getpid()
+        trace_events = []
+        for ident, thread_name in list(self._thread_names.items()):
+            trace_events.append(
+                {
+                    "ph": "M",
+                    "name": "thread_name",
+                    "pid": pid,
+                    "tid": ident,
+                    "args": {"name": thread_name},
+                }
+            )
+        for phase, name, category, start, duration, ident, depth, args in list(
+            self.events
+        ):
+            event = {
+                "ph": phase,
+                "name": name,
+                "cat": category or "exco",
+                "pid": pid,
+                "tid": ident,
+                "ts": round((start - self.origin) * 1e6, 3),
+            }
+            if phase == "X":
+                event["dur"] = round(duration * 1e6, 3)
+            else:
+                event["s"] = "t"
+            if args:
+                event["args"] = {k: _json_value(v) for k, v in args.items()}
+            trace_events.append(event)
+        return {"traceEvents": trace_events, "displayTimeUnit": "ms"}
+
+    def export_chrome_trace(self, file_path):
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_chrome_trace(), f, ensure_ascii=False)
+        return file_path
+
+    def summary(self, limit=30):
+        """Text table of the total/average/max time per span name"""
+        totals = {}
+        for phase, name, category, start, duration, ident, depth, args in list(
+            self.events
+        ):
+            if phase != "X":
+                continue
+            count, total, maximum = totals.get(name, (0, 0.0, 0.0))
+            totals[name] = (count + 1, total + duration, max(maximum, duration))
+        lines = [
+            "{:<40}{:>8}{:>12}{:>12}{:>12}".format(
+                "span", "count", "total ms", "avg ms", "max ms"
+            )
+        ]
+        for name, (count, total, maximum) in sorted(
+            totals.items(), key=lambda item: item[1][1], reverse=True
+        )[:limit]:
+            lines.append(
+                "{:<40}{:>8}{:>12.2f}{:>12.3f}{:>12.2f}".format(
+                    name[:39], count, total * 1000, total * 1000 / count, maximum * 1000
+                )
+            )
+        return "\n".join(lines)
+
+
+def _json_value(value):
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return str(value)
+
+
+tracer = Tracer()
+
+
+def span(name, category="", **args):
+    return tracer.span(name, category, **args)
+
+
+def instant(name, category="", **args):
+    tracer.instant(name, category, **args)
+
+
+def traced(name=None, category=""):
+    """Decorator that wraps every call of the function in a span"""
+
+    def decorator(function):
+        span_name = name or function.__qualname__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return function(*args, **kwargs)
+            with Span(tracer, span_name, category, {}):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def enable(capacity=None):
+    tracer.enable(capacity)
+
+
+def disable():
+    tracer.disable()
+
+
+def is_enabled():
+    return tracer.enabled
+
+
+def export_chrome_trace(file_path):
+    return tracer.export_chrome_trace(file_path)
+
+
+def summary(limit=30):
+    return tracer.summary(limit)
+
+
+# Tracing from process start, the output file is written on exit by exco.py
+trace_output_file = os.environ.get("EXCO_TRACE") or None
+if trace_output_file:
+    tracer.enable()
@@ -0,0 +1,171 @@
+"""
+Copyright (c) 2013-present Matic Kukovec.
+Released under the GNU GPL3 license.
+
+For more information check the 'LICENSE.txt' file.
+For complete license information of the dependencies, check the 'additional_licenses' directory.
+"""
+
+# Undo memory budget: the bytes held by the undo/redo history of an editor are
+# counted from the SCN_MODIFIED notifications.
+# Scintilla 3.x cannot drop single undo groups, only empty the whole undo buffer,
+# so the oldest groups cannot be dropped on their own. Before the first change of
+# a user action is recorded (SC_MOD_BEFOREINSERT/BEFOREDELETE), the whole history
+# is emptied if the history and the change together exceed the limit
+# ('undo_memory_limit_mb', 0 means no limit), so the action itself stays undoable.
+# make_room does the same with an estimated size before a bulk operation.
+# Actions made of several changes (e.g. replacing the selection) are not split,
+# a history that grew over the limit is emptied before the next action.
+#
+# Usage:
+#     self.undo_budget = components.undobudget.UndoBudget(self)
+#     self.undo_budget.before_modification(modificationType, length)  # SC_MOD_BEFORE*
+#     self.undo_budget.modification(modificationType, length)  # SCN_MODIFIED
+#     self.undo_budget.make_room(estimated_bytes)  # before a bulk operation
+
+import collections
+
+import qt
+import settings
+
+# Bookkeeping overhead per Scintilla undo action, in bytes
+ACTION_OVERHEAD = 64
+
+
+def format_size(size):
+    if size >= 1024 * 1024:
+        return "{:.1f} MB".format(size / (1024 * 1024))
+    return "{:.0f} KB".format(size / 1024)
+
+
+class UndoBudget:
+    def __init__(self, editor):
+        self.editor = editor
+        # Estimated bytes per undo group, the oldest group first
+        self.undo_groups = collections.deque()
+        self.redo_groups = []
+        self.undo_bytes = 0
+        self.redo_bytes = 0
+        # The history was dropped while the document had unsaved changes
+        self.trimmed_while_modified = False
+        # Set from the first recorded change until the event loop runs again
+        self.__check_pending = False
+
+    def limit(self):
+        """Maximum undo memory in bytes, 0 means unlimited"""
+        limit_mb = settings.get("editor").get("undo_memory_limit_mb", 0)
+        return int(limit_mb * 1024 * 1024) if limit_mb else 0
+
+    def memory_usage(self):
+        return self.undo_bytes + self.redo_bytes
+
+    def before_modification(self, modification_type, length):
+        """
+        Drop the history before the first change of a user action is recorded,
+        when the change would not fit into the budget together with the history
+        """
+        editor = self.editor
+        if not modification_type & editor.SC_PERFORMED_USER or self.__check_pending:
+            # Undo/redo, or a later change of an action that is already recorded
+            return
+        limit = self.limit()
+        if not limit or not self.undo_groups:
+            return
+        # A new user action also discards everything that could be redone
+        if self.undo_bytes + length + ACTION_OVERHEAD > limit:
+            self.trim()
+
+    def modification(self, modification_type, length):
+        """Account a SCN_MODIFIED notification of an inserted or deleted text"""
+        editor = self.editor
+        size = length + ACTION_OVERHEAD
+        if modification_type & editor.SC_PERFORMED_USER:
+            # A new user action discards everything that could be redone
+            if self.redo_groups:
+                self.redo_groups.clear()
+                self.redo_bytes = 0
+            if modification_type & editor.SC_STARTACTION or not self.undo_groups:
+                self.undo_groups.append(size)
+            else:
+                self.undo_groups[-1] += size
+            self.undo_bytes += size
+            self.schedule_check()
+        elif modification_type & editor.SC_PERFORMED_UNDO:
+            if (
+                modification_type & editor.SC_LASTSTEPINUNDOREDO
+                and self.undo_groups
+            ):
+                group = self.undo_groups.pop()
+                self.undo_bytes -= group
+                self.redo_groups.append(group)
+                self.redo_bytes += group
+                self.schedule_check()
+        elif modification_type & editor.SC_PERFORMED_REDO:
+            if (
+                modification_type & editor.SC_LASTSTEPINUNDOREDO
+                and self.redo_groups
+            ):
+                group = self.redo_groups.pop()
+                self.redo_bytes -= group
+                self.undo_groups.append(group)
+                self.undo_bytes += group
+                self.schedule_check()
+
+    def schedule_check(self):
+        """Check the limit once the current edit has finished"""
+        if self.__check_pending:
+            return
+        self.__check_pending = True
+        qt.QTimer.singleShot(0, self.check)
+
+    def check(self):
+        # The history over the limit is dropped before the next user action
+        self.__check_pending = False
+        self.show()
+
+    def make_room(self, estimate):
+        """
+        Drop the history before a bulk operation of about 'estimate' bytes
+        when it would not fit into the budget together with the history
+        """
+        limit = self.limit()
+        if not limit or not self.undo_groups and not self.redo_groups:
+            return False
+        if self.memory_usage() + estimate + ACTION_OVERHEAD <= limit:
+            return False
+        self.trim()
+        return True
+
+    def trim(self):
+        """
+        Drop the whole undo and redo history, Scintilla cannot drop
+        single undo groups
+        """
+        editor = self.editor
+        dropped = self.memory_usage()
+        was_modified = editor.isModified()
+        editor.SendScintilla(editor.SCI_EMPTYUNDOBUFFER)
+        self.reset()
+        # Emptying the undo buffer also sets the save point
+        self.trimmed_while_modified = was_modified
+        editor.main_form.display.write_to_statusbar(
+            "Undo history cleared ({} exceeded the {} limit)".format(
+                format_size(dropped), format_size(self.limit())
+            ),
+            5000,
+        )
+        self.show()
+
+    def reset(self):
+        """The undo buffer was emptied"""
+        self.undo_groups.clear()
+        self.redo_groups.clear()
+        self.undo_bytes = 0
+        self.redo_bytes = 0
+        self.trimmed_while_modified = False
+
+    def show(self):
+        """Display the undo memory in the statusbar if the editor is focused"""
+        editor = self.editor
+        if editor.hasFocus():
+            editor.main_form.display.update_undo_memory(editor)
@@ -0,0 +1,90 @@
+"""
+Copyright (c) 2013-present Matic Kukovec.
+Released under the GNU GPL3 license.
+
+For more information check the 'LICENSE.txt' file.
+For complete license information of the dependencies, check the 'additional_licenses' directory.
+"""
+
+# Wrap performance mode: paragraphs of novels are often single lines of thousands
+# of characters, and with word wrap Scintilla lays them out again on every scroll
+# and resize. The performance mode enables the Scintilla layout cache (whole
+# document or visible page), enlarges the position cache, styles the text after
+# the visible range in idle time and, where supported (Scintilla 5.x), lays out
+# lines on several threads.
+#
+# Usage:
+#     components.wrapperformance.configure(editor, enabled=True)
+
+import os
+
+# Scintilla message and constant values, not every QScintilla version
+# exports all of them
+SCI_SETLAYOUTCACHE = 2272
+SCI_SETPOSITIONCACHE = 2514
+SCI_SETIDLESTYLING = 2692
+SCI_SETLAYOUTTHREADS = 2775
+SC_CACHE_CARET = 1
+SC_CACHE_PAGE = 2
+SC_CACHE_DOCUMENT = 3
+SC_IDLESTYLING_NONE = 0
+SC_IDLESTYLING_AFTERVISIBLE = 2
+
+# Scintilla's defaults, used when the mode is turned off
+DEFAULT_POSITION_CACHE = 1024
+# Position cache entries in the performance mode
+PERFORMANCE_POSITION_CACHE = 4096
+# Documents up to this size cache the layout of every line,
+# larger ones only the visible page
+DOCUMENT_CACHE_MAX_BYTES = 8 * 1024 * 1024
+
+
+def layout_threads():
+    """Threads for the multithreaded layout of long lines (Scintilla 5.x)"""
+    return max(min(os.cpu_count() or 1, 8), 1)
+
+
+def layout_cache_level(editor, enabled, document_cache_max_bytes):
+    if not enabled:
+        return SC_CACHE_CARET
+    length = editor.SendScintilla(editor.SCI_GETLENGTH)
+    if length <= document_cache_max_bytes:
+        return SC_CACHE_DOCUMENT
+    return SC_CACHE_PAGE
+
+
+def configure(
+    editor,
+    enabled,
+    document_cache_max_bytes=DOCUMENT_CACHE_MAX_BYTES,
+    position_cache=PERFORMANCE_POSITION_CACHE,
+):
+    """
+    Set the layout cache, position cache, idle styling and layout threads
+    of a QScintilla editor, returns the used layout cache level
+    """
+    send = editor.SendScintilla
+    level = layout_cache_level(editor, enabled, document_cache_max_bytes)
+    send(SCI_SETLAYOUTCACHE, level)
+    send(SCI_SETPOSITIONCACHE, position_cache if enabled else DEFAULT_POSITION_CACHE)
+    send(
+        SCI_SETIDLESTYLING,
+        SC_IDLESTYLING_AFTERVISIBLE if enabled else SC_IDLESTYLING_NONE,
+    )
+    if hasattr(editor, "SCI_SETLAYOUTTHREADS"):
+        # Scintilla versions before 5.2 do not have the message
+        send(SCI_SETLAYOUTTHREADS, layout_threads() if enabled else 1)
+    return level
+
+
+def update_layout_cache(
+    editor, enabled, current_level, document_cache_max_bytes=DOCUMENT_CACHE_MAX_BYTES
+):
+    """
+    Switch between the document and page layout cache when the document
+    grew over or shrank under the limit, returns the used level
+    """
+    level = layout_cache_level(editor, enabled, document_cache_max_bytes)
+    if level != current_level:
+        editor.SendScintilla(SCI_SETLAYOUTCACHE, level)
+    return level
@@ -0,0 +1,11 @@
+#!/bin/sh
+# Build the Cython lexers on GNU/Linux and copy the module next to 'exco.py'.
+# Needs a C compiler and the Python development headers
+# (e.g. 'apt install build-essential python3-dev').
+# Usage:
+#     sh cython/build_linux.sh [python executable]
+set -e
+PYTHON="${1:-python3}"
+cd "$(dirname "$0")"
+"$PYTHON" -m pip install -r requirements-build.txt
+"$PYTHON" cython_setup.py build_ext --build-lib=cython_build/
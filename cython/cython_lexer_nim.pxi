@@ -158,25 +158,21 @@ def style_nim(int start,
     cdef char case_of = 0
     cdef char cls_descrition = 0
     """
-        Token arrays have to have the lenght of the maximum word
-        of any in the document. Otherwise there will be an out of bounds assignment.
-        The other way would be to dynamically allocate the array using malloc,
-        if the size gets larger than the predefined one. Maybe someday.
+        Tokens longer than the token arrays are truncated,
+        there are no keywords that long anyway.
     """
-    cdef char[255]  current_token
-    cdef char[255]  previous_token
-    cdef int        token_length = 0
-    cdef int        temp_state = 0
-    # Scintilla works with bytes, so we have to adjust the start and end boundaries
-    c_text      = NULL
-    py_text     = editor.text().lower()
-    text        = bytearray(py_text, "utf-8")[start:end]
+    cdef char[TOKEN_SIZE]   current_token
+    cdef char[TOKEN_SIZE]   previous_token
+    cdef int                token_length = 0
+    cdef int                temp_state = 0
+    cdef StyleBuffer        styles
+    # Scintilla works with bytes, only the bytes of the styled range are read
+    end         = min(end, editor.SendScintilla(editor.SCI_GETLENGTH))
+    text        = document_bytes(editor, start, end, True)
     c_text      = text
-    text_length = len(text)
-    # Loop optimization, but it's still a pure python function, meaning quite slow
-    setStyling  = lexer.setStyling
-    # Initialize the styling
-    lexer.startStyling(start)
+    text_length = end - start
+    current_token[0]    = 0
+    previous_token[0]   = 0
     '''TOKENIZATION - THE SLOW PART IF DONE IN PYTHON'''
     # Check if there is a style(comment, string, ...) stretching on from the previous line
     if start != 0:
@@ -189,355 +185,368 @@ def style_nim(int start,
             new_commenting = 1
         elif previous_style == NIM_MULTILINE_DOCUMENTATION:
             multi_doc_commenting = 1
-    while i < text_length:
-        if (((c_text[i] == '{' and c_text[i+1] == '.') and pragmaing == 0) or
-            (pragmaing == 1)):
-            """ Pragma statement """
-            temp_state = i - temp_state
-            # Style the currently accumulated token
-            if temp_state > 0:
-                current_token[token_length] = 0
-                check_nim_token(
-                    current_token,
-                    previous_token,
-                    c_text[i],
-                    temp_state,
-                    setStyling
-                )
-            temp_state = i
-            # Skip the already counted '{.' characters
-            if pragmaing == 0:
-                i += 2
-            # Loop until the macro ends
-            while i < text_length:
-                # Check for end of macro
-                if c_text[i] == '.' and c_text[i+1] == '}':
-                    break
-                # Increment the text index only if end of pragma is reached
-                i += 1
-            # Only style the '.}' characters if it's not the end of the text
-            if i < text_length:
-                i += 2
-            # Style the comment
-            temp_state = i - temp_state
-            setStyling(temp_state, NIM_PRAGMA)
-            temp_state = i
-            # Reset the comment flag
-            pragmaing = 0
-            token_length = 0
-            # Skip to the next iteration, because the index is already
-            # at the position at the end of the '*)' characters
-            continue
-        elif ((c_text[i] == '#' and c_text[i+1] == '[' and new_commenting == 0) or
-              (new_commenting == 1)):
-            """ Multiline comment """
-            temp_state = i - temp_state
-            # Style the currently accumulated token
-            if temp_state > 0:
-                current_token[token_length] = 0
-                check_nim_token(
-                    current_token,
-                    previous_token,
-                    c_text[i],
-                    temp_state,
-                    setStyling
-                )
-            temp_state = i
-            # Skip the already counted '#','[' characters
-            if new_commenting == 0:
-                i += 2
-            # Loop until the comment ends
-            while i < text_length:
-                # Check for end of comment
-                if c_text[i] == ']' and c_text[i+1] == '#':
-                    break
-                # Increment the text index only if comment count is non zero
-                i += 1
-            # Only style the "]#" characters if it's not the end of the text
-            if i < text_length:
-                i += 2
-            # Style the comment
-            temp_state = i - temp_state
-            setStyling(temp_state, NIM_MULTILINE_COMMENT)
-            # Set the states and reset the flags
-            temp_state = i
-            new_commenting = 0
-            token_length = 0
-            # Skip to the next iteration, because the index is already
-            # at the position at the end of the string
-            continue
-        elif ((c_text[i] == '#' and c_text[i+1] == '#' and c_text[i+2] == '[' and multi_doc_commenting == 0) or
-              (multi_doc_commenting == 1)):
-            """ Multiline documentation comment """
-            temp_state = i - temp_state
-            # Style the currently accumulated token
-            if temp_state > 0:
-                current_token[token_length] = 0
-                check_nim_token(
-                    current_token,
-                    previous_token,
-                    c_text[i],
-                    temp_state,
-                    setStyling
-                )
-            temp_state = i
-            # Skip the already counted '#','#','[' characters
-            if multi_doc_commenting == 0:
-                i += 3
-            # Loop until the comment ends
-            while i < text_length:
-                # Check for end of comment
-                if c_text[i] == ']' and c_text[i+1] == '#' and c_text[i+2] == '#':
-                    break
-                # Increment the text index only if comment count is non zero
-                i += 1
-            # Only style the "]##" characters if it's not the end of the text
-            if i < text_length:
-                i += 3
-            # Style the comment
-            temp_state = i - temp_state
-            setStyling(temp_state, NIM_MULTILINE_DOCUMENTATION)
-            # Set the states and reset the flags
-            temp_state = i
-            multi_doc_commenting = 0
-            token_length = 0
-            # Skip to the next iteration, because the index is already
-            # at the position at the end of the string
-            continue
-        elif ((c_text[i] == '"' and c_text[i+1] == '"' and c_text[i+2] == '"' and long_stringing == 0) or
-              (long_stringing == 1)):
-            """ Long string """
-            temp_state = i - temp_state
-            # Style the currently accumulated token
-            if temp_state > 0:
-                current_token[token_length] = 0
-                check_nim_token(
-                    current_token,
-                    previous_token,
-                    c_text[i],
-                    temp_state,
-                    setStyling
-                )
-            temp_state = i
-            # Skip the already counted '"','"','"' characters
-            if long_stringing == 0:
-                i += 3
-            # Loop until the comment ends
-            while i < text_length:
-                # Check for end of comment
-                if c_text[i] == '"' and c_text[i+1] == '"' and c_text[i+2] == '"':
-                    break
-                # Increment the text index only if comment count is non zero
-                i += 1
-            # Only style the '"""' characters if it's not the end of the text
-            if i < text_length:
-                i += 3
-            # Style the long string
-            temp_state = i - temp_state
-            setStyling(temp_state, NIM_LONG_STRING)
-            # Set the states and reset the flags
-            temp_state = i
-            long_stringing = 0
-            token_length = 0
-            # Skip to the next iteration, because the index is already
-            # at the position at the end of the string
-            continue
-        elif c_text[i] == '#' and c_text[i+1] != '[' and c_text[i+2] != '[':
-            """ One line comment/documentation comment """
-            temp_state = i - temp_state
-            # Style the currently accumulated token
-            if temp_state > 0:
-                setStyling(temp_state, NIM_DEFAULT)
-            temp_state = i
-            if c_text[i+1] == '#' and c_text[i+2] != '[':
-                """ Documentation comment """
-                # Skip the already counted '#' character
-                i += 1
-                while c_text[i] != '\n' and i < text_length:
+    init_style_buffer(&styles, text_length)
+    with nogil:
+        while i < text_length:
+            if (((c_text[i] == '{' and c_text[i+1] == '.') and pragmaing == 0) or
+                (pragmaing == 1)):
+                """ Pragma statement """
+                temp_state = i - temp_state
+                # Style the currently accumulated token
+                if temp_state > 0:
+                    current_token[token_length] = 0
+                    check_nim_token(
+                        current_token,
+                        previous_token,
+                        c_text[i],
+                        temp_state,
+                        &styles
+                    )
+                temp_state = i
+                # Skip the already counted '{.' characters
+                if pragmaing == 0:
+                    i += 2
+                # Loop until the macro ends
+                while i < text_length:
+                    # Check for end of macro
+                    if c_text[i] == '.' and c_text[i+1] == '}':
+                        break
+                    # Increment the text index only if end of pragma is reached
+                    i += 1
+                # Only style the '.}' characters if it's not the end of the text
+                if i < text_length:
+                    i += 2
+                # Style the comment
+                temp_state = i - temp_state
+                add_style(&styles, temp_state, NIM_PRAGMA)
+                temp_state = i
+                # Reset the comment flag
+                pragmaing = 0
+                token_length = 0
+                # Skip to the next iteration, because the index is already
+                # at the position at the end of the '*)' characters
+                continue
+            elif ((c_text[i] == '#' and c_text[i+1] == '[' and new_commenting == 0) or
+                  (new_commenting == 1)):
+                """ Multiline comment """
+                temp_state = i - temp_state
+                # Style the currently accumulated token
+                if temp_state > 0:
+                    current_token[token_length] = 0
+                    check_nim_token(
+                        current_token,
+                        previous_token,
+                        c_text[i],
+                        temp_state,
+                        &styles
+                    )
+                temp_state = i
+                # Skip the already counted '#','[' characters
+                if new_commenting == 0:
+                    i += 2
+                # Loop until the comment ends
+                while i < text_length:
+                    # Check for end of comment
+                    if c_text[i] == ']' and c_text[i+1] == '#':
+                        break
+                    # Increment the text index only if comment count is non zero
                     i += 1
+                # Only style the "]#" characters if it's not the end of the text
+                if i < text_length:
+                    i += 2
                 # Style the comment
                 temp_state = i - temp_state
-                setStyling(temp_state, NIM_DOCUMENTATION_COMMENT)
-            else:
-                """ Comment """
+                add_style(&styles, temp_state, NIM_MULTILINE_COMMENT)
+                # Set the states and reset the flags
+                temp_state = i
+                new_commenting = 0
+                token_length = 0
+                # Skip to the next iteration, because the index is already
+                # at the position at the end of the string
+                continue
+            elif ((c_text[i] == '#' and c_text[i+1] == '#' and c_text[i+2] == '[' and multi_doc_commenting == 0) or
+                  (multi_doc_commenting == 1)):
+                """ Multiline documentation comment """
+                temp_state = i - temp_state
+                # Style the currently accumulated token
+                if temp_state > 0:
+                    current_token[token_length] = 0
+                    check_nim_token(
+                        current_token,
+                        previous_token,
+                        c_text[i],
+                        temp_state,
+                        &styles
+                    )
+                temp_state = i
+                # Skip the already counted '#','#','[' characters
+                if multi_doc_commenting == 0:
+                    i += 3
+                # Loop until the comment ends
+                while i < text_length:
+                    # Check for end of comment
+                    if c_text[i] == ']' and c_text[i+1] == '#' and c_text[i+2] == '#':
+                        break
+                    # Increment the text index only if comment count is non zero
+                    i += 1
+                # Only style the "]##" characters if it's not the end of the text
+                if i < text_length:
+                    i += 3
+                # Style the comment
+                temp_state = i - temp_state
+                add_style(&styles, temp_state, NIM_MULTILINE_DOCUMENTATION)
+                # Set the states and reset the flags
+                temp_state = i
+                multi_doc_commenting = 0
+                token_length = 0
+                # Skip to the next iteration, because the index is already
+                # at the position at the end of the string
+                continue
+            elif ((c_text[i] == '"' and c_text[i+1] == '"' and c_text[i+2] == '"' and long_stringing == 0) or
+                  (long_stringing == 1)):
+                """ Long string """
+                temp_state = i - temp_state
+                # Style the currently accumulated token
+                if temp_state > 0:
+                    current_token[token_length] = 0
+                    check_nim_token(
+                        current_token,
+                        previous_token,
+                        c_text[i],
+                        temp_state,
+                        &styles
+                    )
+                temp_state = i
+                # Skip the already counted '"','"','"' characters
+                if long_stringing == 0:
+                    i += 3
+                # Loop until the comment ends
+                while i < text_length:
+                    # Check for end of comment
+                    if c_text[i] == '"' and c_text[i+1] == '"' and c_text[i+2] == '"':
+                        break
+                    # Increment the text index only if comment count is non zero
+                    i += 1
+                # Only style the '"""' characters if it's not the end of the text
+                if i < text_length:
+                    i += 3
+                # Style the long string
+                temp_state = i - temp_state
+                add_style(&styles, temp_state, NIM_LONG_STRING)
+                # Set the states and reset the flags
+                temp_state = i
+                long_stringing = 0
+                token_length = 0
+                # Skip to the next iteration, because the index is already
+                # at the position at the end of the string
+                continue
+            elif c_text[i] == '#' and c_text[i+1] != '[' and c_text[i+2] != '[':
+                """ One line comment/documentation comment """
+                temp_state = i - temp_state
+                # Style the currently accumulated token
+                if temp_state > 0:
+                    add_style(&styles, temp_state, NIM_DEFAULT)
+                temp_state = i
+                if c_text[i+1] == '#' and c_text[i+2] != '[':
+                    """ Documentation comment """
+                    # Skip the already counted '#' character
+                    i += 1
+                    while c_text[i] != '\n' and i < text_length:
+                        i += 1
+                    # Style the comment
+                    temp_state = i - temp_state
+                    add_style(&styles, temp_state, NIM_DOCUMENTATION_COMMENT)
+                else:
+                    """ Comment """
+                    # Skip the already counted '#' character
+                    i += 1
+                    while c_text[i] != '\n' and i < text_length:
+                        i += 1
+                    # Style the comment
+                    temp_state = i - temp_state
+                    add_style(&styles, temp_state, NIM_COMMENT)
+                temp_state = i
+                token_length = 0
+                # Skip to the next iteration, because the index is already
+                # at the position at the end of the string
+                continue
+            elif c_text[i] == '#':
+                """ One line comment """
+                temp_state = i - temp_state
+                # Style the currently accumulated token
+                if temp_state > 0:
+                    add_style(&styles, temp_state, NIM_DEFAULT)
+                temp_state = i
                 # Skip the already counted '#' character
                 i += 1
                 while c_text[i] != '\n' and i < text_length:
                     i += 1
                 # Style the comment
                 temp_state = i - temp_state
-                setStyling(temp_state, NIM_COMMENT)
-            temp_state = i
-            token_length = 0
-            # Skip to the next iteration, because the index is already
-            # at the position at the end of the string
-            continue
-        elif c_text[i] == '#':
-            """ One line comment """
-            temp_state = i - temp_state
-            # Style the currently accumulated token
-            if temp_state > 0:
-                setStyling(temp_state, NIM_DEFAULT)
-            temp_state = i
-            # Skip the already counted '#' character
-            i += 1
-            while c_text[i] != '\n' and i < text_length:
-                i += 1
-            # Style the comment
-            temp_state = i - temp_state
-            setStyling(temp_state, NIM_COMMENT)
-            temp_state = i
-            token_length = 0
-            # Skip to the next iteration, because the index is already
-            # at the position at the end of the string
-            continue
-        elif c_text[i] == '"':
-            """ String """
-            temp_state = i - temp_state
-            #Style the currently accumulated token
-            if temp_state > 0:
-                setStyling(temp_state, NIM_DEFAULT)
-            temp_state = i
-            #Skip the already counted '"' character
-            i += 1
-            #Loop until the string ends or EOL is reached
-            while not(c_text[i] == '"' or c_text[i] == '\n') and not(i >= text_length):
-                i += 1
-            #Only style the '"' character if it's not the end of the text
-            if i < text_length:
+                add_style(&styles, temp_state, NIM_COMMENT)
+                temp_state = i
+                token_length = 0
+                # Skip to the next iteration, because the index is already
+                # at the position at the end of the string
+                continue
+            elif c_text[i] == '"':
+                """ String """
+                temp_state = i - temp_state
+                #Style the currently accumulated token
+                if temp_state > 0:
+                    add_style(&styles, temp_state, NIM_DEFAULT)
+                temp_state = i
+                #Skip the already counted '"' character
                 i += 1
-            #Style the string
-            temp_state = i - temp_state
-            setStyling(temp_state, NIM_STRING)
-            temp_state = i
-            #Reset the string flag
-            stringing = 0
-            token_length = 0
-            #Skip to the next iteration, because the index is already
-            #at the position at the end of the string
-            continue
-        elif check_extended_separators(c_text[i]) != 0:
-            temp_state = i - temp_state
-            # Style the currently accumulated token
-            current_token[token_length] = 0
-            if temp_state > 0:
-                check_nim_token(
-                    current_token,
-                    previous_token,
-                    c_text[i],
-                    temp_state,
-                    setStyling
-                )
-            # Skip whitespaces and tabs
-            temp_state = i
-            i += 1
-            while c_text[i] == ' ' or c_text[i] == '\t':
+                #Loop until the string ends or EOL is reached
+                while not(c_text[i] == '"' or c_text[i] == '\n') and not(i >= text_length):
+                    i += 1
+                #Only style the '"' character if it's not the end of the text
+                if i < text_length:
+                    i += 1
+                #Style the string
+                temp_state = i - temp_state
+                add_style(&styles, temp_state, NIM_STRING)
+                temp_state = i
+                #Reset the string flag
+                stringing = 0
+                token_length = 0
+                #Skip to the next iteration, because the index is already
+                #at the position at the end of the string
+                continue
+            elif check_extended_separators(c_text[i]) != 0:
+                temp_state = i - temp_state
+                # Style the currently accumulated token
+                current_token[token_length] = 0
+                if temp_state > 0:
+                    check_nim_token(
+                        current_token,
+                        previous_token,
+                        c_text[i],
+                        temp_state,
+                        &styles
+                    )
+                # Style the operator character and skip whitespaces and tabs
+                temp_state = i
+                if check_nim_operator(c_text[i]) != 0:
+                    add_style(&styles, 1, NIM_OPERATOR)
+                    temp_state += 1
                 i += 1
-            temp_state = i - temp_state
-            setStyling(temp_state, NIM_DEFAULT)
-            # SPECIAL CASES
-            temp_state = i
-            if (strcmp(current_token, "case") == 0 or
-                (strcmp(current_token, "of") == 0 and strcmp(previous_token, "") == 0)):
-                """ 'case' argument or 'case of' arguments """
-                while c_text[i] != ':' and c_text[i] != '\n' and i < text_length:
+                while c_text[i] == ' ' or c_text[i] == '\t':
                     i += 1
                 temp_state = i - temp_state
-                setStyling(temp_state, NIM_CASE_OF)
-            elif (strcmp(current_token, "proc") == 0 or
-                  strcmp(current_token, "macro") == 0 or
-                  strcmp(current_token, "converter") == 0 or
-                  strcmp(current_token, "template") == 0):
-                """ 'proc'/'macro'/'template' name """
-                if c_text[i-1] != '(':
-                    # Skip the whitespaces
-                    while c_text[i] == ' ':
-                        i += 1
-                    temp_state = i - temp_state
-                    if temp_state > 0:
-                        setStyling(temp_state, NIM_DEFAULT)
-                    temp_state = i
-                    # Style the procedure/macro/template name
-                    while (c_text[i] != '(' and 
-                           c_text[i] != ')' and 
-                           c_text[i] != '\n' and 
-                           i < text_length):
+                add_style(&styles, temp_state, NIM_DEFAULT)
+                # SPECIAL CASES
+                temp_state = i
+                if (strcmp(current_token, "case") == 0 or
+                    (strcmp(current_token, "of") == 0 and strcmp(previous_token, "") == 0)):
+                    """ 'case' argument or 'case of' arguments """
+                    while c_text[i] != ':' and c_text[i] != '\n' and i < text_length:
                         i += 1
                     temp_state = i - temp_state
-                    if temp_state > 0:
-                        setStyling(temp_state, NIM_DEFINITION)
-                else:
-                    temp_state = i - temp_state
-                    if temp_state > 0:
-                        setStyling(temp_state, NIM_DEFINITION)
-            # Save the token
-            strcpy(previous_token, current_token)
-            # Set the new index and reset the token lenght
-            temp_state = i
-            token_length = 0
-            # Skip to the next iteration, because the index is already
-            # at the position of the next separator
-            continue
-        elif i < text_length:
-            current_token[token_length] = c_text[i]
-            token_length += 1
-            i += 1
-            while (check_extended_separators(c_text[i]) == 0 and 
-                   i < text_length):
-                current_token[token_length] = c_text[i]
-                token_length += 1
+                    add_style(&styles, temp_state, NIM_CASE_OF)
+                elif (strcmp(current_token, "proc") == 0 or
+                      strcmp(current_token, "macro") == 0 or
+                      strcmp(current_token, "converter") == 0 or
+                      strcmp(current_token, "template") == 0):
+                    """ 'proc'/'macro'/'template' name """
+                    if c_text[i-1] != '(':
+                        # Skip the whitespaces
+                        while c_text[i] == ' ':
+                            i += 1
+                        temp_state = i - temp_state
+                        if temp_state > 0:
+                            add_style(&styles, temp_state, NIM_DEFAULT)
+                        temp_state = i
+                        # Style the procedure/macro/template name
+                        while (c_text[i] != '(' and 
+                               c_text[i] != ')' and 
+                               c_text[i] != '\n' and 
+                               i < text_length):
+                            i += 1
+                        temp_state = i - temp_state
+                        if temp_state > 0:
+                            add_style(&styles, temp_state, NIM_DEFINITION)
+                    else:
+                        temp_state = i - temp_state
+                        if temp_state > 0:
+                            add_style(&styles, temp_state, NIM_DEFINITION)
+                # Save the token
+                strcpy(previous_token, current_token)
+                # Set the new index and reset the token lenght
+                temp_state = i
+                token_length = 0
+                # Skip to the next iteration, because the index is already
+                # at the position of the next separator
+                continue
+            elif i < text_length:
+                token_length = add_token_character(current_token, token_length, c_text[i])
                 i += 1
-            #Correct the index one character back
-            i -= 1
+                while (check_extended_separators(c_text[i]) == 0 and 
+                       i < text_length):
+                    token_length = add_token_character(current_token, token_length, c_text[i])
+                    i += 1
+                #Correct the index one character back
+                i -= 1
         
-        #Increment the array index
-        i += 1
-        #Style the text at the end of the document if
-        #the end has been reached
-        if i >= text_length:
-            temp_state = i - temp_state
-            #Style the currently accumulated token
-            current_token[token_length] = 0
-            if temp_state > 0:
-                check_nim_token(
-                    current_token,
-                    previous_token,
-                    c_text[i],
-                    temp_state,
-                    setStyling
-                )
+            #Increment the array index
+            i += 1
+            #Style the text at the end of the document if
+            #the end has been reached
+            if i >= text_length:
+                temp_state = i - temp_state
+                #Style the currently accumulated token
+                current_token[token_length] = 0
+                if temp_state > 0:
+                    check_nim_token(
+                        current_token,
+                        previous_token,
+                        c_text[i],
+                        temp_state,
+                        &styles
+                    )
     '''TOKENIZATION - THE SLOW PART IF DONE IN PYTHON'''
+    # Apply all of the styles at once
+    apply_style_buffer(&styles, start, lexer, editor)
 
-cdef inline void check_nim_token(char*  current_token,
-                                 char*  previous_token,
-                                 char   current_character,
-                                 int    temp_state,
-                                 setStyling):
+cdef inline void check_nim_token(char*          current_token,
+                                 char*          previous_token,
+                                 char           current_character,
+                                 int            temp_state,
+                                 StyleBuffer*   styles) noexcept nogil:
     """Check and style a token"""
     if check_nim_keyword(current_token, basic_kw_list_length, c_basic_kw_list) == 1:
-        setStyling(temp_state, NIM_BASIC_KEYWORD)
+        add_style(styles, temp_state, NIM_BASIC_KEYWORD)
     elif check_nim_keyword(current_token, user_kw_list_length, c_user_kw_list) == 1:
-        setStyling(temp_state, NIM_USER_KEYWORD)
+        add_style(styles, temp_state, NIM_USER_KEYWORD)
     elif check_nim_keyword(current_token, def_kw_list_length, c_def_kw_list) == 1:
-        setStyling(temp_state, NIM_DEFINITION)
+        add_style(styles, temp_state, NIM_DEFINITION)
     elif check_nim_keyword(current_token, top_kw_list_length, c_top_kw_list) == 1:
-        setStyling(temp_state, NIM_TOP_KEYWORD)
+        add_style(styles, temp_state, NIM_TOP_KEYWORD)
     elif check_nim_keyword(current_token, unsafe_kw_list_length, c_unsafe_kw_list) == 1:
-        setStyling(temp_state, NIM_UNSAFE)
+        add_style(styles, temp_state, NIM_UNSAFE)
     elif check_nim_keyword(current_token, type_kw_list_length, c_type_kw_list) == 1:
-        setStyling(temp_state, NIM_TYPE)
+        add_style(styles, temp_state, NIM_TYPE)
     elif check_nim_keyword(current_token, operator_list_length, c_operator_list) == 1:
-        setStyling(temp_state, NIM_OPERATOR)
+        add_style(styles, temp_state, NIM_OPERATOR)
     elif check_nim_keyword(current_token, keyword_op_list_length, c_keyword_op_list) == 1:
-        setStyling(temp_state, NIM_KEYWORD_OPERATOR)
+        add_style(styles, temp_state, NIM_KEYWORD_OPERATOR)
     elif current_token[0] > 47 and current_token[0] < 58:
-        setStyling(temp_state, NIM_NUMBER)
+        add_style(styles, temp_state, NIM_NUMBER)
     else:
-        setStyling(temp_state, NIM_DEFAULT)
+        add_style(styles, temp_state, NIM_DEFAULT)
+
+cdef inline char check_nim_operator(char character) noexcept nogil:
+    """C function for checking if the separator character is an operator"""
+    cdef int i
+    for i in range(operator_list_length):
+        if character == c_operator_list[i][0]:
+            return 1
+    return 0
 
 cdef inline char check_nim_keyword(char* token_string,
                                    int list_length,
-                                   char** kw_list) nogil:
+                                   char** kw_list) noexcept nogil:
     """C function for checking if the token is a keyword"""
     cdef int i
     for i in range(list_length):
@@ -64,32 +64,28 @@ def style_oberon(int start,
     cdef int    comment_count = 0
     cdef char   first_comment_pass = 0
     """
-        Token arrays have to have the lenght of the maximum word
-        of any in the document. Otherwise there will be an out of bounds assignment.
-        The other way would be to dynamically allocate the array using malloc,
-        if the size gets larger than the predefined one. Maybe someday.
+        Tokens longer than the token arrays are truncated,
+        there are no keywords that long anyway.
     """
-    cdef char[255]  current_token
-    cdef char[255]  previous_token
-    cdef int        token_length = 0
-    cdef int        temp_state = 0
-    #Scintilla works with bytes, so we have to adjust the start and end boundaries
-    c_text      = NULL
-    py_text     = editor.text()
-    text        = bytearray(py_text, "utf-8")[start:end]
+    cdef char[TOKEN_SIZE]   current_token
+    cdef char[TOKEN_SIZE]   previous_token
+    cdef int                token_length = 0
+    cdef int                temp_state = 0
+    cdef StyleBuffer        styles
+    #Scintilla works with bytes, only the bytes of the styled range are read
+    end         = min(end, editor.SendScintilla(editor.SCI_GETLENGTH))
+    text        = document_bytes(editor, start, end, False)
     c_text      = text
-    text_length = len(text)
-    #Loop optimization, but it's still a pure python function, meaning quite slow
-    setStyling  = lexer.setStyling
+    text_length = end - start
     #Initialize comment state and split the text into tokens
     commenting  = 0
     stringing   = 0
-    #Initialize the styling
-    lexer.startStyling(start)
+    current_token[0]    = 0
+    previous_token[0]   = 0
     '''TOKENIZATION - THE SLOW PART IF DONE IN PYTHON'''
     temp_state = 0
     i = 0
-    token_lenght = 0
+    token_length = 0
     #Check if there is a style(comment, string, ...) stretching on from the previous line
     if start != 0:
         previous_style = editor.SendScintilla(editor.SCI_GETSTYLEAT, start - 1)
@@ -102,180 +98,183 @@ def style_oberon(int start,
             the comment counter to get the correct comment styling
             """
             first_comment_pass = 1
-            comment_count = py_text[:start].count("(*")
-            comment_count -= py_text[:start].count("*)")
-    while i < text_length:
-        #Check for a comment
-        if ( ((c_text[i] == '(' and c_text[i+1] == '*') and commenting == 0) or
-             commenting == 1 ):
-            temp_state = i - temp_state
-            #Style the currently accumulated token
-            if temp_state > 0:
-                current_token[token_lenght] = 0
-                check_oberon_token(
-                    current_token,
-                    previous_token,
-                    c_text[i],
-                    temp_state,
-                    setStyling
-                )
-            temp_state = i
-            #Skip the already counted '(*' characters
-            if commenting == 0:
-                i += 2
-            #Initialize the comment counting
-            if first_comment_pass == 0:
-                comment_count = 1
-            first_comment_pass = 0
-            #Loop until the comment ends
-            while comment_count != 0 and not(i >= text_length):
-                #Count the comment beginnings/ends
-                if c_text[i] == '*' and c_text[i+1] == ')':
-                    comment_count -= 1
-                elif c_text[i] == '(' and c_text[i+1] == '*':
-                    comment_count += 1
-                #Increment the text index only if comment count is non zero
-                if comment_count != 0:
-                    i += 1
-            #Only style the '*)' characters if it's not the end of the text
-            if i < text_length:
-                i += 2
-            #Style the comment
-            temp_state = i - temp_state
-            setStyling(temp_state, OB_COMMENT)
-            temp_state = i
-            #Reset the comment flag
-            commenting = 0
-            token_lenght = 0
-            #Skip to the next iteration, because the index is already
-            #at the position at the end of the '*)' characters
-            continue
-        #Check for a string
-        elif c_text[i] == '"':
-            temp_state = i - temp_state
-            #Style the currently accumulated token
-            if temp_state > 0:
-                setStyling(temp_state, OB_DEFAULT)
-            temp_state = i
-            #Skip the already counted '"' character
-            i += 1
-            #Loop until the string ends or EOL is reached
-            while not(c_text[i] == '"' or c_text[i] == '\n') and not(i >= text_length):
-                i += 1
-            #Only style the '"' character if it's not the end of the text
-            if i < text_length:
+            preceding_text = document_bytes(editor, 0, start, False)
+            comment_count = preceding_text.count(b"(*")
+            comment_count -= preceding_text.count(b"*)")
+    init_style_buffer(&styles, text_length)
+    with nogil:
+        while i < text_length:
+            #Check for a comment
+            if ( ((c_text[i] == '(' and c_text[i+1] == '*') and commenting == 0) or
+                 commenting == 1 ):
+                temp_state = i - temp_state
+                #Style the currently accumulated token
+                if temp_state > 0:
+                    current_token[token_length] = 0
+                    check_oberon_token(
+                        current_token,
+                        previous_token,
+                        c_text[i],
+                        temp_state,
+                        &styles
+                    )
+                temp_state = i
+                #Skip the already counted '(*' characters
+                if commenting == 0:
+                    i += 2
+                #Initialize the comment counting
+                if first_comment_pass == 0:
+                    comment_count = 1
+                first_comment_pass = 0
+                #Loop until the comment ends
+                while comment_count != 0 and not(i >= text_length):
+                    #Count the comment beginnings/ends
+                    if c_text[i] == '*' and c_text[i+1] == ')':
+                        comment_count -= 1
+                    elif c_text[i] == '(' and c_text[i+1] == '*':
+                        comment_count += 1
+                    #Increment the text index only if comment count is non zero
+                    if comment_count != 0:
+                        i += 1
+                #Only style the '*)' characters if it's not the end of the text
+                if i < text_length:
+                    i += 2
+                #Style the comment
+                temp_state = i - temp_state
+                add_style(&styles, temp_state, OB_COMMENT)
+                temp_state = i
+                #Reset the comment flag
+                commenting = 0
+                token_length = 0
+                #Skip to the next iteration, because the index is already
+                #at the position at the end of the '*)' characters
+                continue
+            #Check for a string
+            elif c_text[i] == '"':
+                temp_state = i - temp_state
+                #Style the currently accumulated token
+                if temp_state > 0:
+                    add_style(&styles, temp_state, OB_DEFAULT)
+                temp_state = i
+                #Skip the already counted '"' character
                 i += 1
-            #Style the string
-            temp_state = i - temp_state
-            setStyling(temp_state, OB_STRING)
-            temp_state = i
-            #Reset the string flag
-            stringing = 0
-            token_lenght = 0
-            #Skip to the next iteration, because the index is already
-            #at the position at the end of the string
-            continue
-        elif check_extended_separators(c_text[i]) != 0:
-            temp_state = i - temp_state
-            #Style the currently accumulated token
-            current_token[token_lenght] = 0
-            if temp_state > 0:
-                check_oberon_token(
-                    current_token,
-                    previous_token,
-                    c_text[i],
-                    temp_state,
-                    setStyling
-                )
-            #Save the token
-            if strcmp(previous_token, "PROCEDURE") == 0:
-                if c_text[i] == "(" or c_text[i] == ";" :
+                #Loop until the string ends or EOL is reached
+                while not(c_text[i] == '"' or c_text[i] == '\n') and not(i >= text_length):
+                    i += 1
+                #Only style the '"' character if it's not the end of the text
+                if i < text_length:
+                    i += 1
+                #Style the string
+                temp_state = i - temp_state
+                add_style(&styles, temp_state, OB_STRING)
+                temp_state = i
+                #Reset the string flag
+                stringing = 0
+                token_length = 0
+                #Skip to the next iteration, because the index is already
+                #at the position at the end of the string
+                continue
+            elif check_extended_separators(c_text[i]) != 0:
+                temp_state = i - temp_state
+                #Style the currently accumulated token
+                current_token[token_length] = 0
+                if temp_state > 0:
+                    check_oberon_token(
+                        current_token,
+                        previous_token,
+                        c_text[i],
+                        temp_state,
+                        &styles
+                    )
+                #Save the token
+                if strcmp(previous_token, "PROCEDURE") == 0:
+                    if c_text[i] == "(" or c_text[i] == ";" :
+                        strcpy(previous_token, current_token)
+                elif strcmp(current_token, "PROCEDURE") == 0 and c_text[i] == "(":
+                    strcpy(previous_token, "(")
+                else:
                     strcpy(previous_token, current_token)
-            elif strcmp(current_token, "PROCEDURE") == 0 and c_text[i] == "(":
-                strcpy(previous_token, "(")
-            else:
-                strcpy(previous_token, current_token)
             
-            temp_state = i
-            i += 1
-            while c_text[i] == ' ' or c_text[i] == '\t':
+                temp_state = i
                 i += 1
-            temp_state = i - temp_state
-            setStyling(temp_state, OB_DEFAULT)
-            #Set the new index and reset the token lenght
-            temp_state = i
-            token_lenght = 0
-            #Skip to the next iteration, because the index is already
-            #at the position of the next separator
-            continue
-        elif i < text_length:
-            current_token[token_lenght] = c_text[i]
-            token_lenght += 1
-            i += 1
-            while (check_extended_separators(c_text[i]) == 0 and 
-                   i < text_length):
-                current_token[token_lenght] = c_text[i]
-                token_lenght += 1
+                while c_text[i] == ' ' or c_text[i] == '\t':
+                    i += 1
+                temp_state = i - temp_state
+                add_style(&styles, temp_state, OB_DEFAULT)
+                #Set the new index and reset the token lenght
+                temp_state = i
+                token_length = 0
+                #Skip to the next iteration, because the index is already
+                #at the position of the next separator
+                continue
+            elif i < text_length:
+                token_length = add_token_character(current_token, token_length, c_text[i])
                 i += 1
-            #Correct the index one character back
-            i -= 1
+                while (check_extended_separators(c_text[i]) == 0 and 
+                       i < text_length):
+                    token_length = add_token_character(current_token, token_length, c_text[i])
+                    i += 1
+                #Correct the index one character back
+                i -= 1
         
-        #Increment the array index
-        i += 1
-        #Style the text at the end of the document if
-        #the end has been reached
-        if i >= text_length:
-            temp_state = i - temp_state
-            #Style the currently accumulated token
-            current_token[token_lenght] = 0
-            if temp_state > 0:
-                check_oberon_token(
-                    current_token,
-                    previous_token,
-                    c_text[i],
-                    temp_state,
-                    setStyling
-                )
+            #Increment the array index
+            i += 1
+            #Style the text at the end of the document if
+            #the end has been reached
+            if i >= text_length:
+                temp_state = i - temp_state
+                #Style the currently accumulated token
+                current_token[token_length] = 0
+                if temp_state > 0:
+                    check_oberon_token(
+                        current_token,
+                        previous_token,
+                        c_text[i],
+                        temp_state,
+                        &styles
+                    )
     '''TOKENIZATION - THE SLOW PART IF DONE IN PYTHON'''
+    #Apply all of the styles at once
+    apply_style_buffer(&styles, start, lexer, editor)
 
-cdef inline void check_oberon_token(char*  current_token,
-                                    char*  previous_token,
-                                    char   current_character,
-                                    int    temp_state,
-                                    setStyling):
+cdef inline void check_oberon_token(char*          current_token,
+                                    char*          previous_token,
+                                    char           current_character,
+                                    int            temp_state,
+                                    StyleBuffer*   styles) noexcept nogil:
     """Check and style a token"""
     if check_oberon_keyword(current_token) == 1:
         #Keyword
-        setStyling(temp_state, OB_KEYWORD)
+        add_style(styles, temp_state, OB_KEYWORD)
     elif check_oberon_type(current_token) == 1:
         #Type
-        setStyling(temp_state, OB_TYPE)
+        add_style(styles, temp_state, OB_TYPE)
     elif strcmp(previous_token, "PROCEDURE") == 0:
         #Procedure declaration (beginning)
-        setStyling(temp_state, OB_PROCEDURE)
+        add_style(styles, temp_state, OB_PROCEDURE)
     elif strcmp(previous_token, "MODULE") == 0:
         #Module declaration (beginning)
-        setStyling(temp_state, OB_MODULE)
+        add_style(styles, temp_state, OB_MODULE)
     elif strcmp(previous_token, "END") == 0:
         if current_character == '.':
             #Module declaration (end)
-            setStyling(temp_state, OB_MODULE)
+            add_style(styles, temp_state, OB_MODULE)
         elif current_character == ';':
             #Procedure declaration (end)
-            setStyling(temp_state, OB_PROCEDURE)
+            add_style(styles, temp_state, OB_PROCEDURE)
         else:
-            setStyling(temp_state, OB_DEFAULT)
+            add_style(styles, temp_state, OB_DEFAULT)
     elif current_token[0] > 47 and current_token[0] < 58:
         #Number constant
         if strchr(current_token, ';') or strchr(current_token, ','):
-            setStyling(temp_state-1, OB_NUMBER)
-            setStyling(1, OB_DEFAULT)
+            add_style(styles, temp_state-1, OB_NUMBER)
+            add_style(styles, 1, OB_DEFAULT)
         else:
-            setStyling(temp_state, OB_NUMBER)
+            add_style(styles, temp_state, OB_NUMBER)
     else:
-        setStyling(temp_state, OB_DEFAULT)
+        add_style(styles, temp_state, OB_DEFAULT)
 
-cdef inline char check_oberon_keyword(char* token_string) nogil:
+cdef inline char check_oberon_keyword(char* token_string) noexcept nogil:
     """C function for checking if the token is a keyword"""
     global oberon_kw_list_length
     global c_oberon_kw_list
@@ -287,7 +286,7 @@ cdef inline char check_oberon_keyword(char* token_string) nogil:
     #Not a keyword
     return 0
     
-cdef inline char check_oberon_type(char* token_string) nogil:
+cdef inline char check_oberon_type(char* token_string) noexcept nogil:
     """C function for checking if the token is a type decleration"""
     global oberon_types_kw_list_length
     global c_oberon_types_list
@@ -21,8 +21,23 @@ cdef struct EndData:
     char    file_type
     char    data[1024]
 
+#Size of the token arrays, longer tokens are truncated (they are never keywords)
+cdef enum:
+    TOKEN_SIZE = 255
+
+#Styles of the styled text, one byte per text byte, applied with a single SCI_SETSTYLINGEX
+cdef struct StyleBuffer:
+    char*   data
+    int     length
+    int     capacity
+
 cdef inline char** to_cstring_array(object)
-cdef inline char check_extended_separators(char) nogil
+cdef inline char check_extended_separators(char) noexcept nogil
+cdef inline int add_token_character(char*, int, char) noexcept nogil
+cdef inline void add_style(StyleBuffer*, int, char) noexcept nogil
+cdef bytes document_bytes(object, int, int, bint)
+cdef int init_style_buffer(StyleBuffer*, int) except -1
+cdef apply_style_buffer(StyleBuffer*, int, object, object)
 
 
 
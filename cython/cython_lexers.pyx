@@ -13,11 +13,14 @@ For complete license information of the dependencies, check the 'additional_lice
 ##      NOTES:
 ##          Cython build command:
 ##              python cython_setup.py build_ext --build-lib=cython_build/
+##          The lexers collect the styles of the whole styled range into
+##          a StyleBuffer without holding the GIL and apply it with
+##          a single SCI_SETSTYLINGEX message.
 
 
 # Cython libraries
 from libc.stdlib cimport malloc, free
-from libc.string cimport strcmp, strstr, strlen, strcpy, strchr, strtok
+from libc.string cimport strcmp, strstr, strlen, strcpy, strchr, strtok, memset
 from cpython.unicode cimport PyUnicode_AsEncodedString
 
 # Include the various lexer implementations
@@ -63,12 +66,64 @@ cdef inline free_cstring_array(char** cstring_array, int list_length):
         free(cstring_array[i])
     free(cstring_array)
 
-cdef inline char check_extended_separators(char character) nogil:
+cdef inline char check_extended_separators(char character) noexcept nogil:
     cdef int cnt
     for cnt in range(0, separator_list_length):
         if character == extended_separators[cnt]:
             return character
     return 0
 
+cdef inline int add_token_character(char* token, int token_length, char character) noexcept nogil:
+    """Append a character to a token array, returns the new token length"""
+    if token_length < TOKEN_SIZE - 1:
+        token[token_length] = character
+        token_length += 1
+    return token_length
+
+# Zero bytes after the styled text, the lexers look up to three characters ahead
+cdef bytes text_padding = b"\0\0\0\0"
+
+cdef bytes document_bytes(editor, int start, int end, bint lower):
+    """
+    Get the UTF-8 bytes of the document between the positions, without
+    decoding the text into a Python string. Only ASCII characters are
+    lowercased, so the byte positions stay the same as in the document.
+    """
+    # QsciScintilla.bytes adds a terminating zero byte
+    text = bytes(editor.bytes(start, end)) + text_padding
+    if lower:
+        text = text.lower()
+    return text
+
+cdef int init_style_buffer(StyleBuffer* buffer, int capacity) except -1:
+    """Allocate the styles for 'capacity' bytes of text"""
+    buffer.data = <char*>malloc(capacity + 1)
+    if buffer.data == NULL:
+        raise MemoryError()
+    buffer.length = 0
+    buffer.capacity = capacity
+    return 0
+
+cdef inline void add_style(StyleBuffer* buffer, int length, char style) noexcept nogil:
+    """C replacement for QsciLexerCustom.setStyling, clipped to the buffer size"""
+    if length > buffer.capacity - buffer.length:
+        length = buffer.capacity - buffer.length
+    if length <= 0:
+        return
+    memset(buffer.data + buffer.length, style, length)
+    buffer.length += length
+
+cdef apply_style_buffer(StyleBuffer* buffer, int start, lexer, editor):
+    """Style the document from 'start' with one message and free the buffer"""
+    try:
+        lexer.startStyling(start)
+        if buffer.length > 0:
+            editor.SendScintilla(
+                editor.SCI_SETSTYLINGEX, buffer.length, buffer.data[:buffer.length]
+            )
+    finally:
+        free(buffer.data)
+        buffer.data = NULL
+
 
 
@@ -11,12 +11,17 @@ For complete license information of the dependencies, check the 'additional_lice
 ##      NOTES:
 ##          Build the Cython module with:
 ##              "python cython_setup.py build_ext --build-lib=cython_build/"
+##          or on GNU/Linux with the 'build_linux.sh' script, which also
+##          installs the pinned build requirements from 'requirements-build.txt'.
+##          The built module is copied into the Ex.Co. directory,
+##          where the 'lexers' package imports it from.
 
+import glob
 import shutil
 import os
-from distutils.core import setup
-from distutils.extension import Extension
-from Cython.Build import build_ext
+from setuptools import setup
+from setuptools.extension import Extension
+from Cython.Build import cythonize
 
 # Clean-up
 print("Pre-build clean-up started ...")
@@ -39,12 +44,18 @@ ext_modules = [
 
 setup(
     name="Ex.Co. Cython extensions",
-    cmdclass={
-        "build_ext": build_ext,
-    },
-    ext_modules=ext_modules,
+    # The lexers use byte string literals for the C strings
+    ext_modules=cythonize(ext_modules, compiler_directives={"language_level": 2}),
 )
 
+# Copy the module next to 'exco.py'
+application_directory = os.path.abspath("..")
+for module in glob.glob(os.path.join("cython_build", "cython_lexers*.so")) + glob.glob(
+    os.path.join("cython_build", "cython_lexers*.pyd")
+):
+    print("Copying '{}' into '{}' ...".format(module, application_directory))
+    shutil.copy(module, application_directory)
+
 # Clean-up
 # print("Post-build clean-up started ...")
 # if os.path.exists('build'):
@@ -62,6 +62,16 @@ settings_directory = os.path.join(application_directory, ".exco").replace("\\",
 # 文件临时存放目录
 temp_file_directory = os.path.join(application_directory, "temp_file").replace("\\", "/")
 
+# 批量替换的备份和回滚清单存放目录
+replace_backup_directory = os.path.join(settings_directory, "replace_backups").replace(
+    "\\", "/"
+)
+
+# 替换词记录的本地队列数据库
+replace_record_database = os.path.join(
+    settings_directory, "replace_records.sqlite"
+).replace("\\", "/")
+
 # Fonts directory
 fonts_directory = os.path.join(resources_directory, "fonts/").replace("\\", "/")
 # Global string variable for the current platform name ("Windows", "Linux", ...),
@@ -12,6 +12,7 @@ For complete license information of the dependencies, check the 'additional_lice
 
 import sys
 import argparse
+import multiprocessing
 import traceback
 import qt
 import data
@@ -22,7 +23,8 @@ import components.signaldispatcher
 import components.processcontroller
 import components.communicator
 import components.thesquid
-import gui.mainwindow
+import components.startup
+import components.tracing
 import xc_gui.login_window
 from xc_entity import account
 
@@ -75,6 +77,18 @@ def parse_arguments():
                   This flag can be overriden with the --files flag.
                   """,
     )
+    # Tracing
+    arg_parser.add_argument(
+        "-t",
+        "--trace",
+        action="store",
+        default=None,
+        dest="trace_file",
+        help="""
+                  Record performance spans (startup, open, search, replace, save)
+                  and write them as a Chrome trace-event JSON file on exit.
+                  """,
+    )
     # Add a file group to the argument parser
     file_group = arg_parser.add_argument_group("input file options")
     # Input files
@@ -127,9 +141,13 @@ def main():
             file_arguments = [options.single_file]
     if file_arguments == [""]:
         file_arguments = None
+    if options.trace_file is not None:
+        components.tracing.trace_output_file = options.trace_file
+        components.tracing.enable()
 
     # Create QT application, needed to use QT forms
-    app = qt.QApplication(sys.argv)
+    with components.tracing.span("create application", "startup"):
+        app = qt.QApplication(sys.argv)
     # Save the Qt application to the global reference
     data.application = app
     # Create a proxy style
@@ -166,36 +184,77 @@ def main():
     # Global signal dispatcher
     data.signal_dispatcher = components.signaldispatcher.GlobalSignalDispatcher()
 
-    # 在创建MainWindow之前显示登录窗口
-    login_window = xc_gui.login_window.LoginWindow()
+    # 登录窗口显示期间在后台导入主窗口模块, 导入完成后在UI线程创建隐藏的主窗口
+    startup_timer = components.startup.timer
+    startup_timer.mark("application created")
+    module_warmer = components.startup.ModuleWarmer()
+    module_warmer.start()
+
+    def create_main_window():
+        import gui.mainwindow
+
+        # Create the main window, pass the filename that may have been passed as an argument
+        return gui.mainwindow.MainWindow(
+            new_document=options.new_document,
+            logging=data.logging_mode,
+            file_arguments=file_arguments,
+            user_info=account.user_info,  # 传递用户信息
+        )
+
+    main_window_builder = components.startup.MainWindowBuilder(
+        module_warmer, create_main_window
+    )
+
+    # 在显示MainWindow之前显示登录窗口
+    with components.tracing.span("create login window", "startup"):
+        login_window = xc_gui.login_window.LoginWindow()
+    startup_timer.mark("login window created")
+    main_window_builder.start()
     if login_window.exec() != qt.QDialog.DialogCode.Accepted:
         # 如果用户取消登录或关闭窗口，直接退出应用程序
         sys.exit(0)
+    startup_timer.mark("login accepted")
 
     # 登录成功后，确保用户信息已正确加载
     if not account.user_info.token:
         print("登录验证失败，退出应用程序")
         sys.exit(0)
+    # 用户信息在登录成功后才填充, 所以在这里而不是在主窗口创建时显示欢迎信息
+    print(f"用户: {account.user_info.user_name} 信息初始化成功")
 
-    # Create the main window, pass the filename that may have been passed as an argument
-    main_window = gui.mainwindow.MainWindow(
-        new_document=options.new_document,
-        logging=data.logging_mode,
-        file_arguments=file_arguments,
-        user_info=account.user_info,  # 传递用户信息
-    )
-    components.thesquid.TheSquid.init_objects(main_window)
-    main_window.import_user_functions()
-    main_window.show()
+    # 并行预取最近打开的书籍和替换词记录
+    components.startup.prefetch_after_login()
+
+    # The main window is usually already built while the login dialog was shown
+    module_warmer.join()
+    main_window = main_window_builder.build()
+    if main_window is None:
+        # Building in advance failed, build it again to report the error
+        main_window = create_main_window()
+    with components.tracing.span("show main window", "startup"):
+        components.thesquid.TheSquid.init_objects(main_window)
+        main_window.import_user_functions()
+        main_window.show()
+    components.startup.report_time_to_editable(main_window)
     result = app.exec()
+    if components.tracing.trace_output_file:
+        try:
+            components.tracing.export_chrome_trace(components.tracing.trace_output_file)
+            print(components.tracing.summary())
+        except:
+            traceback.print_exc()
     functions.output_backup()
     sys.exit(result)
 
 
 # Check if this is the main executing script
 if __name__ == "__main__":
+    # Needed for the process pools (replace in files) in frozen executables
+    multiprocessing.freeze_support()
     main()
-elif "__main__" in __name__:
+elif "__main__" in __name__ and __name__ != "__mp_main__":
     # cx_freeze mangles the __name__ variable,
-    # but it still contains '__main__'
+    # but it still contains '__main__'.
+    # Process pool workers import this module as '__mp_main__'.
+    multiprocessing.freeze_support()
     main()
@@ -7,15 +7,37 @@ For complete license information of the dependencies, check the 'additional_lice
 """
 
 import codecs
+import concurrent.futures
+import datetime
 import json
 import locale
 import os
 import pathlib
 import re
 import itertools
+import shutil
+import stat
+import tempfile
 
 import data
 
+# Minimum number of files for which the replace-in-files preview uses a process pool
+REPLACE_PROCESS_POOL_THRESHOLD = 32
+# Number of bytes from the start of a file used to classify it as text or binary
+TEXT_CLASSIFY_SAMPLE_SIZE = 8192
+# Maximum number of cached text/binary verdicts
+TEXT_CLASSIFY_CACHE_SIZE = 65536
+# Byte order marks, the UTF-32 ones have to be tested before the UTF-16 ones
+TEXT_BYTE_ORDER_MARKS = (
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+# Cache of the text/binary verdicts, keyed by the file's (device, inode, mtime, size)
+_text_classify_cache = {}
+
 
 def write_json_file(filepath, json_data) -> None:
     with open(filepath, "w+", encoding="utf-8", newline="\n") as f:
@@ -65,55 +87,277 @@ def replace_text_in_files_enum(
     """
     The second version of replace_text_in_files, that goes line-by-line
     and replaces found instances and stores the line numbers,
-    at which the replacements were made
+    at which the replacements were made.
+    The replacement is done in two steps: a dry-run change set is computed
+    first and then commited with a rollback manifest.
     """
-    # Check if the directory is valid
-    if not os.path.isdir(search_dir):
-        return -1
-    # Check if searching over multiple lines
-    elif "\n" in search_text:
-        return -2
-    # Get the files with the search string in them
-    found_files = find_files_with_text(
+    change_set = preview_replace_in_files(
         search_text,
+        replace_text,
         search_dir,
         case_sensitive=case_sensitive,
         search_subdirs=search_subdirs,
-        break_on_find=False,
         file_filter=file_filter,
     )
-    if found_files is None:
-        return {}
-    # Compile the regex expression according to case sensitivity
+    if not isinstance(change_set, dict):
+        return change_set
+    if change_set:
+        commit_replace_change_set(
+            change_set, search_text, replace_text, case_sensitive=case_sensitive
+        )
+    # Return the found files with the line numbers
+    return change_set_to_line_dict(change_set)
+
+
+def _walk_files(search_dir, search_subdirs=True, file_filter=None):
+    """
+    Generator that yields all files in the search directory,
+    filtered by the file extensions in the file filter
+    """
+    if search_subdirs:
+        walk_tree = os.walk(search_dir)
+    else:
+        # Only use the first generator value(only the top directory)
+        walk_tree = [next(os.walk(search_dir))]
+    for root, subFolders, files in walk_tree:
+        for file in files:
+            if file_filter is not None:
+                _, file_extension = os.path.splitext(file)
+                if file_extension.lower() not in file_filter:
+                    continue
+            # On windows, the function "os.path.join(root, file)" line gives a combination of "/" and "\\",
+            # which looks weird but works. The replace was added to have things consistent in the return file list.
+            yield os.path.join(root, file).replace("\\", "/")
+
+
+def _compile_replace_pattern(search_text, case_sensitive):
+    """The search text is matched literally, the same as in find_files_with_text"""
     if case_sensitive:
-        compiled_search_re = re.compile(search_text)
+        return re.compile(re.escape(search_text))
     else:
-        compiled_search_re = re.compile(search_text, re.IGNORECASE)
-    # Loop through the found list and replace the text
-    return_files = {}
-    for file in found_files:
-        # Read the file
-        file_text_list = read_file_to_list(file)
-        # Cycle through the lines, replacing text and storing the line numbers of replacements
-        for i in range(len(file_text_list)):
-            if case_sensitive:
-                line = file_text_list[i]
-            else:
-                search_text = search_text.lower()
-                line = file_text_list[i].lower()
-            if search_text in line:
-                if file in return_files:
-                    return_files[file].append(i)
-                else:
-                    return_files[file] = [i]
-                file_text_list[i] = re.sub(
-                    compiled_search_re, replace_text, file_text_list[i]
-                )
-        # Write the replaced text back to the file
-        replaced_text = "\n".join(file_text_list)
-        write_to_file(replaced_text, file)
-    # Return the found files list
-    return return_files
+        return re.compile(re.escape(search_text), re.IGNORECASE)
+
+
+def _apply_replace(text, compiled_search_re, replace_text):
+    """
+    Replace all instances of the compiled search expression in the text and
+    return the replaced text, the replaced line numbers and the number of hits
+    """
+    lines = []
+    hits = 0
+    line_number = 0
+    last_position = 0
+    for match in compiled_search_re.finditer(text):
+        line_number += text.count("\n", last_position, match.start())
+        last_position = match.start()
+        if not lines or lines[-1] != line_number:
+            lines.append(line_number)
+        hits += 1
+    if hits == 0:
+        return text, lines, hits
+    replaced_text = compiled_search_re.sub(lambda match: replace_text, text)
+    return replaced_text, lines, hits
+
+
+def _preview_replace_file(job):
+    """
+    Process pool worker that computes the changes of a single file
+    without writing anything to disk
+    """
+    file_with_path, search_text, replace_text, case_sensitive = job
+    try:
+        if classify_text_file(file_with_path) is None:
+            return None
+        file_stat = os.stat(file_with_path)
+        text = read_file_to_string(file_with_path)
+        compiled_search_re = _compile_replace_pattern(search_text, case_sensitive)
+        replaced_text, lines, hits = _apply_replace(
+            text, compiled_search_re, replace_text
+        )
+        if hits == 0:
+            return None
+        return (
+            file_with_path,
+            {
+                "lines": lines,
+                "hits": hits,
+                "byte_delta": len(replaced_text.encode("utf-8")) - file_stat.st_size,
+                "size": file_stat.st_size,
+                "mtime_ns": file_stat.st_mtime_ns,
+            },
+        )
+    except:
+        return None
+
+
+def preview_replace_in_files(
+    search_text,
+    replace_text,
+    search_dir,
+    case_sensitive=False,
+    search_subdirs=True,
+    file_filter=None,
+    max_workers=None,
+):
+    """
+    Compute a dry-run change set of replacing the search text in files,
+    nothing is written to disk. The files are processed in a process pool.
+    Returns a dictionary of file paths mapped to dictionaries with the
+    'lines', 'hits', 'byte_delta', 'size' and 'mtime_ns' items.
+    """
+    # Check if the directory is valid
+    if not os.path.isdir(search_dir):
+        return -1
+    # Check if searching over multiple lines
+    elif "\n" in search_text:
+        return -2
+    elif search_text == "":
+        return {}
+    jobs = [
+        (file, search_text, replace_text, case_sensitive)
+        for file in _walk_files(search_dir, search_subdirs, file_filter)
+    ]
+    # Spawning processes is only worth it for a larger number of files
+    if len(jobs) < REPLACE_PROCESS_POOL_THRESHOLD:
+        results = map(_preview_replace_file, jobs)
+        return dict(r for r in results if r is not None)
+    try:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as pool:
+            results = list(pool.map(_preview_replace_file, jobs, chunksize=16))
+    except concurrent.futures.process.BrokenProcessPool:
+        results = map(_preview_replace_file, jobs)
+    return dict(r for r in results if r is not None)
+
+
+def change_set_to_line_dict(change_set):
+    """Convert a change set to the {file: [line-numbers]} format used by the tree displays"""
+    return {file: changes["lines"] for file, changes in change_set.items()}
+
+
+def _atomic_write_bytes(byte_data, file_with_path):
+    """Write the bytes to a temporary file next to the target and rename it over the target"""
+    directory, file_name = os.path.split(file_with_path)
+    handle, temp_path = tempfile.mkstemp(
+        prefix=".{}.".format(file_name), suffix=".tmp", dir=directory or None
+    )
+    try:
+        with os.fdopen(handle, "wb") as file:
+            file.write(byte_data)
+            file.flush()
+            os.fsync(file.fileno())
+        shutil.copymode(file_with_path, temp_path)
+        os.replace(temp_path, file_with_path)
+    except:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def commit_replace_change_set(
+    change_set, search_text, replace_text, case_sensitive=False, backup_directory=None
+):
+    """
+    Write a change set computed by preview_replace_in_files to disk.
+    The original files are backed up and a rollback manifest is stored, every
+    file is replaced with an atomic rename. If any file fails to be written,
+    the already replaced files are rolled back and the error is re-raised.
+    Files modified after the preview was made are skipped.
+    Returns the path to the rollback manifest.
+    """
+    if backup_directory is None:
+        backup_directory = data.replace_backup_directory
+    timestamp = datetime.datetime.now().strftime("%Y%m%d%H%M%S%f")
+    transaction_directory = os.path.join(backup_directory, timestamp).replace(
+        "\\", "/"
+    )
+    os.makedirs(transaction_directory, exist_ok=True)
+    manifest_path = os.path.join(transaction_directory, "manifest.json").replace(
+        "\\", "/"
+    )
+    manifest = {
+        "search_text": search_text,
+        "replace_text": replace_text,
+        "case_sensitive": case_sensitive,
+        "state": "pending",
+        "files": [],
+        "skipped": [],
+    }
+    # Back up all of the original files before touching any of them
+    for i, (file, changes) in enumerate(sorted(change_set.items())):
+        try:
+            file_stat = os.stat(file)
+        except OSError:
+            manifest["skipped"].append(file)
+            continue
+        if (
+            file_stat.st_mtime_ns != changes["mtime_ns"]
+            or file_stat.st_size != changes["size"]
+        ):
+            manifest["skipped"].append(file)
+            continue
+        backup_path = os.path.join(transaction_directory, "{}.bak".format(i))
+        shutil.copy2(file, backup_path)
+        manifest["files"].append(
+            {"path": file, "backup": backup_path.replace("\\", "/")}
+        )
+    write_json_file(manifest_path, manifest)
+    # Replace the files
+    compiled_search_re = _compile_replace_pattern(search_text, case_sensitive)
+    replaced = []
+    try:
+        for item in manifest["files"]:
+            text = read_file_to_string(item["backup"])
+            replaced_text, _, _ = _apply_replace(
+                text, compiled_search_re, replace_text
+            )
+            _atomic_write_bytes(replaced_text.encode("utf-8"), item["path"])
+            replaced.append(item)
+    except:
+        for item in replaced:
+            with open(item["backup"], "rb") as file:
+                _atomic_write_bytes(file.read(), item["path"])
+        manifest["state"] = "rolled-back"
+        write_json_file(manifest_path, manifest)
+        raise
+    manifest["state"] = "committed"
+    write_json_file(manifest_path, manifest)
+    return manifest_path
+
+
+def get_last_replace_manifest(backup_directory=None):
+    """Return the path to the newest commited rollback manifest or None"""
+    if backup_directory is None:
+        backup_directory = data.replace_backup_directory
+    if not os.path.isdir(backup_directory):
+        return None
+    for transaction in sorted(os.listdir(backup_directory), reverse=True):
+        manifest_path = os.path.join(
+            backup_directory, transaction, "manifest.json"
+        ).replace("\\", "/")
+        try:
+            if load_json_file(manifest_path)["state"] == "committed":
+                return manifest_path
+        except:
+            continue
+    return None
+
+
+def rollback_replace_change_set(manifest_path):
+    """
+    Restore the files backed up by commit_replace_change_set from
+    the rollback manifest and return the list of restored files
+    """
+    manifest = load_json_file(manifest_path)
+    if manifest["state"] != "committed":
+        return []
+    restored = []
+    for item in manifest["files"]:
+        with open(item["backup"], "rb") as file:
+            _atomic_write_bytes(file.read(), item["path"])
+        restored.append(item["path"])
+    manifest["state"] = "rolled-back"
+    write_json_file(manifest_path, manifest)
+    return restored
 
 
 def find_files_by_name(
@@ -168,28 +412,12 @@ def find_files_with_text(
     # Check if the directory is valid
     if os.path.isdir(search_dir) == False:
         return None
-    # Create an empty file list
-    text_file_list = []
-    # Check if subdirectories should be included
-    if search_subdirs == True:
-        walk_tree = os.walk(search_dir)
-    else:
-        # Only use the first generator value(only the top directory)
-        walk_tree = [next(os.walk(search_dir))]
-    # "walk" through the directory tree and save the readable files to a list
-    for root, subFolders, files in walk_tree:
-        for file in files:
-            if file_filter is not None:
-                filename, file_extension = os.path.splitext(file)
-                if file_extension.lower() not in file_filter:
-                    continue
-            # Merge the path and filename
-            full_with_path = os.path.join(root, file)
-            if test_text_file(full_with_path) != None:
-                # On windows, the function "os.path.join(root, file)" line gives a combination of "/" and "\\",
-                # which looks weird but works. The replace was added to have things consistent in the return file list.
-                full_with_path = full_with_path.replace("\\", "/")
-                text_file_list.append(full_with_path)
+    # Create the readable file list, only the start of each file is inspected
+    text_file_list = [
+        file
+        for file in _walk_files(search_dir, search_subdirs, file_filter)
+        if classify_text_file(file) is not None
+    ]
     # Search for the text in found files
     return_file_list = []
     for file in text_file_list:
@@ -236,26 +464,11 @@ def find_files_with_text_enum(
         return "Cannot search for empty string!"
 
     text_file_list = []
-
-    if search_subdirs:
-        walk_tree = os.walk(search_dir)
-    else:
-        walk_tree = [next(os.walk(search_dir))]
-
-    for root, subFolders, files in walk_tree:
+    for file in _walk_files(search_dir, search_subdirs, file_filter):
         if cancel_flag():
             return "Search canceled!"
-        for file in files:
-            if cancel_flag():
-                return "Search canceled!"
-            if file_filter is not None:
-                _, file_extension = os.path.splitext(file)
-                if file_extension.lower() not in file_filter:
-                    continue
-            full_with_path = os.path.join(root, file)
-            if test_text_file(full_with_path) is not None:
-                full_with_path = full_with_path.replace("\\", "/")
-                text_file_list.append(full_with_path)
+        if classify_text_file(file) is not None:
+            text_file_list.append(file)
 
     return_file_dict = {}
     for file in text_file_list:
@@ -279,6 +492,58 @@ def find_files_with_text_enum(
     return return_file_dict
 
 
+def _classify_sample(sample):
+    """Return the encoding of a sample of bytes from the start of a file or None if it is binary"""
+    for byte_order_mark, encoding in TEXT_BYTE_ORDER_MARKS:
+        if sample.startswith(byte_order_mark):
+            return encoding
+    if b"\x00" in sample:
+        return None
+    for encoding in ("utf-8", locale.getpreferredencoding(False), "cp936"):
+        try:
+            # The sample can end in the middle of a multi-byte character
+            codecs.getincrementaldecoder(encoding)("strict").decode(sample, final=False)
+            return encoding
+        except (UnicodeDecodeError, LookupError):
+            continue
+    return "latin-1"
+
+
+def classify_text_file(file_with_path):
+    """
+    Cheap test if a file is a text file, used by the directory walkers.
+    Only the first TEXT_CLASSIFY_SAMPLE_SIZE bytes are inspected (byte order marks,
+    NUL bytes, UTF-8 validity) and the verdict is cached per (inode, mtime).
+    Returns the guessed encoding or None for binary/unreadable files.
+    """
+    try:
+        file_stat = os.stat(file_with_path)
+    except OSError:
+        return None
+    if not stat.S_ISREG(file_stat.st_mode):
+        return None
+    key = (
+        file_stat.st_dev,
+        file_stat.st_ino or file_with_path,
+        file_stat.st_mtime_ns,
+        file_stat.st_size,
+    )
+    try:
+        return _text_classify_cache[key]
+    except KeyError:
+        pass
+    try:
+        with open(file_with_path, "rb") as file:
+            sample = file.read(TEXT_CLASSIFY_SAMPLE_SIZE)
+    except OSError:
+        return None
+    verdict = _classify_sample(sample)
+    if len(_text_classify_cache) >= TEXT_CLASSIFY_CACHE_SIZE:
+        _text_classify_cache.clear()
+    _text_classify_cache[key] = verdict
+    return verdict
+
+
 def test_text_file(file_with_path):
     """Test if a file is a plain text file and can be read"""
     # Try to read all of the lines in the file, return None if there is an error
@@ -373,10 +638,12 @@ def test_file_content_for_type(file_with_path):
     file_type = "unknown"
     try:
         first_line = ""
+        encoding = classify_text_file(file_with_path)
+        if encoding is None:
+            return file_type
         # Read the first non-empty line in the file
-        with open(file_with_path, "r") as file:
-            lines = file.readlines()
-            for line in lines:
+        with open(file_with_path, "r", encoding=encoding, errors="replace") as file:
+            for line in file:
                 if line.strip() == "":
                     continue
                 else:
@@ -26,6 +26,7 @@ import traceback
 import webbrowser
 from typing import Callable
 
+import components.tracing
 import constants
 import data
 import qt
@@ -2509,37 +2510,43 @@ def create_size(*args):
         raise Exception("[functions.create_point] Unknown arguments: {}".format(args))
 
 
-PERFORMANCE_MEASURING_FLAG = True
+# Print the performance timer points, they are always recorded
+# as spans when tracing is enabled (components.tracing)
+PERFORMANCE_MEASURING_FLAG = False
+performance_timer_points = threading.local()
 
 
 def performance_timer_start():
-    if not PERFORMANCE_MEASURING_FLAG:
+    if not (PERFORMANCE_MEASURING_FLAG or components.tracing.tracer.enabled):
         return
-    global performance_timer_starting_count
-    global performance_timer_last_point
-    performance_timer_starting_count = time.perf_counter()
-    performance_timer_last_point = performance_timer_starting_count
+    performance_timer_points.start = time.perf_counter()
+    performance_timer_points.last = performance_timer_points.start
 
 
 def performance_timer_show(text=None):
-    if not PERFORMANCE_MEASURING_FLAG:
+    if not (PERFORMANCE_MEASURING_FLAG or components.tracing.tracer.enabled):
         return
-    global performance_timer_last_point
+    info_text = "PERFORMANCE-TIMER"
+    if text:
+        info_text = text
     try:
-        info_text = "PERFORMANCE-TIMER"
-        if text:
-            info_text = text
         current_point = time.perf_counter()
-        end_count = current_point - performance_timer_starting_count
-        diff_count = current_point - performance_timer_last_point
-        performance_timer_last_point = current_point
+        last_point = performance_timer_points.last
+        end_count = current_point - performance_timer_points.start
+        diff_count = current_point - last_point
+        performance_timer_points.last = current_point
+    except AttributeError:
+        print("[{}] Error! Timer not started in this thread".format(info_text))
+        return
+    components.tracing.tracer.add_complete(
+        info_text, "performance-timer", last_point, current_point
+    )
+    if PERFORMANCE_MEASURING_FLAG:
         print(
             "Time: {:.4f}s / diff: {:.4f} -> [{}]".format(
                 end_count, diff_count, info_text
             )
         )
-    except:
-        print("[{}] Error!".format(info_text))
 
 
 def open_url(url):
@@ -12,8 +12,12 @@ import re
 import components.actionfilter
 import components.hotspots
 import components.internals
+import components.linetransform
+import components.undobudget
+import components.wrapperformance
 import components.linelist
 import components.thesquid
+import components.tracing
 import constants
 import data
 import functions
@@ -25,7 +29,10 @@ import gui.contextmenu
 
 from gui.baseeditor import BaseEditor
 from gui.dialogs import YesNoDialog, OkDialog
-from xc_common.file_utils import copy_file
+from xc_common.file_utils import copy_file, copy_file_reencoded, is_utf8_file
+from xc_common.chapter_index import ChapterIndex
+from xc_common.split_export import export_split_book
+from xc_common.book_convert import export_epub
 
 
 class CustomEditor(BaseEditor):
@@ -64,11 +71,19 @@ class CustomEditor(BaseEditor):
     FIND_INDICATOR = 2
     REPLACE_INDICATOR = 3
     SELECTION_INDICATOR = 4
-    # Line strings in a list, gets updated on every text change,
+    # List-like view of the document lines, read on demand from Scintilla,
     # can be used like any other python list(append, extend, reverse, ...)
     line_list = None
-    # List that holds the line numbers, gets updated on every text change
-    line_count = None
+    # Chapter window mode: the ChapterIndex of the backing file and the
+    # (first, last) chapters that are loaded into the editor, None when
+    # the editor holds the whole document
+    chapter_index = None
+    chapter_window = None
+    chapter_window_span = 1
+    # Wrap performance mode of this document, None follows the
+    # 'wrap_performance_mode' editor setting
+    wrap_performance_mode = None
+    wrap_layout_cache = None
     # Reference to the custom context menu
     context_menu = None
     # Selection anti-recursion lock
@@ -82,6 +97,11 @@ class CustomEditor(BaseEditor):
     Built-in and private functions
     """
 
+    @property
+    def line_count(self):
+        """The line numbers of the document (1..lines()), computed on access"""
+        return range(1, self.lines() + 1)
+
     def __del__(self):
         try:
             # Clean up references
@@ -131,6 +151,8 @@ class CustomEditor(BaseEditor):
         # Initialize superclass, from which the current class is inherited,
         # THIS MUST BE DONE SO THAT THE SUPERCLASS EXECUTES ITS __init__ !!!!!!
         super().__init__(parent)
+        # Undo memory accounting, needed by 'setModified'
+        self.undo_budget = components.undobudget.UndoBudget(self)
         # Set encoding format to UTF-8 (Unicode)
         self.setUtf8(True)
         # Set font family and size
@@ -208,7 +230,10 @@ class CustomEditor(BaseEditor):
         self.SCN_MODIFIED.connect(self.__text_modified)
         self.SendScintilla(
             self.SCI_SETMODEVENTMASK,
-            self.SC_MOD_INSERTTEXT | self.SC_MOD_DELETETEXT,
+            self.SC_MOD_INSERTTEXT
+            | self.SC_MOD_DELETETEXT
+            | self.SC_MOD_BEFOREINSERT
+            | self.SC_MOD_BEFOREDELETE,
         )
         # Initialize components
         self.internals = components.internals.Internals(parent=self, tab_widget=parent)
@@ -217,8 +242,8 @@ class CustomEditor(BaseEditor):
         # self.add_corner_buttons()
         # Setup autocompletion
         # self.init_autocompletions()
-        # Setup the LineList object that will hold the custom editor text as a list of lines
-        self.line_list = components.linelist.LineList(self, self.text())
+        # Setup the line list view over the custom editor text
+        self.line_list = components.linelist.LazyLineList(self)
         # Reset the selection anti-recursion lock
         self.selection_lock = False
         # Bookmark initialization
@@ -248,7 +273,10 @@ class CustomEditor(BaseEditor):
         # Filter out the line_list attribute
         if name == "line_list":
             # Check if the assigned object is NOT a LineList object
-            if isinstance(value, components.linelist.LineList) == False:
+            if not isinstance(
+                value,
+                (components.linelist.LineList, components.linelist.LazyLineList),
+            ):
                 # Check the extend value type
                 if isinstance(value, list) == False:
                     raise Exception("Reassignment value of line_list must be a list!")
@@ -303,7 +331,7 @@ class CustomEditor(BaseEditor):
                 qt.QsciScintilla.WhitespaceVisibility.WsInvisible
             )
         # Makefile special settings
-        if isinstance(self.lexer(), lexers.Makefile):
+        if lexers.is_lexer(self.lexer(), "Makefile"):
             if editor_settings["makefile_uses_tabs"]:
                 self.setIndentationsUseTabs(True)
             if editor_settings["makefile_whitespace_visible"]:
@@ -335,6 +363,14 @@ class CustomEditor(BaseEditor):
         token,
         annotationLinesAdded,
     ):
+        if modificationType & (self.SC_MOD_BEFOREINSERT | self.SC_MOD_BEFOREDELETE):
+            # The change is not made yet, only the undo budget needs it
+            self.undo_budget.before_modification(modificationType, length)
+            return
+        # Drop the cached lines of the line list that were changed
+        if self.line_list is not None:
+            self.line_list.update_from_modification(position, modificationType, added)
+        self.undo_budget.modification(modificationType, length)
         lexer = self.lexer()
         if lexer is not None:
             if hasattr(lexer, "text_modified_callback"):
@@ -388,6 +424,14 @@ class CustomEditor(BaseEditor):
             if bookmarks[i]["editor"] == self:
                 line = self.markerLine(bookmarks[i]["handle"]) + 1
                 bookmarks[i]["line"] = line
+        # The layout cache level depends on the document size
+        if self.wrap_layout_cache is not None:
+            self.wrap_layout_cache = components.wrapperformance.update_layout_cache(
+                self,
+                self.is_wrap_performance_mode(),
+                self.wrap_layout_cache,
+                self.__wrap_document_cache_max_bytes(),
+            )
 
     selection_lock = False
 
@@ -569,10 +613,7 @@ class CustomEditor(BaseEditor):
 
     def text_changed(self):
         """Event that fires when the scintilla document text changes"""
-        # Update the line list
-        self.line_list.update_text_to_list(self.text())
-        # Update the line count list with a list comprehention
-        self.line_count = [line for line in range(1, self.lines() + 1)]
+        # The line list is already updated from the SCN_MODIFIED notifications
         # Execute the parent basic widget signal
         self._parent._signal_text_changed()
 
@@ -582,9 +623,29 @@ class CustomEditor(BaseEditor):
         super().setFocus()
         # Check the save button status of the menubar
         self._parent._set_save_status()
+        self.main_form.display.update_undo_memory(self)
         # Check indication
         self.main_form.view.indication_check()
 
+    def isModified(self):
+        """
+        Overridden, because trimming the undo history also moves
+        Scintilla's save point
+        """
+        return super().isModified() or self.undo_budget.trimmed_while_modified
+
+    def setModified(self, state):
+        super().setModified(state)
+        if not state:
+            self.undo_budget.trimmed_while_modified = False
+
+    def setText(self, text):
+        """
+        Overridden, QScintilla empties the undo buffer after setting the text
+        """
+        super().setText(text)
+        self.undo_budget.reset()
+
     def replaceSelectedText(self, *args, **kwargs):
         marks = self.main_form.bookmarks.get_editor_all(self)
         mark_data = []
@@ -696,10 +757,9 @@ class CustomEditor(BaseEditor):
         if isinstance(text, list):
             # Join the list items into one string with newline as the delimiter
             text = "\n".join(text)
-        # Select all the text in the document
-        self.setSelection(0, 0, self.lines(), 0)
-        # Replace it with the new text
-        self.replaceSelectedText(text)
+        # Only the changed ranges are replaced, so the undo history
+        # does not store a copy of the whole document
+        components.linetransform.replace_text(self, text)
 
     def get_line_number(self):
         """return the line on which the cursor is"""
@@ -1281,7 +1341,10 @@ class CustomEditor(BaseEditor):
                 self.comment_lines(start_line_number, end_line_number)
 
     def for_each_line(self, in_func):
-        """Apply function 'in_func' to lines"""
+        """
+        Apply function 'in_func' to lines, only the changed lines are replaced
+        and the whole change is one undo action
+        """
         # Check that in_func is really a function
         if callable(in_func) == False:
             self.main_form.display.repl_display_message(
@@ -1289,67 +1352,30 @@ class CustomEditor(BaseEditor):
                 message_type=constants.MessageType.ERROR,
             )
             return
-        # Loop through the lines and apply the function to each line
-        if (
-            self.getSelection() == (-1, -1, -1, -1)
-            or self.getSelection()[0] == self.getSelection()[2]
-        ):
-            # No selected text, apply function to the every line
-            try:
-                new_line_list = []
-                function_returns_none = False
-                for line in self.line_list:
-                    new_line = in_func(line)
-                    if new_line == None:
-                        function_returns_none = True
-                        continue
-                    new_line_list.append(new_line)
-                if function_returns_none == False:
-                    # Assign the new list over the old one
-                    self.line_list = new_line_list
-            except Exception as ex:
-                self.main_form.display.repl_display_message(
-                    "'for_each_line' has an error:\n" + str(ex),
-                    message_type=constants.MessageType.ERROR,
-                )
-                return
-        else:
-            # Selected text, apply function to the selected lines only
-            try:
-                # Get the starting and end line
-                start_line_number = self.getSelection()[0] + 1
-                end_line_number = self.getSelection()[2] + 1
-                # Apply the function to the lines
-                new_line_list = []
-                function_returns_none = False
-                for line in self.line_list[start_line_number:end_line_number]:
-                    new_line = in_func(line)
-                    if new_line == None:
-                        function_returns_none = True
-                        continue
-                    new_line_list.append(new_line)
-                if function_returns_none == False:
-                    # Assign the new list over the old one
-                    self.line_list[start_line_number:end_line_number] = new_line_list
-            except Exception as ex:
-                self.main_form.display.repl_display_message(
-                    "'for_each_line' has an error:\n" + str(ex),
-                    message_type=constants.MessageType.ERROR,
-                )
-                return
+        # No selected text applies the function to every line,
+        # otherwise only to the selected lines
+        line_range = components.linetransform.selected_line_range(self)
+        try:
+            # If the function returns None for any line, nothing is changed
+            components.linetransform.transform_lines(
+                self, in_func, line_range, none_deletes=False
+            )
+        except Exception as ex:
+            self.main_form.display.repl_display_message(
+                "'for_each_line' has an error:\n" + str(ex),
+                message_type=constants.MessageType.ERROR,
+            )
+            return
 
     def remove_empty_lines(self):
-        new_line_list = []
-        for line in self.line_list:
-            if line.strip() != "":
-                new_line_list.append(line)
-        # Assign the new list over the old one
-        self.line_list = new_line_list
+        """Remove the lines that contain only whitespace, as one undo action"""
+        components.linetransform.remove_blank_lines(self)
 
     """
     Search and replace functions
     """
 
+    @components.tracing.traced("editor.find-text", "search")
     def find_text(
         self,
         search_text,
@@ -1491,6 +1517,7 @@ class CustomEditor(BaseEditor):
                 # Return successful find
                 return constants.SearchResult.FOUND
 
+    @components.tracing.traced("editor.find-all", "search")
     def find_all(
         self,
         search_text,
@@ -1511,6 +1538,7 @@ class CustomEditor(BaseEditor):
         )
         return matches
 
+    @components.tracing.traced("editor.find-and-replace", "replace")
     def find_and_replace(
         self,
         search_text,
@@ -1573,6 +1601,7 @@ class CustomEditor(BaseEditor):
                 # self.main_form.display.write_to_statusbar("Text was not found!")
                 return False
 
+    @components.tracing.traced("editor.replace-all", "replace")
     def replace_all(
         self, search_text, replace_text, case_sensitive=False, regular_expression=False, whole_words=False
     ):
@@ -1787,6 +1816,7 @@ class CustomEditor(BaseEditor):
         #     )
         return matches
 
+    @components.tracing.traced("editor.replace-in-selection", "replace")
     def replace_in_selection(
         self, search_text, replace_text, case_sensitive=False, regular_expression=False
     ):
@@ -1813,12 +1843,10 @@ class CustomEditor(BaseEditor):
 
     def replace_entire_text(self, new_text):
         """
-        Replace the entire text of the document
+        Replace the entire text of the document, only the changed ranges
+        are replaced so the undo history stays small
         """
-        # Select the entire text
-        self.selectAll(True)
-        # Replace the text with the new
-        self.replaceSelectedText(new_text)
+        components.linetransform.replace_text(self, new_text)
 
     def convert_case(self, uppercase=False):
         """
@@ -1997,6 +2025,7 @@ class CustomEditor(BaseEditor):
             line_number = self.lines() - 1
         return line_number
 
+    @components.tracing.traced("editor.save", "save")
     def save_document(self, saveas=False, encoding="utf-8", line_ending=None):
         """
         Save a document to a file
@@ -2025,7 +2054,10 @@ class CustomEditor(BaseEditor):
         # Change the displayed name of the tab in the basic widget
         self._parent.set_tab_name(self, self.name)
         # Check if a line ending was specified
-        if line_ending == None:
+        if self.chapter_window is not None:
+            # Only the loaded chapters are in the editor
+            save_result = self.__save_chapter_window(encoding, line_ending)
+        elif line_ending == None:
             # Write contents of the tab into the specified file
             save_result = functions.write_to_file(self.text(), self.save_path, encoding)
         else:
@@ -2068,6 +2100,7 @@ class CustomEditor(BaseEditor):
             )
             return False
 
+    @components.tracing.traced("editor.save-and-export", "save")
     def save_document_and_export(self, encoding="utf-8", line_ending=None):
         """
         Save a document to a file
@@ -2088,7 +2121,7 @@ class CustomEditor(BaseEditor):
                 # Replace back-slashes to forward-slashes on Windows
                 if data.platform == "Windows":
                     temp_save_path = functions.unixify_path(temp_save_path)
-                copy_file(data.platform, self.save_path, temp_save_path)
+                self.__export_file(temp_save_path, encoding)
         else:
             # Tab has an empty directory attribute or "SaveAs" was invoked, select file using the QFileDialog
             # Get the filename from the QFileDialog window
@@ -2106,11 +2139,114 @@ class CustomEditor(BaseEditor):
             if data.platform == "Windows":
                 temp_save_path = functions.unixify_path(temp_save_path)
 
-            if self.save_document(saveas=False, encoding=encoding):
-                copy_file(data.platform, self.save_path, temp_save_path)
+            if self.chapter_window is not None:
+                # The backing file of the chapter window always stays in UTF-8
+                saved = self.save_document(saveas=False)
+            else:
+                saved = self.save_document(saveas=False, encoding=encoding)
+            if saved:
+                self.__export_file(temp_save_path, encoding)
             else:
                 raise Exception("保存失败")
 
+    def export_split_book(self, export_dir=None, by_volume=False, encoding="utf-8"):
+        """
+        Save the document and export it into one file per chapter
+        (or per volume) into the selected directory
+        """
+        if not self.save_path:
+            return False
+        if export_dir is None:
+            tab_text = self._parent.tabText(self._parent.indexOf(self))
+            export_dir = qt.QFileDialog.getExistingDirectory(
+                self,
+                "分章导出: '{}'".format(tab_text),
+                os.path.dirname(self.save_path),
+            )
+            # Check if the user has selected a directory
+            if export_dir == "":
+                return False
+            # Replace back-slashes to forward-slashes on Windows
+            if data.platform == "Windows":
+                export_dir = functions.unixify_path(export_dir)
+        try:
+            index = self.__save_for_export()
+            if index is None:
+                return False
+            exported_files = export_split_book(
+                index.file_path, export_dir, by_volume, encoding, index=index
+            )
+        except Exception as ex:
+            self.main_form.display.repl_display_message(
+                "Split export failed: {}".format(ex),
+                message_type=constants.MessageType.ERROR,
+            )
+            return False
+        self.main_form.display.repl_display_success(
+            "Exported {} files into '{}'".format(len(exported_files), export_dir)
+        )
+        return True
+
+    def export_epub(self, export_path=None):
+        """Save the document and export it as an EPUB book, one entry per chapter"""
+        if not self.save_path:
+            return False
+        if export_path is None:
+            tab_text = self._parent.tabText(self._parent.indexOf(self))
+            export_path, _ = qt.QFileDialog.getSaveFileName(
+                self,
+                "导出EPUB: '{}'".format(tab_text),
+                os.path.splitext(self.save_path)[0] + ".epub",
+                "EPUB (*.epub);;All Files(*)",
+            )
+            # Check if the user has selected a file
+            if export_path == "":
+                return False
+            # Replace back-slashes to forward-slashes on Windows
+            if data.platform == "Windows":
+                export_path = functions.unixify_path(export_path)
+        try:
+            index = self.__save_for_export()
+            if index is None:
+                return False
+            export_epub(
+                index.file_path,
+                export_path,
+                title=os.path.splitext(os.path.basename(export_path))[0],
+                index=index,
+            )
+        except Exception as ex:
+            self.main_form.display.repl_display_message(
+                "EPUB export failed: {}".format(ex),
+                message_type=constants.MessageType.ERROR,
+            )
+            return False
+        self.main_form.display.repl_display_success(
+            "Exported EPUB '{}'".format(export_path)
+        )
+        return True
+
+    def __save_for_export(self):
+        """
+        Save the document as UTF-8 if needed and return the chapter index of
+        the file the exports stream the chapters from, None if saving failed
+        """
+        if self.chapter_window is not None:
+            if not self.save_document(saveas=False):
+                return None
+            return self.chapter_index
+        # The saved file can be in another encoding, save it as UTF-8 then
+        if self.isModified() or not is_utf8_file(self.save_path):
+            if not self.save_document(saveas=False):
+                return None
+        return ChapterIndex(self.save_path)
+
+    def __export_file(self, export_path, encoding):
+        if self.chapter_window is not None:
+            copy_file_reencoded(self.chapter_index.file_path, export_path, encoding)
+        else:
+            copy_file(data.platform, self.save_path, export_path)
+
     # def save_to_temp_directory(self, encoding="utf-8", line_ending=None):
     #     """
     #     新打开文件，主动存到临时文件夹
@@ -2240,7 +2376,7 @@ class CustomEditor(BaseEditor):
         qt.QTimer.singleShot(10, self.__check_special_lexer_functionality)
 
     def __check_special_lexer_functionality(self):
-        if isinstance(self.lexer(), lexers.nim.Nim):
+        if lexers.is_lexer(self.lexer(), "Nim"):
             pass
 
     def reset_brace_matching(self):
@@ -2256,8 +2392,9 @@ class CustomEditor(BaseEditor):
 
     def tabs_to_spaces(self):
         """Convert all tab(\t) characters to spaces"""
-        spaces = " " * settings.get("editor")["tab_width"]
-        self.setText(self.text().replace("\t", spaces))
+        components.linetransform.tabs_to_spaces(
+            self, settings.get("editor")["tab_width"]
+        )
 
     def undo_all(self):
         """Repeat undo until there is something to undo"""
@@ -2328,6 +2465,15 @@ class CustomEditor(BaseEditor):
         # Check if the name of the document is valid
         if self.name == "" or self.name == None:
             return
+        # Only reload the chapter window from the backing file
+        if self.chapter_window is not None:
+            self.open_chapter_window(
+                self.chapter_index.file_path,
+                self.chapter_window[0],
+                self.chapter_window_span,
+            )
+            self.reset_text_changed()
+            return
         # Open the file and read the contents
         try:
             disk_file_text = functions.read_file_to_string(self.save_path)
@@ -2343,6 +2489,118 @@ class CustomEditor(BaseEditor):
         # Reset text changed indication
         self.reset_text_changed()
 
+    """
+    Chapter window functions
+    """
+
+    @components.tracing.traced("editor.open-chapter-window", "file")
+    def open_chapter_window(self, file_with_path=None, chapter=0, span=1):
+        """
+        Switch the editor to the chapter window mode. Only 'span' chapters
+        starting at 'chapter' are loaded into the editor, the rest of the
+        book stays in the offset-indexed backing file, so whole-document
+        operations only scale with the size of the loaded chapters.
+        The edited chapters are spliced back on chapter switch or save.
+        """
+        if file_with_path is None:
+            file_with_path = self.save_path
+        self.chapter_index = ChapterIndex(file_with_path)
+        self.chapter_window_span = max(int(span), 1)
+        self.__load_chapter_window(chapter)
+
+    def __load_chapter_window(self, chapter):
+        last_chapter = len(self.chapter_index) - 1
+        first = min(max(chapter, 0), last_chapter)
+        last = min(first + self.chapter_window_span - 1, last_chapter)
+        text = self.chapter_index.read_text(first, last)
+        self.chapter_window = (first, last)
+        self.setText(text)
+        # Undo must not cross chapter boundaries
+        self.SendScintilla(self.SCI_EMPTYUNDOBUFFER)
+        self.undo_budget.reset()
+        self.setModified(False)
+        self.setCursorPosition(0, 0)
+
+    def chapter_window_sync(self):
+        """Splice the edited chapters in the editor back into the backing file"""
+        if self.chapter_window is None or not self.isModified():
+            return True
+        if self.chapter_index.is_stale():
+            self.main_form.display.repl_display_message(
+                "Backing file '{}' was changed outside of the editor!".format(
+                    self.chapter_index.file_path
+                ),
+                message_type=constants.MessageType.ERROR,
+            )
+            return False
+        first, last = self.chapter_window
+        new_count = self.chapter_index.splice(
+            first, last, self.text().encode("utf-8")
+        )
+        if new_count == 0:
+            # All of the loaded chapters were deleted
+            self.__load_chapter_window(first)
+        else:
+            self.chapter_window = (first, first + new_count - 1)
+            self.setModified(False)
+        return True
+
+    def chapter_window_goto(self, chapter):
+        """Store the edited chapters and load the selected chapter into the editor"""
+        if self.chapter_window is None:
+            return False
+        if not self.chapter_window_sync():
+            return False
+        self.__load_chapter_window(chapter)
+        return True
+
+    def chapter_window_next(self):
+        if self.chapter_window is not None:
+            return self.chapter_window_goto(self.chapter_window[1] + 1)
+        return False
+
+    def chapter_window_previous(self):
+        if self.chapter_window is not None:
+            return self.chapter_window_goto(
+                self.chapter_window[0] - self.chapter_window_span
+            )
+        return False
+
+    def close_chapter_window(self):
+        """Store the edited chapters and load the whole book into the editor"""
+        if self.chapter_window is None:
+            return True
+        if not self.chapter_window_sync():
+            return False
+        book_line = self.chapter_index[self.chapter_window[0]].line
+        text = functions.read_file_to_string(self.chapter_index.file_path)
+        self.chapter_index = None
+        self.chapter_window = None
+        self.setText(text)
+        self.SendScintilla(self.SCI_EMPTYUNDOBUFFER)
+        self.undo_budget.reset()
+        self.setModified(False)
+        self.goto_line(book_line + 1)
+        return True
+
+    def __save_chapter_window(self, encoding, line_ending):
+        """Save the document while in the chapter window mode"""
+        try:
+            if not self.chapter_window_sync():
+                return Exception("Chapter window could not be stored!")
+            backing_file = self.chapter_index.file_path
+            if encoding == "utf-8" and line_ending is None:
+                if functions.are_paths_same(backing_file, self.save_path):
+                    return True
+            elif functions.are_paths_same(backing_file, self.save_path):
+                return Exception(
+                    "The chapter window backing file has to stay in UTF-8 with '\\n' line endings!"
+                )
+            copy_file_reencoded(backing_file, self.save_path, encoding, line_ending)
+            return True
+        except Exception as ex:
+            return ex
+
     def copy(self):
         super().copy()
         selected_text = self.selectedText()
@@ -2391,6 +2649,41 @@ class CustomEditor(BaseEditor):
             self.main_form.display.repl_display_message(
                 "Line wrapping OFF", message_type=constants.MessageType.WARNING
             )
+        self.apply_wrap_performance()
+
+    def is_wrap_performance_mode(self):
+        if self.wrap_performance_mode is None:
+            return settings.get("editor").get("wrap_performance_mode", True)
+        return self.wrap_performance_mode
+
+    def __wrap_document_cache_max_bytes(self):
+        return int(
+            settings.get("editor").get("wrap_document_cache_max_mb", 8) * 1024 * 1024
+        )
+
+    def apply_wrap_performance(self):
+        """
+        Configure Scintilla's layout cache, position cache, idle styling
+        and layout threads for the wrap performance mode of the document
+        """
+        self.wrap_layout_cache = components.wrapperformance.configure(
+            self,
+            self.is_wrap_performance_mode(),
+            self.__wrap_document_cache_max_bytes(),
+        )
+
+    def set_wrap_performance_mode(self, state):
+        """Set the wrap performance mode of this document, None follows the settings"""
+        self.wrap_performance_mode = state
+        self.apply_wrap_performance()
+
+    def toggle_wrap_performance_mode(self):
+        state = not self.is_wrap_performance_mode()
+        self.set_wrap_performance_mode(state)
+        self.main_form.display.repl_display_message(
+            "Wrap performance mode {}".format("ON" if state else "OFF"),
+            message_type=constants.MessageType.WARNING,
+        )
 
     def toggle_line_endings(self):
         """Set the visibility of the End-Of-Line character"""
@@ -2532,6 +2825,7 @@ class CustomEditor(BaseEditor):
         else:
             self.setWrapMode(qt.QsciScintilla.WrapMode.WrapNone)
             self.setWrapVisualFlags(qt.QsciScintilla.WrapVisualFlag.WrapFlagNone)
+        self.apply_wrap_performance()
 
 
 class Bookmarks:
@@ -80,11 +80,20 @@ import components.actionfilter
 import components.communicator
 import components.processcontroller
 import components.thesquid
+import components.tracing
+import components.undobudget
 from components.pathwatcher import FileEvent, PathWatcher
 from xc_gui.chapter_list import ChapterList
 from xc_gui.special_replace import SpecialReplace
 from xc_gui.fixed_widget import FixedWidget
 from xc_common.file_utils import copy_file_and_save_utf
+from xc_common.utils import http_stats
+from xc_service.async_service import get_service_executor
+from xc_service.replace_record_store import (
+    ReplaceRecordSync,
+    get_replace_record_store,
+    queue_replace_record,
+)
 
 
 if data.platform == "Windows":
@@ -123,6 +132,7 @@ class MainWindow(qt.QMainWindow):
     statusbar_label_left = (
         None  # Left side of the statusbar for showing line and column numbers
     )
+    statusbar_label_undo = None  # Statusbar label for the undo memory of the editor
     docking_overlay = (
         None  # Left side of the statusbar for showing line and column numbers
     )
@@ -138,6 +148,8 @@ class MainWindow(qt.QMainWindow):
     save_ascii_file_action = None
     save_ansiwin_file_action = None
     save_in_encoding = None
+    export_split_menu = None
+    chapter_window_menu = None
     # Attribute for signaling the state of the save buttons in the "File" menubar
     save_state = False
     # Supported Ex.Co. file extension types
@@ -169,11 +181,8 @@ class MainWindow(qt.QMainWindow):
         # Initialize superclass, from which the main form is inherited
         super().__init__()
         # 存储用户信息作为MainWindow的属性
+        # (主窗口在登录窗口显示期间创建, 登录成功后用户信息才会填充)
         self.user_info = user_info
-        # 如果用户信息存在，可以在控制台显示欢迎信息
-        if self.user_info:
-            welcome_message = f"用户: {self.user_info.user_name} 信息初始化成功"
-            print(welcome_message)
 
         # Initialize the namespace references
         self.settings = self.Settings(self)
@@ -185,6 +194,9 @@ class MainWindow(qt.QMainWindow):
         self.bookmarks = self.Bookmarks(self)
         self.tools = self.Tools(self)
         self.fixed_widget = FixedWidget(self)
+        # 替换词记录的后台同步
+        self.replace_record_sync = ReplaceRecordSync(get_replace_record_store(), self)
+        self.replace_record_sync.start()
 
         # 添加这一行来初始化字体设置
         self.font_resizer = xc_gui.font_resize_func.FontResizeFunc(self)
@@ -403,6 +415,10 @@ class MainWindow(qt.QMainWindow):
         self.statusbar_label_left = qt.QLabel(self)
         self.statusbar_label_left.setText("")
         self.statusbar.addPermanentWidget(self.statusbar_label_left)
+        # Add label for showing the undo memory of the focused editor
+        self.statusbar_label_undo = qt.QLabel(self)
+        self.statusbar_label_undo.setText("")
+        self.statusbar.addPermanentWidget(self.statusbar_label_undo)
         # Add the statusbar to the MainWindow
         self.setStatusBar(self.statusbar)
 
@@ -514,6 +530,11 @@ class MainWindow(qt.QMainWindow):
             update_cwd=self.update_cwd,
             open_cwd=self.open_cwd,
             close_all=self.close_all_tabs,
+            # Editor API latency/error counters
+            http_stats=http_stats,
+            # Offline replace record queue
+            queue_replace_record=queue_replace_record,
+            replace_records=get_replace_record_store(),
             # Settings functions
             settings=settings,
             load_settings=self.settings.restore,
@@ -525,6 +546,7 @@ class MainWindow(qt.QMainWindow):
             find_files=self.system.find_files,
             find_in_files=self.system.find_in_files,
             replace_in_files=self.system.replace_in_files,
+            rollback_replace_in_files=self.system.rollback_replace_in_files,
             # Document editing references
             find=self.editing.find,
             regex_find=self.editing.regex_find,
@@ -675,6 +697,13 @@ class MainWindow(qt.QMainWindow):
         if settings.get("restore_last_session"):
             layout = self.view.layout_generate()
             settings.save_last_layout(layout)
+        # Cancel the editor API calls that are still running
+        if event.isAccepted():
+            # The unsent replace records stay in the local queue
+            self.replace_record_sync.stop()
+            get_service_executor().shutdown()
+            # Write the pending settings changes
+            settings.flush()
 
     def resizeEvent(self, event):
         """
@@ -833,6 +862,48 @@ class MainWindow(qt.QMainWindow):
                 self.update_menubar()
                 self.import_user_functions()
 
+    def file_export_split(self, by_volume=False, encoding="utf-8"):
+        """Export the current book into one file per chapter or volume"""
+        focused_tab = self.get_tab_by_focus()
+        if isinstance(focused_tab, CustomEditor) == True:
+            focused_tab.export_split_book(by_volume=by_volume, encoding=encoding)
+
+    def file_export_epub(self):
+        """Export the current book as an EPUB file"""
+        focused_tab = self.get_tab_by_focus()
+        if isinstance(focused_tab, CustomEditor) == True:
+            focused_tab.export_epub()
+
+    def chapter_window_navigate(self, direction):
+        """
+        Move the chapter window of the current book: -1 loads the previous
+        chapter, 1 the next one and None loads the whole book into the editor
+        """
+        focused_tab = self.get_tab_by_focus()
+        if isinstance(focused_tab, CustomEditor) == False:
+            return
+        if focused_tab.chapter_window is None:
+            self.display.repl_display_message(
+                "当前文档没有以章节窗口打开",
+                message_type=constants.MessageType.WARNING,
+            )
+            return
+        if direction is None:
+            focused_tab.close_chapter_window()
+            return
+        if direction < 0:
+            focused_tab.chapter_window_previous()
+        else:
+            focused_tab.chapter_window_next()
+        first = focused_tab.chapter_window[0]
+        self.display.repl_display_message(
+            "章节 {}/{}: {}".format(
+                first + 1,
+                len(focused_tab.chapter_index),
+                focused_tab.chapter_index[first].title,
+            )
+        )
+
     def file_save_all(self, encoding="utf-8"):
         """
         Save all open modified files
@@ -1081,6 +1152,69 @@ class MainWindow(qt.QMainWindow):
                 # Add the parent action to the menu
                 file_menu.addMenu(self.save_in_encoding)
 
+            # Additional menu for exporting a file per chapter/volume
+            def add_export_split_submenu():
+                self.export_split_menu = Menu("分章导出...", self.menubar)
+                self.export_split_menu.setEnabled(False)
+                temp_icon = functions.create_icon("tango_icons/document-save-as.png")
+                self.export_split_menu.setIcon(temp_icon)
+                self.export_split_menu.installEventFilter(click_filter)
+                def export_split_chapters():
+                    self.file_export_split(by_volume=False)
+
+                def export_split_chapters_gbk():
+                    self.file_export_split(by_volume=False, encoding="gbk")
+
+                def export_split_volumes():
+                    self.file_export_split(by_volume=True)
+
+                def export_split_volumes_gbk():
+                    self.file_export_split(by_volume=True, encoding="gbk")
+
+                def export_book_epub():
+                    self.file_export_epub()
+
+                for text, function in (
+                    ("按章节导出 (UTF-8)", export_split_chapters),
+                    ("按章节导出 (GBK)", export_split_chapters_gbk),
+                    ("按卷导出 (UTF-8)", export_split_volumes),
+                    ("按卷导出 (GBK)", export_split_volumes_gbk),
+                    ("导出为EPUB", export_book_epub),
+                ):
+                    self.export_split_menu.addAction(
+                        create_action(
+                            text, None, "保存并导出为每章/每卷一个文件", None, function
+                        )
+                    )
+                file_menu.addMenu(self.export_split_menu)
+
+            # Additional menu for moving through a book in the chapter window mode
+            def add_chapter_window_submenu():
+                self.chapter_window_menu = Menu("章节窗口...", self.menubar)
+                self.chapter_window_menu.setEnabled(False)
+                temp_icon = functions.create_icon("tango_icons/document-open.png")
+                self.chapter_window_menu.setIcon(temp_icon)
+                self.chapter_window_menu.installEventFilter(click_filter)
+
+                def previous_chapter():
+                    self.chapter_window_navigate(-1)
+
+                def next_chapter():
+                    self.chapter_window_navigate(1)
+
+                def whole_book():
+                    self.chapter_window_navigate(None)
+
+                for text, tooltip, function in (
+                    ("上一章", "保存当前章节并载入上一章", previous_chapter),
+                    ("下一章", "保存当前章节并载入下一章", next_chapter),
+                    ("显示整本书", "保存当前章节并在编辑器中载入整本书", whole_book),
+                ):
+                    self.chapter_window_menu.addAction(
+                        create_action(text, None, tooltip, None, function)
+                    )
+                file_menu.addMenu(self.chapter_window_menu)
+
             # Add the closing functions
             # Close tab
             def close_tab():
@@ -1178,6 +1312,8 @@ class MainWindow(qt.QMainWindow):
             file_menu.addAction(open_file_action)
             file_menu.addAction(self.save_file_action)
             file_menu.addAction(self.saveas_file_action)
+            add_export_split_submenu()
+            add_chapter_window_submenu()
             # add_save_in_different_encoding_submenu()
             # file_menu.addAction(self.save_all_action)
             # file_menu.addSeparator()
@@ -2029,6 +2165,21 @@ class MainWindow(qt.QMainWindow):
                 toggle_wordwrap,
             )
 
+            def toggle_wrap_performance_mode():
+                try:
+                    self.get_tab_by_focus().toggle_wrap_performance_mode()
+                except:
+                    self.display.repl_display_error(traceback.format_exc())
+
+            toggle_wrap_performance_action = create_action(
+                "Enable/Disable Wrap Performance Mode",
+                None,
+                "Enable/Disable the layout caching and idle styling of long wrapped lines "
+                + "for the currently selected document",
+                "tango_icons/wordwrap.png",
+                toggle_wrap_performance_mode,
+            )
+
             def reload_file():
                 try:
                     self.get_tab_by_focus().reload_file()
@@ -2252,6 +2403,9 @@ class MainWindow(qt.QMainWindow):
             edit_menu.addAction(dialog_find_action)
             edit_menu.addSeparator()
             edit_menu.addAction(open_special_replace_action)
+            edit_menu.addSeparator()
+            edit_menu.addAction(toggle_wrap_action)
+            edit_menu.addAction(toggle_wrap_performance_action)
 
             # edit_menu.addAction(regex_find_action)
             # edit_menu.addAction(find_and_replace_action)
@@ -2267,7 +2421,6 @@ class MainWindow(qt.QMainWindow):
             # edit_menu.addAction(regex_replace_all_action)
             # edit_menu.addAction(toggle_comment_action)
             # edit_menu.addAction(toggle_autocompletion_action)
-            # edit_menu.addAction(toggle_wrap_action)
             # edit_menu.addAction(to_uppercase_action)
             # edit_menu.addAction(to_lowercase_action)
             # edit_menu.addAction(node_tree_action)
@@ -3465,7 +3618,7 @@ class MainWindow(qt.QMainWindow):
             self,
             "Open File",
             self.last_opened_directory,  # 使用上次打开的目录作为初始目录
-            "Text Files (*.txt *.text);;All Files (*)",
+            "Text Files (*.txt *.text);;Books (*.epub *.docx);;All Files (*)",
             # "All Files (*);;Ex.Co. Files({})".format(" ".join(self.exco_file_exts)),
         )
         # 如果用户选择了文件，更新上次打开的目录
@@ -3478,6 +3631,7 @@ class MainWindow(qt.QMainWindow):
         # Check and then add the selected file to the main TabWidget if the window parameter is unspecified
         self.open_files(files, tab_widget)
 
+    @components.tracing.traced("open-files", "file")
     def open_files(self, files=None, tab_widget=None):
         """Cheach and read valid files to the selected TabWidget"""
 
@@ -3495,6 +3649,7 @@ class MainWindow(qt.QMainWindow):
                 new_file_path = copy_file_and_save_utf(data.platform, file, data.temp_file_directory)
                 self.open_file(new_file_path, tab_widget)
 
+    @components.tracing.traced("open-file", "file")
     def open_file(self, file=None, tab_widget=None, save_layout=False):
         """
         Read file contents into a TabWidget
@@ -3510,7 +3665,11 @@ class MainWindow(qt.QMainWindow):
                 return
             # Check the file size
             file_size = functions.get_file_size_Mb(in_file)
-            if file_size > 50:
+            editor_settings = settings.get("editor")
+            use_chapter_window = editor_settings.get(
+                "chapter_window", False
+            ) and file_size >= editor_settings.get("chapter_window_min_size_mb", 20)
+            if file_size > 50 and not use_chapter_window:
                 # Create the warning message
                 warning = "The file is larger than 50 MB! ({:d} MB)\n".format(
                     int(file_size)
@@ -3539,23 +3698,28 @@ class MainWindow(qt.QMainWindow):
 
             if new_tab is not None:
                 try:
-                    # Read the whole file and display the text
-                    file_text = functions.read_file_to_string(in_file)
-                    # Remove the NULL characters
-                    if "\0" in file_text:
-                        # Use append, it does not remove the NULL characters
-                        new_tab.append(file_text)
-                        # Display a warning that the text has NULL characters
-                        message = (
-                            "CAUTION: NULL ('\\0') characters in file:\n'{}'".format(
-                                in_file
-                            )
-                        )
-                        self.display.repl_display_message(
-                            message, message_type=constants.MessageType.WARNING
+                    if use_chapter_window:
+                        # Large book: only load a window of chapters
+                        new_tab.open_chapter_window(
+                            in_file,
+                            span=editor_settings.get("chapter_window_span", 1),
                         )
                     else:
-                        new_tab.setText(file_text)
+                        # Read the whole file and display the text
+                        file_text = functions.read_file_to_string(in_file)
+                        # Remove the NULL characters
+                        if "\0" in file_text:
+                            # Use append, it does not remove the NULL characters
+                            new_tab.append(file_text)
+                            # Display a warning that the text has NULL characters
+                            message = "CAUTION: NULL ('\\0') characters in file:\n'{}'".format(
+                                in_file
+                            )
+                            self.display.repl_display_message(
+                                message, message_type=constants.MessageType.WARNING
+                            )
+                        else:
+                            new_tab.setText(file_text)
                     # Save the layout if needed
                     if save_layout == True:
                         self.view.layout_save()
@@ -3781,6 +3945,8 @@ class MainWindow(qt.QMainWindow):
         """Enable or disable the save functionality and save options under "File" in the menubar"""
         self.save_file_action.setEnabled(enable)
         self.saveas_file_action.setEnabled(enable)
+        self.export_split_menu.setEnabled(enable)
+        self.chapter_window_menu.setEnabled(enable)
         # self.save_ascii_file_action.setEnabled(enable)
         # self.save_ansiwin_file_action.setEnabled(enable)
         # self.save_in_encoding.setEnabled(enable)
@@ -5169,6 +5335,7 @@ QSplitter::handle {{
                 "'{}' in its name".format(file_name), found_files, search_dir
             )
 
+        @components.tracing.traced("find-in-files", "search")
         def find_in_files(
             self,
             search_text,
@@ -5202,6 +5369,7 @@ QSplitter::handle {{
                     str(ex), message_type=constants.MessageType.ERROR
                 )
 
+        @components.tracing.traced("replace-in-files", "replace")
         def replace_in_files(
             self,
             search_text,
@@ -5215,15 +5383,10 @@ QSplitter::handle {{
             Same as the function in the 'functions' module.
             Replaces all instances of search_string with the replace_string in the files,
             that contain the search string in the search_dir.
+            A dry-run preview of the changes is displayed first and the files are
+            only changed after confirmation. The original files are backed up,
+            use rollback_replace_in_files to revert the replacement.
             """
-            # Close the log window if it is displayed
-            warning = "The replaced content will be saved back into the files!\n"
-            warning += "You better have a backup of the files if you are unsure,\n"
-            warning += "because this action CANNOT be undone!\n"
-            warning += "Do you want to continue?"
-            reply = YesNoDialog.warning(warning)
-            if reply == constants.DialogResult.No.value:
-                return
             # Check if the search directory is none, then use a dialog window
             # to select the real search directory
             if search_dir is None:
@@ -5231,8 +5394,8 @@ QSplitter::handle {{
                 # Update the current working directory
                 if os.path.isdir(search_dir):
                     self._parent.set_cwd(search_dir)
-            # Replace the text in files
-            result = functions.replace_text_in_files_enum(
+            # Compute the changes without writing anything
+            change_set = functions.preview_replace_in_files(
                 search_text,
                 replace_text,
                 search_dir,
@@ -5240,7 +5403,7 @@ QSplitter::handle {{
                 search_subdirs,
                 file_filter,
             )
-            if result == -1:
+            if change_set == -1:
                 self._parent.display.repl_display_message(
                     "Invalid search&replace in files directory!",
                     message_type=constants.MessageType.ERROR,
@@ -5249,7 +5412,7 @@ QSplitter::handle {{
                     "Invalid search directory!", 2000
                 )
                 return
-            elif result == -2:
+            elif change_set == -2:
                 self._parent.display.repl_display_message(
                     "Cannot search&replace in files over multiple lines!",
                     message_type=constants.MessageType.ERROR,
@@ -5258,20 +5421,106 @@ QSplitter::handle {{
                     "Invalid search directory!", 2000
                 )
                 return
+            elif not isinstance(change_set, dict):
+                self._parent.display.repl_display_message(
+                    "Unknown error!", message_type=constants.MessageType.ERROR
+                )
+                return
             # Check the return type
-            if len(result) == 0:
+            if len(change_set) == 0:
                 self._parent.display.repl_display_message(
                     "No files with '{}' in its text were found!".format(search_text),
                     message_type=constants.MessageType.WARNING,
                 )
-            elif isinstance(result, dict):
-                self._parent.display.show_replaced_text_in_files_in_tree(
-                    search_text, replace_text, result, search_dir
+                return
+            # Display the preview of the changes
+            hits = sum(v["hits"] for v in change_set.values())
+            byte_delta = sum(v["byte_delta"] for v in change_set.values())
+            summary = "PREVIEW: {} replacements in {} files ({:+d} bytes)".format(
+                hits, len(change_set), byte_delta
+            )
+            self._parent.display.show_replaced_text_in_files_in_tree(
+                search_text,
+                replace_text,
+                functions.change_set_to_line_dict(change_set),
+                search_dir,
+                summary=summary,
+            )
+            warning = "{} instances in {} files will be replaced!\n".format(
+                hits, len(change_set)
+            )
+            warning += "The original files will be backed up and the replacement\n"
+            warning += "can be reverted with 'rollback_replace_in_files()'.\n"
+            warning += "Do you want to continue?"
+            reply = YesNoDialog.warning(warning)
+            if reply == constants.DialogResult.No.value:
+                self._parent.display.write_to_statusbar(
+                    "Replace in files canceled, no files were changed.", 2000
                 )
-            else:
+                return
+            # Replace the text in files
+            try:
+                manifest_path = functions.commit_replace_change_set(
+                    change_set, search_text, replace_text, case_sensitive
+                )
+            except Exception as ex:
                 self._parent.display.repl_display_message(
-                    "Unknown error!", message_type=constants.MessageType.ERROR
+                    "Replace in files failed, all changes were rolled back: {}".format(
+                        ex
+                    ),
+                    message_type=constants.MessageType.ERROR,
+                )
+                return
+            manifest = functions.load_json_file(manifest_path)
+            for skipped_file in manifest["skipped"]:
+                self._parent.display.repl_display_message(
+                    "File was changed after the preview, skipped: {}".format(
+                        skipped_file
+                    ),
+                    message_type=constants.MessageType.WARNING,
                 )
+            self._parent.display.show_replaced_text_in_files_in_tree(
+                search_text,
+                replace_text,
+                {
+                    item["path"]: change_set[item["path"]]["lines"]
+                    for item in manifest["files"]
+                },
+                search_dir,
+            )
+            self._parent.display.write_to_statusbar(
+                "Replaced text in {} files.".format(len(manifest["files"])), 2000
+            )
+
+        def rollback_replace_in_files(self, manifest_path=None):
+            """
+            Revert a replace_in_files operation using its rollback manifest,
+            by default the last commited replacement is reverted
+            """
+            if manifest_path is None:
+                manifest_path = functions.get_last_replace_manifest()
+            if manifest_path is None:
+                self._parent.display.repl_display_message(
+                    "No replacement in files to revert!",
+                    message_type=constants.MessageType.WARNING,
+                )
+                return
+            try:
+                restored = functions.rollback_replace_change_set(manifest_path)
+            except Exception as ex:
+                self._parent.display.repl_display_message(
+                    "Reverting the replacement in files failed: {}".format(ex),
+                    message_type=constants.MessageType.ERROR,
+                )
+                return
+            for file in restored:
+                self._parent.display.repl_display_message(
+                    "Restored: {}".format(file),
+                    message_type=constants.MessageType.SUCCESS,
+                )
+            self._parent.display.write_to_statusbar(
+                "Restored {} files.".format(len(restored)), 2000
+            )
 
         def show_explorer(self):
             if data.platform == "Windows":
@@ -5301,6 +5550,7 @@ QSplitter::handle {{
             # Initialize the namespace classes
             self.line = self.Line(self)
 
+        @components.tracing.traced("find-in-open-documents", "search")
         def find_in_open_documents(
             self,
             search_text,
@@ -5420,6 +5670,7 @@ QSplitter::handle {{
             )
             return False
 
+        @components.tracing.traced("replace-all-in-open-documents", "replace")
         def replace_all_in_open_documents(
             self,
             search_text,
@@ -5750,6 +6001,25 @@ QSplitter::handle {{
                 )
                 self._parent.statusbar_label_left.setText(statusbar_text)
 
+        def update_undo_memory(self, editor=None):
+            """Show the undo history memory of the editor in the statusbar"""
+            label = self._parent.statusbar_label_undo
+            if label is None:
+                return
+            undo_budget = getattr(editor, "undo_budget", None)
+            if undo_budget is None:
+                label.setText("")
+                return
+            statusbar_text = "UNDO: {}".format(
+                components.undobudget.format_size(undo_budget.memory_usage())
+            )
+            limit = undo_budget.limit()
+            if limit:
+                statusbar_text += " / {}".format(
+                    components.undobudget.format_size(limit)
+                )
+            label.setText(statusbar_text)
+
         def repl_display_success(self, *message):
             self.repl_display_message(
                 *message, message_type=constants.MessageType.SUCCESS
@@ -6462,7 +6732,7 @@ QSplitter::handle {{
             )
 
         def show_replaced_text_in_files_in_tree(
-            self, search_text, replace_text, file_list, directory
+            self, search_text, replace_text, file_list, directory, summary=None
         ):
             """
             Display the found files with line information returned from the
@@ -6487,7 +6757,7 @@ QSplitter::handle {{
             parent.found_files_tab._parent.setCurrentWidget(parent.found_files_tab)
             # Display the found files information in the tree tab
             parent.found_files_tab.display_replacements_in_files(
-                search_text, replace_text, file_list, directory
+                search_text, replace_text, file_list, directory, summary
             )
 
         def show_text_difference(
@@ -6598,9 +6868,13 @@ QSplitter::handle {{
                 parent = self._parent
             lexers_menu = Menu(menu_name, parent)
 
-            def create_lexer(lexer, description):
-                func = functools.partial(set_lexer, lexer, description)
-                func.__name__ = "set_lexer_{}".format(lexer.__name__)
+            def create_lexer(lexer_name, description):
+                # The lexer class is resolved only when the action is used,
+                # so building the menu does not load every lexer module
+                def func(*args):
+                    set_lexer(getattr(lexers, lexer_name), description)
+
+                func.__name__ = "set_lexer_{}".format(lexer_name)
                 return func
 
             NONE_action = create_action(
@@ -6608,7 +6882,7 @@ QSplitter::handle {{
                 None,
                 "Disable document lexer",
                 "tango_icons/file.png",
-                create_lexer(lexers.Text, "Plain text"),
+                create_lexer("Text", "Plain text"),
                 lexers_menu,
             )
             ADA_action = create_action(
@@ -6616,7 +6890,7 @@ QSplitter::handle {{
                 None,
                 "Change document lexer to: Ada",
                 "language_icons/logo_ada.png",
-                create_lexer(lexers.Ada, "Ada"),
+                create_lexer("Ada", "Ada"),
                 lexers_menu,
             )
             AWK_action = create_action(
@@ -6624,7 +6898,7 @@ QSplitter::handle {{
                 None,
                 "Change document lexer to: AWK",
                 "language_icons/logo_awk.png",
-                create_lexer(lexers.AWK, "AWK"),
+                create_lexer("AWK", "AWK"),
                 lexers_menu,
             )
             BASH_action = create_action(
@@ -6632,7 +6906,7 @@ QSplitter::handle {{
                 None,
                 "Change document lexer to: Bash",
                 "language_icons/logo_bash.png",
-                create_lexer(lexers.Bash, "Bash"),
+                create_lexer("Bash", "Bash"),
                 lexers_menu,
             )
             BATCH_action = create_action(
@@ -6640,7 +6914,7 @@ QSplitter::handle {{
                 None,
                 "Change document lexer to: Batch",
                 "language_icons/logo_batch.png",
-                create_lexer(lexers.Batch, "Batch"),
+                create_lexer("Batch", "Batch"),
                 lexers_menu,
             )
             CMAKE_action = create_action(
@@ -6648,7 +6922,7 @@ QSplitter::handle {{
                 None,
                 "Change document lexer to: CMake",
                 "language_icons/logo_cmake.png",
-                create_lexer(lexers.CMake, "CMake"),
+                create_lexer("CMake", "CMake"),
                 lexers_menu,
             )
             C_CPP_action = create_action(
@@ -6656,7 +6930,7 @@ QSplitter::handle {{
                 None,
                 "Change document lexer to: C / C++",
                 "language_icons/logo_c_cpp.png",
-                create_lexer(lexers.CPP, "C / C++"),
+                create_lexer("CPP", "C / C++"),
                 lexers_menu,
             )
             CSS_action = create_action(
@@ -6664,7 +6938,7 @@ QSplitter::handle {{
                 None,
                 "Change document lexer to: CSS",
                 "language_icons/logo_css.png",
-                create_lexer(lexers.CSS, "CSS"),
+                create_lexer("CSS", "CSS"),
                 lexers_menu,
             )
             D_action = create_action(
@@ -6672,7 +6946,7 @@ QSplitter::handle {{
                 None,
                 "Change document lexer to: D",
                 "language_icons/logo_d.png",
-                create_lexer(lexers.D, "D"),
+                create_lexer("D", "D"),
                 lexers_menu,
             )
             FORTRAN_action = create_action(
@@ -6680,7 +6954,7 @@ QSplitter::handle {{
                 None,
                 "Change document lexer to: Fortran",
                 "language_icons/logo_fortran.png",
-                create_lexer(lexers.Fortran, "Fortran"),
+                create_lexer("Fortran", "Fortran"),
                 lexers_menu,
             )
             HTML_action = create_action(
@@ -6688,7 +6962,7 @@ QSplitter::handle {{
                 None,
                 "Change document lexer to: HTML",
                 "language_icons/logo_html.png",
-                create_lexer(lexers.HTML, "HTML"),
+                create_lexer("HTML", "HTML"),
                 lexers_menu,
             )
             LUA_action = create_action(
@@ -6696,7 +6970,7 @@ QSplitter::handle {{
                 None,
                 "Change document lexer to: Lua",
                 "language_icons/logo_lua.png",
-                create_lexer(lexers.Lua, "Lua"),
+                create_lexer("Lua", "Lua"),
                 lexers_menu,
             )
             MAKEFILE_action = create_action(
@@ -6704,7 +6978,7 @@ QSplitter::handle {{
                 None,
                 "Change document lexer to: MakeFile",
                 "language_icons/logo_makefile.png",
-                create_lexer(lexers.Makefile, "MakeFile"),
+                create_lexer("Makefile", "MakeFile"),
                 lexers_menu,
             )
             MATLAB_action = create_action(
@@ -6712,7 +6986,7 @@ QSplitter::handle {{
                 None,
                 "Change document lexer to: Matlab",
                 "language_icons/logo_matlab.png",
-                create_lexer(lexers.Matlab, "Matlab"),
+                create_lexer("Matlab", "Matlab"),
                 lexers_menu,
             )
             NIM_action = create_action(
@@ -6720,7 +6994,7 @@ QSplitter::handle {{
                 None,
                 "Change document lexer to: Nim",
                 "language_icons/logo_nim.png",
-                create_lexer(lexers.Nim, "Nim"),
+                create_lexer("Nim", "Nim"),
                 lexers_menu,
             )
             OBERON_action = create_action(
@@ -6728,7 +7002,7 @@ QSplitter::handle {{
                 None,
                 "Change document lexer to: Oberon / Modula",
                 "language_icons/logo_oberon.png",
-                create_lexer(lexers.Oberon, "Oberon / Modula"),
+                create_lexer("Oberon", "Oberon / Modula"),
                 lexers_menu,
             )
             PASCAL_action = create_action(
@@ -6736,7 +7010,7 @@ QSplitter::handle {{
                 None,
                 "Change document lexer to: Pascal",
                 "language_icons/logo_pascal.png",
-                create_lexer(lexers.Pascal, "Pascal"),
+                create_lexer("Pascal", "Pascal"),
                 lexers_menu,
             )
             PERL_action = create_action(
@@ -6744,7 +7018,7 @@ QSplitter::handle {{
                 None,
                 "Change document lexer to: Perl",
                 "language_icons/logo_perl.png",
-                create_lexer(lexers.Perl, "Perl"),
+                create_lexer("Perl", "Perl"),
                 lexers_menu,
             )
             PYTHON_action = create_action(
@@ -6752,7 +7026,7 @@ QSplitter::handle {{
                 None,
                 "Change document lexer to: Python",
                 "language_icons/logo_python.png",
-                create_lexer(lexers.Python, "Python"),
+                create_lexer("Python", "Python"),
                 lexers_menu,
             )
             RUBY_action = create_action(
@@ -6760,7 +7034,7 @@ QSplitter::handle {{
                 None,
                 "Change document lexer to: Ruby",
                 "language_icons/logo_ruby.png",
-                create_lexer(lexers.Ruby, "Ruby"),
+                create_lexer("Ruby", "Ruby"),
                 lexers_menu,
             )
             ROUTEROS_action = create_action(
@@ -6768,7 +7042,7 @@ QSplitter::handle {{
                 None,
                 "Change document lexer to: RouterOS",
                 "language_icons/logo_routeros.png",
-                create_lexer(lexers.RouterOS, "RouterOS"),
+                create_lexer("RouterOS", "RouterOS"),
                 lexers_menu,
             )
             Spice_action = create_action(
@@ -6776,7 +7050,7 @@ QSplitter::handle {{
                 None,
                 "Change document lexer to: Spice",
                 "language_icons/logo_spice.png",
-                create_lexer(lexers.Spice, "Spice"),
+                create_lexer("Spice", "Spice"),
                 lexers_menu,
             )
             SQL_action = create_action(
@@ -6784,20 +7058,20 @@ QSplitter::handle {{
                 None,
                 "Change document lexer to: SQL",
                 "language_icons/logo_sql.png",
-                create_lexer(lexers.SQL, "SQL"),
+                create_lexer("SQL", "SQL"),
                 lexers_menu,
             )
             TCL_action = qt.QAction("TCL", lexers_menu)
             TCL_action.setIcon(functions.create_icon("language_icons/logo_tcl.png"))
             TCL_action.triggered.connect(
-                functools.partial(set_lexer, lexers.TCL, "TCL")
+                create_lexer("TCL", "TCL")
             )
             TCL_action = create_action(
                 "TCL",
                 None,
                 "Change document lexer to: TCL",
                 "language_icons/logo_tcl.png",
-                create_lexer(lexers.TCL, "TCL"),
+                create_lexer("TCL", "TCL"),
                 lexers_menu,
             )
             TEX_action = create_action(
@@ -6805,7 +7079,7 @@ QSplitter::handle {{
                 None,
                 "Change document lexer to: TeX",
                 "language_icons/logo_tex.png",
-                create_lexer(lexers.TeX, "TeX"),
+                create_lexer("TeX", "TeX"),
                 lexers_menu,
             )
             VERILOG_action = create_action(
@@ -6813,7 +7087,7 @@ QSplitter::handle {{
                 None,
                 "Change document lexer to: Verilog",
                 "language_icons/logo_verilog.png",
-                create_lexer(lexers.Verilog, "Verilog"),
+                create_lexer("Verilog", "Verilog"),
                 lexers_menu,
             )
             VHDL_action = create_action(
@@ -6821,7 +7095,7 @@ QSplitter::handle {{
                 None,
                 "Change document lexer to: VHDL",
                 "language_icons/logo_vhdl.png",
-                create_lexer(lexers.VHDL, "VHDL"),
+                create_lexer("VHDL", "VHDL"),
                 lexers_menu,
             )
             XML_action = create_action(
@@ -6829,7 +7103,7 @@ QSplitter::handle {{
                 None,
                 "Change document lexer to: XML",
                 "language_icons/logo_xml.png",
-                create_lexer(lexers.XML, "XML"),
+                create_lexer("XML", "XML"),
                 lexers_menu,
             )
             YAML_action = create_action(
@@ -6837,7 +7111,7 @@ QSplitter::handle {{
                 None,
                 "Change document lexer to: YAML",
                 "language_icons/logo_yaml.png",
-                create_lexer(lexers.YAML, "YAML"),
+                create_lexer("YAML", "YAML"),
                 lexers_menu,
             )
             Zig_action = create_action(
@@ -6845,7 +7119,7 @@ QSplitter::handle {{
                 None,
                 "Change document lexer to: Zig",
                 "language_icons/logo_zig.png",
-                create_lexer(lexers.Zig, "Zig"),
+                create_lexer("Zig", "Zig"),
                 lexers_menu,
             )
             CSharp_action = create_action(
@@ -6853,7 +7127,7 @@ QSplitter::handle {{
                 None,
                 "Change document lexer to: C#",
                 "language_icons/logo_csharp.png",
-                create_lexer(lexers.CPP, "C#"),
+                create_lexer("CPP", "C#"),
                 lexers_menu,
             )
             Java_action = create_action(
@@ -6861,7 +7135,7 @@ QSplitter::handle {{
                 None,
                 "Change document lexer to: Java",
                 "language_icons/logo_java.png",
-                create_lexer(lexers.Java, "Java"),
+                create_lexer("Java", "Java"),
                 lexers_menu,
             )
             JavaScript_action = create_action(
@@ -6869,7 +7143,7 @@ QSplitter::handle {{
                 None,
                 "Change document lexer to: JavaScript",
                 "language_icons/logo_javascript.png",
-                create_lexer(lexers.JavaScript, "JavaScript"),
+                create_lexer("JavaScript", "JavaScript"),
                 lexers_menu,
             )
             Octave_action = create_action(
@@ -6877,7 +7151,7 @@ QSplitter::handle {{
                 None,
                 "Change document lexer to: Octave",
                 "language_icons/logo_octave.png",
-                create_lexer(lexers.Octave, "Octave"),
+                create_lexer("Octave", "Octave"),
                 lexers_menu,
             )
             PostScript_action = create_action(
@@ -6885,7 +7159,7 @@ QSplitter::handle {{
                 None,
                 "Change document lexer to: PostScript",
                 "language_icons/logo_postscript.png",
-                create_lexer(lexers.PostScript, "PostScript"),
+                create_lexer("PostScript", "PostScript"),
                 lexers_menu,
             )
             Fortran77_action = create_action(
@@ -6893,7 +7167,7 @@ QSplitter::handle {{
                 None,
                 "Change document lexer to: Fortran77",
                 "language_icons/logo_fortran77.png",
-                create_lexer(lexers.Fortran77, "Fortran77"),
+                create_lexer("Fortran77", "Fortran77"),
                 lexers_menu,
             )
             IDL_action = create_action(
@@ -6901,7 +7175,7 @@ QSplitter::handle {{
                 None,
                 "Change document lexer to: IDL",
                 "language_icons/logo_idl.png",
-                create_lexer(lexers.IDL, "IDL"),
+                create_lexer("IDL", "IDL"),
                 lexers_menu,
             )
             cicode_action = create_action(
@@ -6909,7 +7183,7 @@ QSplitter::handle {{
                 None,
                 "Change document lexer to: CiCode",
                 "language_icons/logo_cicode.png",
-                create_lexer(lexers.CiCode, "CiCode"),
+                create_lexer("CiCode", "CiCode"),
                 lexers_menu,
             )
             json_action = create_action(
@@ -6917,7 +7191,7 @@ QSplitter::handle {{
                 None,
                 "Change document lexer to: JSON",
                 "language_icons/logo_json.png",
-                create_lexer(lexers.JSON, "JSON"),
+                create_lexer("JSON", "JSON"),
                 lexers_menu,
             )
             lexers_menu.addAction(NONE_action)
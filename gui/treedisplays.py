@@ -1528,7 +1528,9 @@ class TreeDisplay(qt.QTreeView):
         tree_model.appendRow(item_search_text)
         return tree_model
 
-    def _init_replace_in_files_options(self, search_text, replace_text, directory):
+    def _init_replace_in_files_options(
+        self, search_text, replace_text, directory, summary=None
+    ):
         # Initialize the tree display to the found files type
         self.horizontalScrollbarAction(1)
         self.setSelectionBehavior(qt.QAbstractItemView.SelectionBehavior.SelectRows)
@@ -1568,6 +1570,13 @@ class TreeDisplay(qt.QTreeView):
         tree_model.appendRow(item_directory)
         tree_model.appendRow(item_search_text)
         tree_model.appendRow(item_replace_text)
+        # Optional summary item, used for the dry-run preview
+        if summary is not None:
+            item_summary = qt.QStandardItem(summary)
+            item_summary.setEditable(False)
+            item_summary.setForeground(description_brush)
+            item_summary.setFont(description_font)
+            tree_model.appendRow(item_summary)
         return tree_model
 
     def _sort_item_list(self, items, base_directory):
@@ -1657,7 +1666,7 @@ class TreeDisplay(qt.QTreeView):
                         item_file.setEditable(False)
                         item_file.setForeground(item_brush)
                         item_file.setFont(item_font)
-                        file_type = functions.get_file_type(file_name)
+                        file_type = functions.get_file_type(item_with_path)
                         item_file.setIcon(functions.get_language_file_icon(file_type))
                         # Add an atribute that will hold the full file name to the QStandartItem.
                         # It's a python object, attributes can be added dynamically!
@@ -1803,7 +1812,7 @@ class TreeDisplay(qt.QTreeView):
                     # Initialize the file item
                     item_file = qt.QStandardItem(file_name)
                     item_file.setEditable(False)
-                    file_type = functions.get_file_type(file_name)
+                    file_type = functions.get_file_type(item_with_path)
                     item_file.setIcon(functions.get_language_file_icon(file_type))
                     item_file.setForeground(item_brush)
                     item_file.setFont(item_font)
@@ -2076,11 +2085,12 @@ class TreeDisplay(qt.QTreeView):
         self.worker_thread.start()
 
     def display_replacements_in_files(
-        self, search_text, replace_text, replaced_files, directory
+        self, search_text, replace_text, replaced_files, directory, summary=None
     ):
         """
         Display files with lines that were replaces using the 'functions'
-        module's replace_text_in_files_enum function
+        module's replace_text_in_files_enum function, or the changes
+        of a preview_replace_in_files dry-run when a summary is given
         """
         # Check if found files are valid
         if replaced_files == None:
@@ -2092,7 +2102,7 @@ class TreeDisplay(qt.QTreeView):
         self.set_display_type(constants.TreeDisplayType.FILES_WITH_LINES)
         # Initialize and display the search options
         tree_model = self._init_replace_in_files_options(
-            search_text, replace_text, directory
+            search_text, replace_text, directory, summary
         )
         # Add the items with lines to the treeview
         self._add_items_with_lines_to_tree(tree_model, directory, replaced_files)
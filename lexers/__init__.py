@@ -24,92 +24,167 @@ try:
 except Exception as ex:
     nim_lexers_found = False
 
-from lexers.ada import *
-from lexers.awk import *
-from lexers.cicode import *
-from lexers.cython import *
+import importlib
+
+import qt
+import settings
+
+# Always needed: the lexer helper functions and the default plain text lexer
 from lexers.functions import *
-from lexers.nim import *
-from lexers.oberon import *
-from lexers.php import *
-from lexers.python import *
-from lexers.routeros import *
-from lexers.spice import *
-from lexers.smallbasic import *
-from lexers.skill import *
 from lexers.text import *
-from lexers.zig import *
 
-from lexers.builtin import *
+"""
+Lazy lexer registry: lexer name -> module that defines it.
+The lexer modules (especially the large lexers/builtin.py) are only imported
+when a lexer is first used through 'lexers.<Name>' or get_lexer_class().
+QScintilla lexers that are not in the registry are generated on first use.
+"""
+LEXER_MODULES = {
+    "Text": "lexers.text",
+    "Ada": "lexers.ada",
+    "AWK": "lexers.awk",
+    "CiCode": "lexers.cicode",
+    "Cython": "lexers.cython",
+    "Nim": "lexers.nim",
+    "Oberon": "lexers.oberon",
+    "Php": "lexers.php",
+    "Python": "lexers.python",
+    "CustomPython": "lexers.python",
+    "RouterOS": "lexers.routeros",
+    "CustomSpice": "lexers.spice",
+    "SmallBasic": "lexers.smallbasic",
+    "SKILL": "lexers.skill",
+    "Zig": "lexers.zig",
+}
+BUILTIN_LEXERS = (
+    "AVS",
+    "Bash",
+    "Batch",
+    "CMake",
+    "CPP",
+    "CSS",
+    "CSharp",
+    "CoffeeScript",
+    "Custom",
+    "D",
+    "Diff",
+    "Fortran77",
+    "Fortran",
+    "HTML",
+    "IDL",
+    "JSON",
+    "Java",
+    "JavaScript",
+    "Lua",
+    "Makefile",
+    "Markdown",
+    "Matlab",
+    "Octave",
+    "PO",
+    "POV",
+    "Pascal",
+    "Perl",
+    "PostScript",
+    "Properties",
+    "Ruby",
+    "SQL",
+    "Spice",
+    "TCL",
+    "TeX",
+    "VHDL",
+    "Verilog",
+    "XML",
+    "YAML",
+)
+for _name in BUILTIN_LEXERS:
+    LEXER_MODULES[_name] = "lexers.builtin"
+del _name
+
 
+def __getattr__(name):
+    """Resolve 'lexers.<Name>' on first access (PEP 562)"""
+    if name[:1].isupper():
+        lexer_class = get_lexer_class(name)
+        if lexer_class is not None:
+            return lexer_class
+    raise AttributeError("module 'lexers' has no attribute '{}'".format(name))
 
-def generate_builtin_lexers():
+
+def get_lexer_class(name):
     """
-    Set colors for all other lexers by dynamically creating
-    derived classes and adding styles to them.
+    Return the lexer class for the name, importing its module or
+    generating it from the QScintilla lexer on first use.
+    Returns None for unknown names.
     """
-    # Lexers that were manually defined above
-    predefined_lexers = [
-        "QsciLexerPython",
-    ]
-    # Themes that are missing when upgrading QScintilla
-    missing_themes = {}
-    # Loop through the Qsci module lexers and adjust them
-    lexer_strings = []
-    for i in data.__dict__.keys():
-        if i.startswith("QsciLexer") and len(i) > len("QsciLexer"):
-            if not (i in predefined_lexers):
-                lexer_name = i.replace("QsciLexer", "")
-                styles = {}
-                cls = getattr(data, i)
-                for j in dir(cls):
-                    att_value = getattr(cls, j)
-                    if j[0].isupper() == True and isinstance(att_value, int):
-                        styles[j] = att_value
-                cls_text = "class {0}(data.{1}):\n".format(lexer_name, i)
-                cls_text += "    styles = {\n"
-                for style in styles:
-                    cls_text += '        "{0}" : {1},\n'.format(style, styles[style])
-                cls_text += "    }\n"
-                cls_text += "    \n"
-                cls_text += "    def __init__(self, parent=None):\n"
-                cls_text += "        super().__init__()\n"
-                cls_text += "        self.set_theme(settings.get(\"theme\"))\n"
-                cls_text += "    \n"
-                cls_text += "    def set_theme(self, theme):\n"
-                cls_text += '        self.setDefaultColor(qt.QColor(settings.get_theme()["fonts"]["default"]["color"]))\n'
-                cls_text += '        self.setDefaultPaper(qt.QColor(settings.get_theme()["fonts"]["default"]["background"]))\n'
-                cls_text += "        self.setDefaultFont(settings.get_editor_font())\n"
-                cls_text += "        missing_themes['{}'] = []\n".format(lexer_name)
-                for style in styles:
-                    cls_text += "        for style in self.styles.keys():\n"
-                    cls_text += "            try:\n"
-                    cls_text += "                self.setPaper(\n"
-                    cls_text += '                    qt.QColor(settings.get_theme()["fonts"][style.lower()]["background"]),\n'
-                    cls_text += "                    self.styles[style]\n"
-                    cls_text += "                )\n"
-                    cls_text += '                lexers.set_font(self, style, theme["fonts"][style.lower()])\n'
-                    cls_text += "            except:\n"
-                    cls_text += "               if not(style in missing_themes['{}']):\n".format(
-                        lexer_name
-                    )
-                    cls_text += "                   missing_themes['{}'].append(style)\n".format(
-                        lexer_name
-                    )
-                    cls_text += "        if len(missing_themes['{}']) != 0:\n".format(
-                        lexer_name
-                    )
-                    cls_text += (
-                        "            print(\"Lexer '{}' missing themes:\")\n".format(
-                            lexer_name
-                        )
-                    )
-                    cls_text += "            for mt in missing_themes['{}']:\n".format(
-                        lexer_name
-                    )
-                    cls_text += "                print('    - ' + mt)\n"
-                    cls_text += "            raise Exception(\"Lexer '{}' has missing themes!\")\n".format(
-                        lexer_name
-                    )
-                lexer_strings.append(cls_text)
-    exec("\n".join(lexer_strings))
+    lexer_class = globals().get(name)
+    if lexer_class is not None:
+        return lexer_class
+    module_name = LEXER_MODULES.get(name)
+    if module_name is not None:
+        lexer_class = getattr(importlib.import_module(module_name), name)
+    elif hasattr(qt, "QsciLexer" + name):
+        lexer_class = generate_builtin_lexer(name)
+    else:
+        return None
+    globals()[name] = lexer_class
+    return lexer_class
+
+
+def available_lexers():
+    """Names of all lexers that can be created, without loading any of them"""
+    names = set(LEXER_MODULES.keys())
+    for attribute in dir(qt):
+        if attribute.startswith("QsciLexer") and len(attribute) > len("QsciLexer"):
+            names.add(attribute[len("QsciLexer") :])
+    return sorted(names)
+
+
+# Lexers generated by generate_builtin_lexer that have missing theme styles
+missing_themes = {}
+
+
+def generate_builtin_lexer(name):
+    """
+    Create a themed lexer class derived from the QScintilla lexer 'QsciLexer<name>'.
+    Used for QScintilla lexers that have no class in lexers/builtin.py.
+    """
+    base = getattr(qt, "QsciLexer" + name)
+    styles = {}
+    for attribute in dir(base):
+        value = getattr(base, attribute)
+        if attribute[0].isupper() and isinstance(value, int):
+            styles[attribute] = value
+
+    def __init__(self, parent=None):
+        base.__init__(self)
+        self.set_theme(settings.get_theme())
+
+    def set_theme(self, theme):
+        self.setDefaultColor(qt.QColor(theme["fonts"]["default"]["color"]))
+        self.setDefaultPaper(qt.QColor(theme["fonts"]["default"]["background"]))
+        self.setDefaultFont(settings.get_editor_font())
+        missing_themes[name] = []
+        for style in self.styles.keys():
+            try:
+                self.setPaper(
+                    qt.QColor(theme["fonts"][style.lower()]["background"]),
+                    self.styles[style],
+                )
+                set_font(self, style, theme["fonts"][style.lower()])
+            except:
+                missing_themes[name].append(style)
+        if len(missing_themes[name]) != 0:
+            print("Lexer '{}' missing themes:".format(name))
+            for mt in missing_themes[name]:
+                print("    - " + mt)
+
+    return type(
+        name,
+        (base,),
+        {
+            "styles": styles,
+            "__init__": __init__,
+            "set_theme": set_theme,
+            "__module__": __name__,
+        },
+    )
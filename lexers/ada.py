@@ -13,6 +13,7 @@ import time
 
 import data
 import qt
+import settings
 
 import functions
 import lexers
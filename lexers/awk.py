@@ -15,9 +15,10 @@ import data
 import settings
 import time
 import lexers
+from lexers.baselexer import IdleStyling
 
 
-class AWK(qt.QsciLexerCustom):
+class AWK(IdleStyling, qt.QsciLexerCustom):
     """
     Custom lexer for the AWK programming languages
     """
@@ -164,7 +165,7 @@ class AWK(qt.QsciLexerCustom):
             # Fonts
             lexers.set_font(self, style, theme["fonts"][style.lower()])
 
-    def styleText(self, start, end):
+    def style_range(self, start, end):
         """
         Overloaded method for styling text.
         """
@@ -174,9 +175,9 @@ class AWK(qt.QsciLexerCustom):
             return
         # Initialize the styling
         self.startStyling(start)
-        # Scintilla works with bytes, so we have to adjust
-        # the start and end boundaries
-        text = bytearray(editor.text(), "utf-8")[start:end].decode("utf-8")
+        # Scintilla works with bytes, only the text
+        # between the byte positions is read
+        text = editor.text(start, end)
         # Loop optimizations
         setStyling = self.setStyling
         operator_list = self.operator_list
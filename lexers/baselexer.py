@@ -6,6 +6,7 @@ For more information check the 'LICENSE.txt' file.
 For complete license information of the dependencies, check the 'additional_licenses' directory.
 """
 
+import time
 import qt
 import data
 import settings
@@ -13,6 +14,105 @@ import functions
 import lexers
 
 
+def visible_end_position(editor):
+    """Position of the line start after the last line on the screen"""
+    send = editor.SendScintilla
+    last_visible = send(editor.SCI_GETFIRSTVISIBLELINE) + send(editor.SCI_LINESONSCREEN) + 1
+    line = send(editor.SCI_DOCLINEFROMVISIBLE, last_visible) + 1
+    if line >= send(editor.SCI_GETLINECOUNT):
+        return send(editor.SCI_GETLENGTH)
+    return send(editor.SCI_POSITIONFROMLINE, line)
+
+
+class IdleStyling:
+    """
+    Mixin for QsciLexerCustom lexers that styles the requested range only
+    up to the end of the visible lines and the rest of the document in
+    time-sliced chunks when the event loop is idle. An edit cancels the
+    pending chunks, the next styling request continues from the edited line.
+    The lexer implements 'style_range(start, end)' instead of 'styleText',
+    the styling must be continuous from the start of the document, which
+    every stateful lexer needs anyway.
+    """
+
+    # Bytes styled in one step, rounded up to the end of a line
+    idle_chunk_size = 32 * 1024
+    # Seconds of styling per idle timer event
+    idle_time_slice = 0.01
+    _idle_timer = None
+
+    def style_range(self, start, end):
+        raise Exception("[IdleStyling] Styling function needs to be overriden!")
+
+    def styleText(self, start, end):
+        editor = self.editor()
+        if editor is None:
+            return
+        self.cancel_idle_styling()
+        if end - start > self.idle_chunk_size:
+            visible_end = visible_end_position(editor)
+            if end > visible_end:
+                if start < visible_end:
+                    stop = visible_end
+                else:
+                    # Styling requested below the screen, e.g. for line wrapping
+                    stop = self._chunk_end(editor, start)
+                end = min(stop, end)
+        self.style_range(start, end)
+        # Style the rest of the document while idle
+        if editor.SendScintilla(editor.SCI_GETENDSTYLED) < editor.SendScintilla(
+            editor.SCI_GETLENGTH
+        ):
+            self._schedule_idle_styling()
+
+    def text_modified_callback(self, *args):
+        # The document changed, the pending chunks are restarted on the next styling request
+        self.cancel_idle_styling()
+
+    def cancel_idle_styling(self):
+        if self._idle_timer is not None:
+            self._idle_timer.stop()
+
+    def _chunk_end(self, editor, position):
+        send = editor.SendScintilla
+        line = send(editor.SCI_LINEFROMPOSITION, position + self.idle_chunk_size) + 1
+        if line >= send(editor.SCI_GETLINECOUNT):
+            return send(editor.SCI_GETLENGTH)
+        return send(editor.SCI_POSITIONFROMLINE, line)
+
+    def _schedule_idle_styling(self):
+        if self._idle_timer is None:
+            self._idle_timer = qt.QTimer(self)
+            self._idle_timer.setSingleShot(True)
+            self._idle_timer.setInterval(0)
+            self._idle_timer.timeout.connect(self._idle_style_step)
+        self._idle_timer.start()
+
+    def _idle_style_step(self):
+        editor = self.editor()
+        if editor is None:
+            return
+        send = editor.SendScintilla
+        length = send(editor.SCI_GETLENGTH)
+        deadline = time.perf_counter() + self.idle_time_slice
+        while True:
+            # Continue from the start of the line of the last styled position
+            position = send(
+                editor.SCI_POSITIONFROMLINE,
+                send(editor.SCI_LINEFROMPOSITION, send(editor.SCI_GETENDSTYLED)),
+            )
+            if position >= length:
+                return
+            stop = self._chunk_end(editor, position)
+            self.style_range(position, stop)
+            if send(editor.SCI_GETENDSTYLED) <= position:
+                # The lexer did not advance, do not loop forever
+                return
+            if time.perf_counter() >= deadline:
+                self._idle_timer.start()
+                return
+
+
 class BaseLexer(qt.QsciLexerCustom):
     """
     Lexer for styling normal text documents
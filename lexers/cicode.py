@@ -15,9 +15,10 @@ import data
 import settings
 import time
 import lexers
+from lexers.baselexer import IdleStyling
 
 
-class CiCode(qt.QsciLexerCustom):
+class CiCode(IdleStyling, qt.QsciLexerCustom):
     """
     Custom lexer for the Citect CiCode programming language
     """
@@ -1220,7 +1221,7 @@ class CiCode(qt.QsciLexerCustom):
             # Fonts
             lexers.set_font(self, style, theme["fonts"][style.lower()])
 
-    def styleText(self, start, end):
+    def style_range(self, start, end):
         """
         Overloaded method for styling text.
         """
@@ -1230,9 +1231,9 @@ class CiCode(qt.QsciLexerCustom):
             return
         # Initialize the styling
         self.startStyling(start)
-        # Scintilla works with bytes, so we have to adjust
-        # the start and end boundaries
-        text = bytearray(editor.text().lower(), "utf-8")[start:end].decode("utf-8")
+        # Scintilla works with bytes, only the text
+        # between the byte positions is read
+        text = editor.text(start, end).lower()
         # Loop optimizations
         setStyling = self.setStyling
         DEFAULT = self.styles["Default"]
@@ -133,79 +133,87 @@ def get_lexer_from_file_type(file_type):
     # return (current_file_type, lexer)
 
 
+def is_lexer(lexer, name):
+    """
+    isinstance(lexer, lexers.<name>) that does not load the lexer module
+    just to find out that the lexer is something else
+    """
+    return any(cls.__name__ == name for cls in type(lexer).__mro__)
+
+
 def get_comment_style_for_lexer(lexer):
     open_close_comment_style = False
     comment_string = None
     end_comment_string = None
-    if isinstance(lexer, lexers.CustomPython):
+    if is_lexer(lexer, "CustomPython"):
         comment_string = "#"
-    elif isinstance(lexer, lexers.Python):
+    elif is_lexer(lexer, "Python"):
         comment_string = "#"
-    elif isinstance(lexer, lexers.Cython):
+    elif is_lexer(lexer, "Cython"):
         comment_string = "#"
-    elif isinstance(lexer, lexers.AWK):
+    elif is_lexer(lexer, "AWK"):
         comment_string = "#"
-    elif isinstance(lexer, lexers.CPP):
+    elif is_lexer(lexer, "CPP"):
         comment_string = "//"
-    elif isinstance(lexer, lexers.CiCode):
+    elif is_lexer(lexer, "CiCode"):
         comment_string = "//"
-    elif isinstance(lexer, lexers.Pascal):
+    elif is_lexer(lexer, "Pascal"):
         comment_string = "//"
-    elif isinstance(lexer, lexers.Oberon):
+    elif is_lexer(lexer, "Oberon"):
         open_close_comment_style = True
         comment_string = "(*"
         end_comment_string = "*)"
-    elif isinstance(lexer, lexers.Ada):
+    elif is_lexer(lexer, "Ada"):
         comment_string = "--"
-    elif isinstance(lexer, lexers.D):
+    elif is_lexer(lexer, "D"):
         comment_string = "//"
-    elif isinstance(lexer, lexers.Nim):
+    elif is_lexer(lexer, "Nim"):
         comment_string = "#"
-    elif isinstance(lexer, lexers.Makefile):
+    elif is_lexer(lexer, "Makefile"):
         comment_string = "#"
-    elif isinstance(lexer, lexers.XML):
+    elif is_lexer(lexer, "XML"):
         comment_string = None
-    elif isinstance(lexer, lexers.Batch):
+    elif is_lexer(lexer, "Batch"):
         comment_string = "::"
-    elif isinstance(lexer, lexers.Bash):
+    elif is_lexer(lexer, "Bash"):
         comment_string = "#"
-    elif isinstance(lexer, lexers.Lua):
+    elif is_lexer(lexer, "Lua"):
         comment_string = "--"
-    elif isinstance(lexer, lexers.Java):
+    elif is_lexer(lexer, "Java"):
         comment_string = "//"
-    elif isinstance(lexer, lexers.JavaScript):
+    elif is_lexer(lexer, "JavaScript"):
         comment_string = "//"
-    elif isinstance(lexer, lexers.Octave):
+    elif is_lexer(lexer, "Octave"):
         comment_string = "#"
-    elif isinstance(lexer, lexers.RouterOS):
+    elif is_lexer(lexer, "RouterOS"):
         comment_string = "#"
-    elif isinstance(lexer, lexers.SQL):
+    elif is_lexer(lexer, "SQL"):
         comment_string = "#"
-    elif isinstance(lexer, lexers.Spice):
+    elif is_lexer(lexer, "Spice"):
         comment_string = "*"
-    elif isinstance(lexer, lexers.SKILL):
+    elif is_lexer(lexer, "SKILL"):
         comment_string = ";"
-    elif isinstance(lexer, lexers.SmallBasic):
+    elif is_lexer(lexer, "SmallBasic"):
         comment_string = "'"
-    elif isinstance(lexer, lexers.PostScript):
+    elif is_lexer(lexer, "PostScript"):
         comment_string = "%"
-    elif isinstance(lexer, lexers.Fortran):
+    elif is_lexer(lexer, "Fortran"):
         comment_string = "c "
-    elif isinstance(lexer, lexers.Fortran77):
+    elif is_lexer(lexer, "Fortran77"):
         comment_string = "c "
-    elif isinstance(lexer, lexers.IDL):
+    elif is_lexer(lexer, "IDL"):
         comment_string = "//"
-    elif isinstance(lexer, lexers.Ruby):
+    elif is_lexer(lexer, "Ruby"):
         comment_string = "#"
-    elif isinstance(lexer, lexers.HTML):
+    elif is_lexer(lexer, "HTML"):
         open_close_comment_style = True
         comment_string = "<!--"
         end_comment_string = "-->"
-    elif isinstance(lexer, lexers.CSS):
+    elif is_lexer(lexer, "CSS"):
         open_close_comment_style = True
         comment_string = "/*"
         end_comment_string = "*/"
-    elif isinstance(lexer, lexers.Zig):
+    elif is_lexer(lexer, "Zig"):
         comment_string = "//"
     # Save the comment options to the lexer
     return (open_close_comment_style, comment_string, end_comment_string)
@@ -15,10 +15,12 @@ import data
 import settings
 from pprint import pprint
 
+import lexers
 from lexers.functions import set_font
+from lexers.baselexer import IdleStyling
 
 
-class Nim(qt.QsciLexerCustom):
+class Nim(IdleStyling, qt.QsciLexerCustom):
     """
     Custom lexer for the Nim programming language
     """
@@ -383,7 +385,7 @@ class Nim(qt.QsciLexerCustom):
             # Fonts
             lexers.set_font(self, style, theme["fonts"][style.lower()])
 
-    def styleText(self, start, end):
+    def style_range(self, start, end):
         """
         Overloaded method for styling text.
         NOTE:
@@ -392,14 +394,19 @@ class Nim(qt.QsciLexerCustom):
             The fastest would probably be adding the lexer directly into
             the QScintilla source. Maybe never :-)
         """
-        # Style in pure Python, VERY SLOW!
         editor = self.editor()
         if editor is None:
             return
+        # Get the global cython flag
+        if lexers.cython_lexers_found == True:
+            # Cython module found
+            lexers.cython_lexers.style_nim(start, end, self, editor)
+            return
+        # Style in pure Python, VERY SLOW!
         # Initialize the styling
         self.startStyling(start)
-        # Scintilla works with bytes, so we have to adjust the start and end boundaries
-        text = bytearray(editor.text().lower(), "utf-8")[start:end].decode("utf-8")
+        # Scintilla works with bytes, only the text between the byte positions is read
+        text = editor.text(start, end).lower()
         # Loop optimizations
         setStyling = self.setStyling
         basic_kw_list = self.basic_keyword_list
@@ -648,8 +655,8 @@ class Nim(qt.QsciLexerCustom):
             return
         # Initialize the styling
         self.startStyling(start)
-        # Scintilla works with bytes, so we have to adjust the start and end boundaries
-        text = bytearray(editor.text().lower(), "utf-8")[start:end].decode("utf-8")
+        # Scintilla works with bytes, only the text between the byte positions is read
+        text = editor.text(start, end).lower()
         # Loop optimizations
         setStyling = self.setStyling
         basic_kw_list = self.basic_keyword_list
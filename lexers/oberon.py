@@ -15,9 +15,10 @@ import data
 import settings
 import time
 import lexers
+from lexers.baselexer import IdleStyling
 
 
-class Oberon(qt.QsciLexerCustom):
+class Oberon(IdleStyling, qt.QsciLexerCustom):
     """
     Custom lexer for the Oberon/Oberon-2/Modula/Modula-2 programming languages
     """
@@ -46,7 +47,7 @@ class Oberon(qt.QsciLexerCustom):
         "TO",
         "CASE",
         "LOOP",
-        "Type",
+        "TYPE",
         "CONST",
         "MOD",
         "UNTIL",
@@ -124,7 +125,7 @@ class Oberon(qt.QsciLexerCustom):
             # Fonts
             lexers.set_font(self, style, theme["fonts"][style.lower()])
 
-    def styleText(self, start, end):
+    def style_range(self, start, end):
         """
         Overloaded method for styling text.
         NOTE:
@@ -144,8 +145,8 @@ class Oberon(qt.QsciLexerCustom):
                 return
             # Initialize the styling
             self.startStyling(start)
-            # Scintilla works with bytes, so we have to adjust the start and end boundaries
-            text = bytearray(editor.text(), "utf-8")[start:end].decode("utf-8")
+            # Scintilla works with bytes, only the text between the byte positions is read
+            text = editor.text(start, end)
             # Loop optimizations
             setStyling = self.setStyling
             kw_list = self.keyword_list
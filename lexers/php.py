@@ -15,9 +15,10 @@ import data
 import settings
 import time
 import lexers
+from lexers.baselexer import IdleStyling
 
 
-class Php(qt.QsciLexerCustom):
+class Php(IdleStyling, qt.QsciLexerCustom):
     """Lexer for styling Php documents"""
 
     # Class variables
@@ -63,6 +64,6 @@ class Php(qt.QsciLexerCustom):
     def defaultFont(self, style):
         return qt.QFont(settings.get("current_font_name"), settings.get("current_font_size"))
 
-    def styleText(self, start, end):
+    def style_range(self, start, end):
         self.startStyling(start)
         self.setStyling(end - start, 0)
@@ -15,6 +15,7 @@ import data
 import settings
 import functions
 import lexers
+from lexers.baselexer import IdleStyling
 import qt
 
 
@@ -99,7 +100,7 @@ class Python(qt.QsciLexerPython):
             return None
 
 
-class CustomPython(qt.QsciLexerCustom):
+class CustomPython(IdleStyling, qt.QsciLexerCustom):
     class Sequence:
         def __init__(self, start, stop_sequences, stop_characters, style, add_to_style):
             self.start = start
@@ -221,7 +222,7 @@ class CustomPython(qt.QsciLexerCustom):
         def __del__(self):
             lexers.nim_lexers.python_delete_keywords(self.index)
 
-        def styleText(self, start, end):
+        def style_range(self, start, end):
             editor = self.editor()
             if editor is None:
                 return
@@ -230,14 +231,14 @@ class CustomPython(qt.QsciLexerCustom):
 
     else:
 
-        def styleText(self, start, end):
+        def style_range(self, start, end):
             editor = self.editor()
             if editor is None:
                 return
             # Initialize the styling
             self.startStyling(start)
-            # Scintilla works with bytes, so we have to adjust the start and end boundaries
-            text = bytearray(editor.text(), "utf-8")[start:end].decode("utf-8")
+            # Scintilla works with bytes, only the text between the byte positions is read
+            text = editor.text(start, end)
             # Loop optimizations
             setStyling = self.setStyling
             # Initialize comment state and split the text into tokens
@@ -15,9 +15,10 @@ import data
 import settings
 import time
 import lexers
+from lexers.baselexer import IdleStyling
 
 
-class RouterOS(qt.QsciLexerCustom):
+class RouterOS(IdleStyling, qt.QsciLexerCustom):
     """
     Custom lexer for the RouterOS syntax for MikroTik routers (WinBox)
     """
@@ -720,7 +721,7 @@ class RouterOS(qt.QsciLexerCustom):
             # Fonts
             lexers.set_font(self, style, theme["fonts"][style.lower()])
 
-    def styleText(self, start, end):
+    def style_range(self, start, end):
         """
         Overloaded method for styling text.
         NOTE:
@@ -735,8 +736,8 @@ class RouterOS(qt.QsciLexerCustom):
             return
         # Initialize the styling
         self.startStyling(start)
-        # Scintilla works with bytes, so we have to adjust the start and end boundaries
-        text = bytearray(editor.text().lower(), "utf-8")[start:end].decode("utf-8")
+        # Scintilla works with bytes, only the text between the byte positions is read
+        text = editor.text(start, end).lower()
         # Loop optimizations
         setStyling = self.setStyling
         operator_list = self.operator_list
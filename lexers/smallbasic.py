@@ -14,9 +14,10 @@ import qt
 
 import functions
 import lexers
+from lexers.baselexer import IdleStyling
 
 
-class SmallBasic(qt.QsciLexerCustom):
+class SmallBasic(IdleStyling, qt.QsciLexerCustom):
     """
     Custom lexer for the SmallBasic programming languages
     """
@@ -458,7 +459,7 @@ class SmallBasic(qt.QsciLexerCustom):
             # Fonts
             lexers.set_font(self, style, theme["fonts"][style.lower()])
 
-    def styleText(self, start, end):
+    def style_range(self, start, end):
         """
         Overloaded method for styling text.
         """
@@ -468,9 +469,9 @@ class SmallBasic(qt.QsciLexerCustom):
             return
         # Initialize the styling
         self.startStyling(start)
-        # Scintilla works with bytes, so we have to adjust
-        # the start and end boundaries
-        text = bytearray(editor.text().upper(), "utf-8")[start:end].decode("utf-8")
+        # Scintilla works with bytes, only the text
+        # between the byte positions is read
+        text = editor.text(start, end).upper()
         # Loop optimizations
         setStyling = self.setStyling
         operator_list = self.operator_list
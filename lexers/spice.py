@@ -13,9 +13,10 @@ import data
 import settings
 import functions
 import lexers
+from lexers.baselexer import IdleStyling
 
 
-class CustomSpice(qt.QsciLexerCustom):
+class CustomSpice(IdleStyling, qt.QsciLexerCustom):
     """
     !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
     !! This lexer is not needed as there is a built-in !!
@@ -311,7 +312,7 @@ class CustomSpice(qt.QsciLexerCustom):
             # Fonts
             lexers.set_font(self, style, theme["fonts"][style.lower()])
 
-    def styleText(self, start, end):
+    def style_range(self, start, end):
         """
         Overloaded method for styling text.
         """
@@ -321,9 +322,9 @@ class CustomSpice(qt.QsciLexerCustom):
             return
         # Initialize the styling
         self.startStyling(start)
-        # Scintilla works with bytes, so we have to adjust
-        # the start and end boundaries
-        text = bytearray(editor.text(), "utf-8")[start:end].decode("utf-8")
+        # Scintilla works with bytes, only the text
+        # between the byte positions is read
+        text = editor.text(start, end)
         # Loop optimizations
         setStyling = self.setStyling
         operator_list = self.operator_list
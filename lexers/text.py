@@ -15,13 +15,18 @@ import settings
 import functions
 import time
 import lexers
+from lexers.baselexer import IdleStyling
 
 
-class Text(qt.QsciLexerCustom):
+class Text(IdleStyling, qt.QsciLexerCustom):
     """Lexer for styling normal text documents"""
 
     # Class variables
     styles = {"Default": 0}
+    # Plain text has a single style, so Scintilla's null lexer paints it
+    # without calling back into Python. With False the text is styled
+    # through 'style_range' like the other custom lexers.
+    null_lexer = True
 
     def __init__(self, parent=None):
         """Overridden initialization"""
@@ -62,6 +67,15 @@ class Text(qt.QsciLexerCustom):
     def defaultFont(self, style):
         return qt.QFont(settings.get("current_font_name"), settings.get("current_font_size"))
 
-    def styleText(self, start, end):
+    def setEditor(self, editor):
+        """
+        Overridden, QsciScintilla.setLexer switches the editor to container
+        styling (SCN_STYLENEEDED -> styleText) right before calling this
+        """
+        super().setEditor(editor)
+        if editor is not None and self.null_lexer:
+            editor.SendScintilla(editor.SCI_SETLEXER, editor.SCLEX_NULL)
+
+    def style_range(self, start, end):
         self.startStyling(start)
         self.setStyling(end - start, 0)
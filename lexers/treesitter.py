@@ -13,14 +13,46 @@ import tree_sitter
 
 import functions
 import lexers
+import components.tracing
 
 # Relative imports
 from lexers.baselexer import *
 
+# Bytes handed to tree-sitter per read callback
+READ_CHUNK = 64 * 1024
+# Outdated ranges closer than this are styled together
+STYLE_MARGIN = 50
+# Outdated ranges are merged when there are more than this many
+MAX_DIRTY_RANGES = 256
+
+
+def shift_position(position, edit_start, old_end, new_end):
+    """Move a byte position over an edit that replaced edit_start..old_end"""
+    if position <= edit_start:
+        return position
+    if position >= old_end:
+        return position + new_end - old_end
+    return new_end
+
+
+def merge_ranges(ranges, gap=0):
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + gap:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [tuple(r) for r in merged]
+
 
 class TreeSitterBaseLexer(BaseLexer):
     """
-    Lexer for styling documents with the tree-sitter library
+    Lexer for styling documents with the tree-sitter library.
+    Edits are passed to the tree with their real rows and columns and the
+    document is parsed incrementally from Scintilla's buffer when styling
+    is needed. Only the ranges that the edits or Tree.get_changed_ranges
+    report, and the text that was never styled, are restyled. A range is
+    styled exactly like styling the whole document would style it.
     """
 
     symbols = {}
@@ -45,6 +77,37 @@ class TreeSitterBaseLexer(BaseLexer):
         self.parser = tree_sitter.Parser()
         self.parser.set_language(tree_sitter_language)
         self.tree = None
+        # The tree was edited since the last parse
+        self.tree_edited = False
+        # Ranges whose styles are outdated and the end of the styled text
+        self.dirty_ranges = []
+        self.styled_until = 0
+        # Position of the first edit since the last styling
+        self.edit_start = None
+
+    def read_callback(self, editor):
+        """
+        Read function for tree-sitter, the document is read in chunks
+        of bytes from Scintilla's buffer instead of copying and
+        encoding the whole text
+        """
+        length = editor.SendScintilla(editor.SCI_GETLENGTH)
+
+        def read(byte_offset, point):
+            if byte_offset >= length:
+                return b""
+            size = min(READ_CHUNK, length - byte_offset)
+            # QsciScintilla.bytes adds a terminating zero byte. SCI_GETRANGEPOINTER
+            # cannot be used, SendScintilla returns a 32-bit long on 64-bit Windows.
+            return editor.bytes(byte_offset, byte_offset + size).data()[:size]
+
+        return read
+
+    def point(self, editor, position):
+        """Tree-sitter (row, column) point of a byte position"""
+        send = editor.SendScintilla
+        row = send(editor.SCI_LINEFROMPOSITION, position)
+        return (row, position - send(editor.SCI_POSITIONFROMLINE, row))
 
     def text_modified_callback(
         self,
@@ -60,99 +123,124 @@ class TreeSitterBaseLexer(BaseLexer):
         annotationLinesAdded,
     ):
         editor = self.editor()
-        if editor is None:
+        if editor is None or self.tree is None:
             return
-        functions.performance_timer_start()
-        # Tree-sitter works with bytes, so we have to adjust the start and end boundaries
-        text_bytes = editor.text().encode("utf-8")
-        #        self.tree = self.parser.parse(text_bytes)
-        if modificationType == editor.SC_MOD_DELETETEXT:
-            positions = (
-                position,
-                position + length,
-                position,
-                position,
-                position + length,
-                position,
-            )
+        start_point = self.point(editor, position)
+        if modificationType & editor.SC_MOD_INSERTTEXT:
+            old_end = position
+            new_end = position + length
+            old_end_point = start_point
+            new_end_point = self.point(editor, new_end)
+        elif modificationType & editor.SC_MOD_DELETETEXT:
+            old_end = position + length
+            new_end = position
+            new_end_point = start_point
+            # The deleted text is already gone, its end point is
+            # computed from the deleted text and the removed line count
+            if added == 0:
+                old_end_point = (start_point[0], start_point[1] + length)
+            else:
+                deleted = text[:length] if isinstance(text, (bytes, bytearray)) else b""
+                old_end_point = (
+                    start_point[0] - added,
+                    len(deleted) - deleted.rfind(b"\n") - 1,
+                )
         else:
-            positions = (
-                position,
-                position,
-                position + length,
-                position,
-                position,
-                position + length,
-            )
-        if self.tree is not None:
-            self.tree.edit(
-                start_byte=positions[0],
-                old_end_byte=positions[1],
-                new_end_byte=positions[2],
-                start_point=(0, positions[3]),
-                old_end_point=(0, positions[4]),
-                new_end_point=(0, positions[5]),
+            return
+        self.tree.edit(
+            start_byte=position,
+            old_end_byte=old_end,
+            new_end_byte=new_end,
+            start_point=start_point,
+            old_end_point=old_end_point,
+            new_end_point=new_end_point,
+        )
+        self.tree_edited = True
+        # Move the outdated ranges over the edit, inserted text has no style yet
+        self.dirty_ranges = [
+            (
+                shift_position(start, position, old_end, new_end),
+                shift_position(end, position, old_end, new_end),
             )
-            #            new_tree = self.parser.parse(text_bytes, self.tree)
-            #            old_tree = self.tree
-            #            self.tree = new_tree
-            #            print(len(self.tree.get_changed_ranges(old_tree)))
-            self.tree = self.parser.parse(text_bytes, self.tree)
-        else:
-            self.tree = self.parser.parse(text_bytes)
+            for start, end in self.dirty_ranges
+        ]
+        self.dirty_ranges.append((position, new_end))
+        if len(self.dirty_ranges) > MAX_DIRTY_RANGES:
+            self.dirty_ranges = merge_ranges(self.dirty_ranges, STYLE_MARGIN)
+        self.styled_until = shift_position(
+            self.styled_until, position, old_end, new_end
+        )
+        if self.edit_start is None or position < self.edit_start:
+            self.edit_start = position
 
-        functions.performance_timer_show("CHANGE")
+    def update_tree(self, editor):
+        """
+        Parse the edited document, reusing the unchanged parts of the old
+        tree. Returns the changed byte ranges, or None after a full parse.
+        """
+        if self.tree is None:
+            with components.tracing.span("tree-sitter parse", "lexer"):
+                self.tree = self.parser.parse(self.read_callback(editor))
+            self.tree_edited = False
+            return None
+        if not self.tree_edited:
+            return []
+        with components.tracing.span("tree-sitter reparse", "lexer"):
+            new_tree = self.parser.parse(self.read_callback(editor), self.tree)
+            # Renamed from 'get_changed_ranges' in newer py-tree-sitter versions
+            changed_ranges_function = getattr(self.tree, "changed_ranges", None)
+            if changed_ranges_function is None:
+                changed_ranges_function = self.tree.get_changed_ranges
+            changed_ranges = [
+                (r.start_byte, r.end_byte) for r in changed_ranges_function(new_tree)
+            ]
+        self.tree = new_tree
+        self.tree_edited = False
+        return changed_ranges
 
     def generate_tree(self, tree, start_byte, end_byte):
-        functions.performance_timer_start()
+        """
+        The nodes that overlap the range, in document order. A subtree
+        before the range is skipped and only its last node is listed, the
+        node before the next one that 'previous-special' looks at. A subtree
+        that touches the node after it is walked, a span in it can continue
+        into that node. The walk stops at the first node after the range.
+        Returns the node list and if the walk reached the end of the tree.
+        """
+
+        def item(node):
+            return {
+                "type": node.type,
+                "start": node.start_byte,
+                "end": node.end_byte,
+            }
 
         cursor = tree.walk()
         node_list = []
-        came_up = False
-        level = 0
+        # Start of the node after the subtree of each parent on the cursor path
+        follows = [None]
         while True:
-            if not came_up:
-                if cursor.node.start_byte > (
-                    start_byte - 50
-                ) and cursor.node.start_byte < (end_byte + 50):
-                    new_node = {
-                        "type": cursor.node.type,
-                        "start": cursor.node.start_byte,
-                        "end": cursor.node.end_byte,
-                        "level": level,
-                    }
-                    #                print(
-                    #                    " " * level,
-                    #                    new_node["type"],
-                    #                    "{}:{}".format(new_node["start"],
-                    #                    new_node["end"]),
-                    #                )
-                    node_list.append(new_node)
-                if cursor.goto_first_child():
-                    came_up = False
-                    level += 1
-                    continue
-                elif cursor.goto_next_sibling():
-                    came_up = False
-                    continue
-                elif cursor.goto_parent():
-                    came_up = True
-                    level -= 1
-                    continue
+            node = cursor.node
+            if node.start_byte >= end_byte:
+                return node_list, False
+            sibling = node.next_sibling
+            follow = sibling.start_byte if sibling is not None else follows[-1]
+            if node.end_byte <= start_byte and (
+                follow is None or follow > node.end_byte
+            ):
+                last = node
+                while last.child_count > 0:
+                    last = last.children[-1]
+                node_list.append(item(last))
             else:
-                if cursor.goto_next_sibling():
-                    came_up = False
-                    continue
-                elif cursor.goto_parent():
-                    came_up = True
-                    level -= 1
+                node_list.append(item(node))
+                if cursor.goto_first_child():
+                    follows.append(follow)
                     continue
-
-            break
-
-        functions.performance_timer_show("TREE-GENERATE")
-
-        return node_list
+            while not cursor.goto_next_sibling():
+                if not cursor.goto_parent():
+                    return node_list, True
+                follows.pop()
 
     def styleText(self, start, end):
         """
@@ -161,72 +249,108 @@ class TreeSitterBaseLexer(BaseLexer):
         editor = self.editor()
         if editor is None:
             return
+        changed_ranges = self.update_tree(editor)
+        if changed_ranges is None:
+            self.dirty_ranges = []
+            self.styled_until = 0
+        else:
+            self.dirty_ranges.extend(changed_ranges)
+        if self.edit_start is None:
+            first_edit = end
+        else:
+            send = editor.SendScintilla
+            first_edit = send(
+                editor.SCI_POSITIONFROMLINE,
+                send(editor.SCI_LINEFROMPOSITION, self.edit_start),
+            )
+        self.edit_start = None
+        if start < first_edit:
+            # Scintilla only asks for the text before the edits when its styles
+            # were invalidated from outside (SCI_COLOURISE, recolor, a new lexer),
+            # everything from 'start' on has to be styled again
+            self.styled_until = min(self.styled_until, start)
+            self.dirty_ranges = [
+                (range_start, min(range_end, start))
+                for range_start, range_end in self.dirty_ranges
+                if range_start < start
+            ]
+        # Restyle the outdated ranges and the text that was never styled,
+        # the rest of the requested range still has valid styles
+        ranges = []
+        remaining = []
+        for range_start, range_end in self.dirty_ranges:
+            if range_start < start:
+                remaining.append((range_start, min(range_end, start)))
+            if range_end > end:
+                remaining.append((max(range_start, end), range_end))
+            if range_start < end and range_end > start:
+                ranges.append((max(range_start, start), min(range_end, end)))
+        if self.styled_until < end:
+            ranges.append((max(start, self.styled_until), end))
+        self.dirty_ranges = merge_ranges([r for r in remaining if r[0] < r[1]])
+        with components.tracing.span("tree-sitter style", "lexer"):
+            for range_start, range_end in merge_ranges(ranges, STYLE_MARGIN):
+                self.style_nodes(range_start, range_end)
+        self.styled_until = max(self.styled_until, end)
+        # Scintilla's styled position
+        self.startStyling(end)
 
-        node_list = self.generate_tree(self.tree, start, end)
-
-        functions.performance_timer_start()
+    def style_nodes(self, start, end):
+        """
+        Style the range, the nodes are clipped to it. Nodes are styled in
+        document order, so the children overwrite the styles of their parents.
+        """
+        node_list, complete = self.generate_tree(self.tree, start, end)
 
         # Loop optimizations
+        startStyling = self.startStyling
         setStyling = self.setStyling
+        default_style = self.styles["default"]
 
+        # Text that is not covered by any node
+        startStyling(start)
+        setStyling(end - start, default_style)
         spanning = None
         spanning_end_index = None
         previous_item = None
-        last_item = None
         for node in node_list:
-            #            print(node)
-            if node["start"] < (start - 50):
-                continue
-            elif node["start"] > (end + 50):
-                continue
-
-            self.startStyling(node["start"])
-            length = node["end"] - node["start"]
             _type = node["type"].lower()
-            last_item = node
 
             if spanning_end_index is not None and node["start"] > spanning_end_index:
                 spanning = None
                 spanning_end_index = None
-            #                print("spanning-end", node["start"])
             if spanning is None:
+                style = default_style
                 for kk, vv in self.symbols.items():
                     if _type in vv["items"]:
+                        style = vv["index"]
                         if (
                             "previous-special" in vv.keys()
                             and previous_item is not None
                         ):
                             for ps in vv["previous-special"]:
                                 if ps[0] == previous_item["type"]:
-                                    setStyling(length, self.symbols[ps[1]]["index"])
+                                    style = self.symbols[ps[1]]["index"]
                                     break
-                            else:
-                                setStyling(length, vv["index"])
-                        else:
-                            setStyling(length, vv["index"])
                         if vv["is-span"]:
                             spanning = kk
                             spanning_end_index = node["end"]
-                        #                            print("spanning", kk, node["start"])
                         break
-                else:
-                    #                    print("NOT FOUND:", f"'{_type}'", bytes(editor.text(), 'utf-8')[node["start"]:node["end"]].decode('utf-8'))
-                    setStyling(length, self.styles["default"])
             else:
-                setStyling(length, self.styles[spanning])
+                style = self.styles[spanning]
+            node_start = max(node["start"], start)
+            length = min(node["end"], end) - node_start
+            if length > 0:
+                startStyling(node_start)
+                setStyling(length, style)
 
             previous_item = node
-        else:
-            if last_item:
-                length = end - last_item["end"]
-                if length > 0:
-                    setStyling(length, self.styles["default"])
-            else:
-                length = end - start
-                if length > 0:
-                    setStyling(length, self.styles["default"])
-
-        functions.performance_timer_show("STYLE")
+        # The text after the last node of the document
+        if complete and previous_item is not None:
+            tail_start = max(previous_item["end"], start)
+            if end > tail_start:
+                startStyling(tail_start)
+                setStyling(end - tail_start, default_style)
 
 
 class TreeSitterLexer(TreeSitterBaseLexer):
@@ -12,10 +12,11 @@ import data
 import settings
 import functions
 import lexers
+from lexers.baselexer import IdleStyling
 import qt
 
 
-class Zig(qt.QsciLexerCustom):
+class Zig(IdleStyling, qt.QsciLexerCustom):
     """
     Custom lexer for the Zig programming languages
     """
@@ -331,7 +332,7 @@ class Zig(qt.QsciLexerCustom):
             # Fonts
             lexers.set_font(self, style, theme["fonts"][style.lower()])
 
-    def styleText(self, start, end):
+    def style_range(self, start, end):
         """
         Overloaded method for styling text.
         """
@@ -341,9 +342,9 @@ class Zig(qt.QsciLexerCustom):
             return
         # Initialize the styling
         self.startStyling(start)
-        # Scintilla works with bytes, so we have to adjust
-        # the start and end boundaries
-        text = bytearray(editor.text(), "utf-8")[start:end].decode("utf-8")
+        # Scintilla works with bytes, only the text
+        # between the byte positions is read
+        text = editor.text(start, end)
         # Loop optimizations
         setStyling = self.setStyling
         operator_list = self.operator_list
@@ -36,6 +36,11 @@ def set(name: str, value: Any) -> None:
     __settings_manipulator.set(name, value)
 
 
+def flush() -> None:
+    """Write the changed settings to the settings file now"""
+    __settings_manipulator.flush()
+
+
 def get_current_font():
     return qt.QFont(
         __settings_manipulator.get("current_font_name"),
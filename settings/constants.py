@@ -48,11 +48,23 @@ editor = {
         "overwrite_mode": False,
         "tab_width": 4,
         "word_wrap": False,
+        # Word wrap performance mode for long paragraphs (layout cache,
+        # idle styling, multithreaded layout)
+        "wrap_performance_mode": True,
+        "wrap_document_cache_max_mb": 8,
         "zoom_factor": 0,
         "makefile_uses_tabs": True,
         "makefile_whitespace_visible": True,
         "tabs_use_spaces": True,
         "whitespace_visible": False,
+        # Large files are loaded a window of chapters at a time, the chapters are
+        # switched in the "文件 -> 章节窗口" menu. Find/replace only sees the
+        # loaded chapters, so it is off by default
+        "chapter_window": False,
+        "chapter_window_min_size_mb": 20,
+        "chapter_window_span": 1,
+        # Memory limit of the undo history in MB, 0 means no limit
+        "undo_memory_limit_mb": 256,
     },
 }
 
@@ -9,6 +9,7 @@ For complete license information of the dependencies, check the 'additional_lice
 # FILE DESCRIPTION:
 # Module used to save, load, ... settings of Ex.Co.
 
+import atexit
 import json
 import os
 import os.path
@@ -18,7 +19,6 @@ from collections import UserDict
 from typing import Any, Callable, Dict, Union
 
 import data
-import filefunctions
 
 import functions
 import settings.constants
@@ -164,6 +164,9 @@ class SettingsManipulator:
     def set(self, name: str, value: Any) -> None:
         self.storage[name] = value
 
+    def flush(self) -> None:
+        self.storage.flush()
+
     def check_settings_file(self, settings_file_path: str):
         """
         Check if the settings file exists
@@ -179,6 +182,7 @@ class SettingsManipulator:
         """
         if self.error_lock == True:
             return
+        self.storage.flush()
         settings_data = functions.load_json_file(
             self.get("settings_filename_with_path")
         )
@@ -189,6 +193,7 @@ class SettingsManipulator:
     def clear_recent_files(self):
         if self.error_lock == True:
             return
+        self.storage.flush()
         settings_data = functions.load_json_file(
             self.get("settings_filename_with_path")
         )
@@ -204,6 +209,7 @@ class SettingsManipulator:
         """
         try:
             # Load data from file
+            self.storage.flush()
             settings_data = functions.load_json_file(
                 self.get("settings_filename_with_path")
             )
@@ -482,8 +488,10 @@ class Sessions:
 class SettingsStorage(UserDict):
     """
     A simple settings manager that loads/saves settings from a JSON file.
-    Settings are saved to the file only when a value genuinely changes,
-    or on initial load if the file doesn't exist/is corrupted.
+    Changed keys are only marked dirty and written together (write-behind)
+    after 'flush_interval' seconds, on flush() or at interpreter exit.
+    The file is replaced atomically. Whether a key changed is decided per key
+    by comparing it with its last written JSON encoding.
 
     When setting or updating, if a value is a dictionary and the existing
     value for that key is also a dictionary, they are recursively merged.
@@ -494,6 +502,7 @@ class SettingsStorage(UserDict):
         file_path: str,
         default_settings: Dict[str, Any],
         print_func: Callable[[str], None] = print,
+        flush_interval: float = 0.5,
     ):
         """
         Initializes the Settings manager.
@@ -508,6 +517,8 @@ class SettingsStorage(UserDict):
             print_func (Callable[[str], None], optional): A custom function to use
                                                            for printing messages.
                                                            Defaults to the built-in print().
+            flush_interval (float, optional): Seconds between the first change
+                                              and writing the file.
         """
         super().__init__()
         self.file_path = file_path
@@ -515,8 +526,16 @@ class SettingsStorage(UserDict):
             raise Exception("Default settings are needed here!")
         self.__default_settings = default_settings
         self.__print = print_func
+        self.flush_interval = flush_interval
+        # Keys changed since the last write and the JSON encoding
+        # of every key as it was last written to the file
+        self.__dirty = set()
+        self.__written = {}
+        self.__lock = threading.RLock()
+        self.__flush_timer = None
 
         self.__load()
+        atexit.register(self.flush)
 
     def echo(self, message: str) -> None:
         """
@@ -556,6 +575,9 @@ class SettingsStorage(UserDict):
                 self.update(loaded_data, _initial_load=True)  # Merge loaded data
                 if self.data != loaded_data:  # If merging changed something from purely loaded
                     self.__save()  # Save if the merge process modified something
+                else:
+                    for key, value in self.data.items():
+                        self.__written[key] = self.__encode(value)
 
         except json.JSONDecodeError:
             self.echo(
@@ -576,14 +598,69 @@ class SettingsStorage(UserDict):
 
     def __save(self) -> None:
         """
-        Immediately writes the current settings to the JSON file.
+        Immediately writes all of the current settings to the JSON file.
         """
-        try:
-            os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
-            filefunctions.write_json_file(self.file_path, self.data)
-            self.echo(f"Settings saved to '{self.file_path}'.")
-        except Exception as e:
-            self.echo(f"Error saving settings to '{self.file_path}': {e}'")
+        with self.__lock:
+            self.__dirty.update(self.data.keys())
+            self.flush()
+
+    @staticmethod
+    def __encode(value: Any) -> str:
+        return json.dumps(value, sort_keys=True, ensure_ascii=False)
+
+    def __changed(self, key: str) -> bool:
+        """
+        Mark the key dirty if it differs from what was last written
+        and schedule a flush. Returns whether the key changed.
+        """
+        with self.__lock:
+            if key in self.data:
+                if self.__written.get(key) == self.__encode(self.data[key]):
+                    return False
+            elif key not in self.__written:
+                return False
+            self.__dirty.add(key)
+            if self.__flush_timer is None:
+                self.__flush_timer = threading.Timer(self.flush_interval, self.flush)
+                self.__flush_timer.daemon = True
+                self.__flush_timer.start()
+            return True
+
+    def is_dirty(self) -> bool:
+        return len(self.__dirty) != 0
+
+    def flush(self) -> None:
+        """
+        Write the settings to the file now if any key is dirty.
+        The file is written to a temporary file first and renamed over the
+        old one, so a crash can never leave a half written settings file.
+        """
+        with self.__lock:
+            if self.__flush_timer is not None:
+                self.__flush_timer.cancel()
+                self.__flush_timer = None
+            if not self.__dirty:
+                return
+            try:
+                text = json.dumps(self.data, indent=2, ensure_ascii=False)
+                for key in self.__dirty:
+                    if key in self.data:
+                        self.__written[key] = self.__encode(self.data[key])
+                    else:
+                        self.__written.pop(key, None)
+                directory = os.path.dirname(self.file_path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                temporary_file_path = self.file_path + ".tmp"
+                with open(temporary_file_path, "w", encoding="utf-8", newline="\n") as f:
+                    f.write(text)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temporary_file_path, self.file_path)
+                self.__dirty.clear()
+                self.echo(f"Settings saved to '{self.file_path}'.")
+            except Exception as e:
+                self.echo(f"Error saving settings to '{self.file_path}': {e}'")
 
     def __setitem__(self, key: str, value: Any) -> None:
         """
@@ -592,29 +669,16 @@ class SettingsStorage(UserDict):
         If the value is a dictionary and the existing item is also a dictionary,
         it performs a recursive update.
         """
-        changed = False
-
-        if key in self.data and isinstance(self.data[key], dict) and isinstance(value, dict):
-            # If both old and new values are dictionaries, recursively update
-            self.echo(f"Setting '{key}' (nested dict) updated.")
-            self.data[key].update(value)  # This will call the dict's own update, which is what we want
-            changed = True  # Assume change, actual check might be deeper if we compare
-        else:
-            # Standard set item, with change detection
-            if key in self.data:
-                if self.data[key] == value:
-                    return  # No change, no save
-                else:
-                    self.echo(f"Setting '{key}' changed.")
-                    changed = True
+        with self.__lock:
+            if key in self.data and isinstance(self.data[key], dict) and isinstance(value, dict):
+                # If both old and new values are dictionaries, recursively update
+                self.data[key].update(value)  # This will call the dict's own update, which is what we want
             else:
-                self.echo(f"Setting '{key}' added.")
-                changed = True
-
-            super().__setitem__(key, value)  # Perform the actual set operation
-
-        if changed:
-            self.__save()
+                # The stored value may have been changed in place by the caller,
+                # so the change is detected against the written value below
+                super().__setitem__(key, value)  # Perform the actual set operation
+            if self.__changed(key):
+                self.echo(f"Setting '{key}' changed.")
 
     def __delitem__(self, key: str) -> None:
         """
@@ -623,8 +687,9 @@ class SettingsStorage(UserDict):
         """
         if key in self.data:
             self.echo(f"Setting '{key}' deleted.")  # Message updated
-            super().__delitem__(key)
-            self.__save()
+            with self.__lock:
+                super().__delitem__(key)
+                self.__changed(key)
         else:
             self.echo(f"Attempted to delete non-existent setting '{key}'. No action, no save.")
             raise KeyError(f"'{key}' not found in settings.")
@@ -636,12 +701,17 @@ class SettingsStorage(UserDict):
         it performs a recursive update.
         Includes a private '_initial_load' flag to control saving behavior during __load.
         """
-        initial_data_snapshot = json.dumps(self.data, sort_keys=True)  # Deep comparison check
+        with self.__lock:
+            self.__update(other, _initial_load, **kwargs)
+
+    def __update(self, other, _initial_load, **kwargs) -> None:
+        updated_keys = []
 
         # Process 'other' if it's a dict or iterable of key-value pairs
         if other:
             if hasattr(other, 'keys'):  # It's a dict-like object
                 for key, value in other.items():
+                    updated_keys.append(key)
                     if key in self.data and isinstance(self.data[key], dict) and isinstance(value, dict):
                         # Recursive update for nested dictionaries
                         self.data[key].update(value)  # Let the dict handle its own update
@@ -649,6 +719,7 @@ class SettingsStorage(UserDict):
                         super().__setitem__(key, value)  # Use super to avoid triggering __setitem__ here directly
             else:  # Assume iterable of (key, value) pairs
                 for key, value in other:
+                    updated_keys.append(key)
                     if key in self.data and isinstance(self.data[key], dict) and isinstance(value, dict):
                         self.data[key].update(value)
                     else:
@@ -656,18 +727,18 @@ class SettingsStorage(UserDict):
 
         # Process kwargs
         for key, value in kwargs.items():
+            updated_keys.append(key)
             if key in self.data and isinstance(self.data[key], dict) and isinstance(value, dict):
                 # Recursive update for nested dictionaries
                 self.data[key].update(value)
             else:
                 super().__setitem__(key, value)  # Use super to avoid triggering __setitem__ here directly
 
-        final_data_snapshot = json.dumps(self.data, sort_keys=True)
-
-        if final_data_snapshot != initial_data_snapshot:
-            if not _initial_load:  # Only save if not called from __load during initial setup
-                self.__save()
-        # else: No message when no change occurs from update()
+        # Only save if not called from __load during initial setup,
+        # the keys are compared one by one with what was last written
+        if not _initial_load:
+            for key in updated_keys:
+                self.__changed(key)
 
     def update_without_saving(self, other=None, **kwargs) -> None:
         """
@@ -676,7 +747,14 @@ class SettingsStorage(UserDict):
         This method will *not* perform recursive dictionary merging.
         It will overwrite entire dictionaries if present in 'other' or 'kwargs'.
         """
-        super().update(other, **kwargs)
+        with self.__lock:
+            super().update(other, **kwargs)
+            # Forget the written encoding of values that may differ from the file,
+            # so they are written with the next change of any key
+            keys = list(other.keys()) if hasattr(other, "keys") else [k for k, v in (other or ())]
+            for key in keys + list(kwargs.keys()):
+                if self.__written.get(key) != self.__encode(self.data[key]):
+                    self.__written.pop(key, None)
         self.echo("Settings updated without saving to disk.")
 
     def clear(self) -> None:
@@ -702,11 +780,9 @@ class SettingsStorage(UserDict):
             self[key] = value  # Use self[key] to trigger __setitem__ (which handles recursion)
         elif isinstance(self.data.get(key), dict) and isinstance(value, dict):
             # If default is a dict and existing is a dict, attempt to merge
-            initial_snapshot = json.dumps(self.data[key], sort_keys=True)
             self.data[key].update(value)  # This performs the merge
-            if json.dumps(self.data[key], sort_keys=True) != initial_snapshot:
+            if self.__changed(key):
                 self.echo(f"Setting default '{key}' (nested dict) merged.")
-                self.__save()
             else:
                 self.echo(f"Setting '{key}' already exists and merge resulted in no changes, default not applied.")
         else:
@@ -0,0 +1,254 @@
+"""
+Cython词法分析器一致性检查: 在offscreen的Qt平台下用编译好的cython_lexers模块
+和纯Python的实现分别为同一段代码着色, 比较每个字节的样式.
+  - 编译模块和纯Python实现的样式必须相同 (不比较空白字符的样式)
+  - 从几个行首分段着色 (像Scintilla增量着色一样) 必须和一次着色整个文档的结果相同
+有差异时打印差异的位置并以退出码1结束, 可以在CI中使用.
+两种实现是分开编写的, 内置的代码片段只包含两边都支持的语法
+(Nim的字符字面量只有纯Python实现支持), 用 --file 检查其他文件时可能会有差异.
+
+先编译模块:
+    sh cython/build_linux.sh
+
+Usage:
+    python utilities/cython_lexer_parity.py
+    python utilities/cython_lexer_parity.py --file nim/nim_lexers.nim --chunks 8
+"""
+
+import argparse
+import inspect
+import os
+import sys
+
+# 工程根目录
+application_directory = os.path.abspath(
+    os.path.join(
+        os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe()))), ".."
+    )
+)
+
+ADA_CORPUS = """\
+with Ada.Text_IO; use Ada.Text_IO;
+-- A comment line
+package body Stacks is
+   procedure Push (S : in out Stack; X : Integer) is
+   begin
+      S.Top := S.Top + 1;
+      Put_Line ("pushed");
+   end Push;
+   function Pop (S : in out Stack) return Integer is
+      Result : Integer := 42;
+   begin
+      if S.Top = 0 then
+         raise Constraint_Error;
+      end if;
+      return Result;
+   end Pop;
+end Stacks;
+-- 中文注释
+Put_Line ("你好");
+"""
+
+OBERON_CORPUS = """\
+MODULE Lists; (* a comment *)
+IMPORT Out;
+TYPE
+  List* = POINTER TO ListDesc;
+  ListDesc = RECORD value: INTEGER; next: List END;
+VAR count: LONGINT;
+
+PROCEDURE Add*(VAR l: List; v: INTEGER);
+  VAR n: List;
+BEGIN
+  NEW(n); n.value := v; n.next := l; l := n;
+  count := count + 1;
+  Out.String("added"); Out.Int(v, 0); Out.Ln
+END Add;
+
+BEGIN count := 0;
+  Out.String("你好") (* 中文 *)
+END Lists.
+"""
+
+NIM_CORPUS = '''\
+# A comment
+## A documentation comment
+import strutils, tables
+const SCI_GETSTYLEAT = 2010
+type
+    Sequence = object
+        start: seq[char]
+        style: int
+proc style_text(text: string, start: int) =
+    var count = 0
+    let name = "nim lexer"
+    for i in 0 .. 10:
+        if i mod 2 == 0 and not false:
+            inc count
+        else:
+            echo name
+    #[ multiline
+       comment ]#
+    let doc = """long
+string"""
+    discard cast[pointer](nil)
+# 中文注释
+echo "你好", 42
+'''
+
+CORPORA = {
+    "Ada": ADA_CORPUS,
+    "Oberon": OBERON_CORPUS,
+    "Nim": NIM_CORPUS,
+}
+# File extension -> lexer, for the --file option
+EXTENSIONS = {
+    ".adb": "Ada",
+    ".ads": "Ada",
+    ".mod": "Oberon",
+    ".ob": "Oberon",
+    ".nim": "Nim",
+    ".nims": "Nim",
+}
+# The style of whitespace is not visible, the implementations differ there
+WHITESPACE = b" \t\r\n"
+# Mismatches printed per check
+MAX_REPORTED = 10
+
+
+def style_document(lexer_name, text, native, chunks=1):
+    """
+    Style the text with the compiled or the pure Python lexer,
+    in 'chunks' pieces that start at line starts, returns the style bytes
+    """
+    import lexers
+    import qt
+
+    lexers.cython_lexers_found = native
+    editor = qt.QsciScintilla()
+    editor.setUtf8(True)
+    editor.setText(text)
+    lexer = getattr(lexers, lexer_name)(editor)
+    # Like CustomEditor.set_lexer, otherwise Python deletes the lexer
+    lexer.setParent(editor)
+    editor.setLexer(lexer)
+    send = editor.SendScintilla
+    length = send(editor.SCI_GETLENGTH)
+    lines = send(editor.SCI_GETLINECOUNT)
+    positions = sorted(
+        set(
+            [send(editor.SCI_POSITIONFROMLINE, lines * i // chunks) for i in range(chunks)]
+            + [length]
+        )
+    )
+    # The lexers with idle styling style a range through 'style_range'
+    style = getattr(lexer, "style_range", lexer.styleText)
+    for start, end in zip(positions, positions[1:]):
+        style(start, end)
+    return text.encode("utf-8"), bytes(
+        send(editor.SCI_GETSTYLEAT, position) for position in range(length)
+    )
+
+
+def compare(title, data, expected, actual):
+    """Print the differing byte ranges, returns the number of differing bytes"""
+    mismatches = [
+        position
+        for position, (first, second) in enumerate(zip(expected, actual))
+        if first != second and data[position : position + 1] not in WHITESPACE
+    ]
+    if len(expected) != len(actual):
+        print("{}: style lengths differ ({} / {})".format(title, len(expected), len(actual)))
+        return max(len(mismatches), 1)
+    if not mismatches:
+        print("{}: OK ({} bytes)".format(title, len(data)))
+        return 0
+    print("{}: {} bytes differ".format(title, len(mismatches)))
+    reported = 0
+    previous = None
+    for position in mismatches:
+        if previous is not None and position == previous + 1:
+            previous = position
+            continue
+        previous = position
+        if reported == MAX_REPORTED:
+            print("    ...")
+            break
+        reported += 1
+        line = data.count(b"\n", 0, position) + 1
+        line_start = data.rfind(b"\n", 0, position) + 1
+        line_end = data.find(b"\n", position)
+        if line_end == -1:
+            line_end = len(data)
+        print(
+            "    line {}, byte {}: expected style {}, got {}: {}".format(
+                line,
+                position - line_start,
+                expected[position],
+                actual[position],
+                data[line_start:line_end].decode("utf-8", errors="replace"),
+            )
+        )
+    return len(mismatches)
+
+
+def check(lexer_name, title, text, chunks):
+    data, native = style_document(lexer_name, text, True)
+    _, python = style_document(lexer_name, text, False)
+    _, native_chunked = style_document(lexer_name, text, True, chunks)
+    failures = compare("{} {} native / Python".format(lexer_name, title), data, python, native)
+    failures += compare(
+        "{} {} native / native in {} chunks".format(lexer_name, title, chunks),
+        data,
+        native,
+        native_chunked,
+    )
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cython lexer parity check")
+    parser.add_argument(
+        "--file",
+        action="append",
+        default=[],
+        help="additional file to compare, the lexer is chosen by the extension",
+    )
+    parser.add_argument(
+        "--chunks", type=int, default=4, help="pieces of the incremental styling"
+    )
+    options = parser.parse_args()
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    sys.path.insert(0, application_directory)
+    import qt
+    import data
+
+    application = qt.QApplication(sys.argv)
+    data.application = application
+    import lexers
+
+    if not lexers.cython_lexers_found:
+        print("The cython_lexers module could not be imported, build it with:")
+        print("    sh cython/build_linux.sh")
+        sys.exit(1)
+
+    checks = [(name, "corpus", text) for name, text in CORPORA.items()]
+    for path in options.file:
+        extension = os.path.splitext(path)[1].lower()
+        if extension not in EXTENSIONS:
+            parser.error("no Cython lexer for '{}'".format(path))
+        with open(path, "r", encoding="utf-8") as f:
+            checks.append((EXTENSIONS[extension], os.path.basename(path), f.read()))
+
+    failures = 0
+    for lexer_name, title, text in checks:
+        failures += check(lexer_name, title, text, options.chunks)
+    if failures:
+        print("PARITY FAILED")
+        sys.exit(1)
+    print("All lexers match")
+
+
+if __name__ == "__main__":
+    main()
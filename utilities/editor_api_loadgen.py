@@ -0,0 +1,222 @@
+"""
+编辑器API压测工具: 按固定速率(N请求/秒)调用AccountService/BookService,
+统计延迟p50/p99和吞吐量. 默认在进程内启动本地替身服务器(editor_api_standin).
+
+Usage:
+    python utilities/editor_api_loadgen.py --rate 50 --duration 10 --scenario mix
+    python utilities/editor_api_loadgen.py --base-url http://127.0.0.1:8765 --scenario list
+"""
+
+import argparse
+import concurrent.futures
+import inspect
+import itertools
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+# 工程根目录
+application_directory = os.path.abspath(
+    os.path.join(
+        os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe()))), ".."
+    )
+)
+sys.path.insert(0, application_directory)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from editor_api_standin import StandInConfig, start_standin
+
+SCENARIOS = ("login", "add", "list", "mix")
+
+
+def point_service_at(service, base_url):
+    """Redirect the API urls of a service instance to another server"""
+    old_base_url = service.base_url
+    for name, value in list(vars(service).items()):
+        if name.startswith("api_") and isinstance(value, str):
+            setattr(service, name, base_url + value[len(old_base_url) :])
+    service.base_url = base_url
+    return service
+
+
+def use_data_directory(data_directory):
+    """
+    Keep the settings and the local replace record databases that the
+    services write out of the application's '.exco' directory
+    """
+    import data
+
+    data.settings_directory = data_directory.replace("\\", "/")
+    data.replace_backup_directory = data.settings_directory + "/replace_backups"
+    data.replace_record_database = data.settings_directory + "/replace_records.sqlite"
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(int(len(sorted_values) * p), len(sorted_values) - 1)]
+
+
+class LoadGenerator:
+    def __init__(self, base_url, scenario="mix", books=10, use_cache=False):
+        from xc_entity.account import user_info
+        from xc_service.account_service import AccountService
+        from xc_service.book_service import BookService
+
+        self.account_service = point_service_at(AccountService(), base_url)
+        self.book_service = point_service_at(BookService(), base_url)
+        user_info.user_id = "loadgen"
+        self.scenario = scenario
+        self.books = books
+        self.use_cache = use_cache
+        self.counter = itertools.count()
+
+    def one_request(self):
+        """Run a single service call, returns (operation, success)"""
+        operation = self.scenario
+        if operation == "mix":
+            # Editing sessions add far more records than they list
+            operation = random.choices(("add", "list", "login"), (70, 28, 2))[0]
+        number = next(self.counter)
+        book = number % self.books
+        if operation == "login":
+            success, _ = self.account_service.login("loadgen", "loadgen")
+            return operation, success
+        if operation == "add":
+            result = self.book_service.save_replace_record(
+                {
+                    "cp_book_id": book,
+                    "book_title": "book-{}".format(book),
+                    "old_text": "旧文本{}".format(number),
+                    "new_text": "新文本{}".format(number),
+                },
+                idempotency_key="loadgen-{}-{}".format(os.getpid(), number),
+            )
+            return operation, result is not False
+        result = self.book_service.replace_record_list(
+            {"cp_book_id": book, "book_title": "book-{}".format(book)},
+            max_age=0,
+            force=not self.use_cache,
+        )
+        return operation, result is not False
+
+    def run(self, rate, duration, workers):
+        """
+        Open loop: request i is scheduled at start + i / rate, latency is measured
+        from the scheduled time, so a slow server is not hidden by a waiting client
+        """
+        total = int(rate * duration)
+        results = []
+        results_lock = threading.Lock()
+        start = time.perf_counter() + 0.1
+
+        def job(i):
+            scheduled = start + i / rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            began = time.perf_counter()
+            try:
+                operation, success = self.one_request()
+            except Exception:
+                operation, success = "error", False
+            finished = time.perf_counter()
+            with results_lock:
+                results.append((operation, success, finished - scheduled, finished - began))
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(job, range(total)))
+        elapsed = time.perf_counter() - start
+        return results, elapsed
+
+
+def report(results, elapsed):
+    lines = []
+    operations = sorted({r[0] for r in results})
+    lines.append(
+        "{:<8}{:>8}{:>8}{:>12}{:>12}{:>12}{:>12}".format(
+            "op", "count", "errors", "p50 ms", "p99 ms", "svc p50", "svc p99"
+        )
+    )
+    for operation in operations + ["total"]:
+        selected = [r for r in results if operation == "total" or r[0] == operation]
+        latencies = sorted(r[2] for r in selected)
+        service_times = sorted(r[3] for r in selected)
+        lines.append(
+            "{:<8}{:>8}{:>8}{:>12.1f}{:>12.1f}{:>12.1f}{:>12.1f}".format(
+                operation,
+                len(selected),
+                sum(1 for r in selected if not r[1]),
+                percentile(latencies, 0.50) * 1000,
+                percentile(latencies, 0.99) * 1000,
+                percentile(service_times, 0.50) * 1000,
+                percentile(service_times, 0.99) * 1000,
+            )
+        )
+    lines.append(
+        "throughput: {:.1f} requests/s ({} requests in {:.2f} s)".format(
+            len(results) / elapsed if elapsed > 0 else 0.0, len(results), elapsed
+        )
+    )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Editor API load generator")
+    parser.add_argument("--base-url", default=None, help="default: in-process stand-in")
+    parser.add_argument("--scenario", choices=SCENARIOS, default="mix")
+    parser.add_argument("--rate", type=float, default=50.0, help="requests per second")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--books", type=int, default=10)
+    parser.add_argument("--use-cache", action="store_true", help="revalidate the list cache")
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed-records", type=int, default=200)
+    options = parser.parse_args()
+
+    # The databases stay open until the process exits, so the directory
+    # is removed without tempfile.TemporaryDirectory
+    data_directory = tempfile.mkdtemp(prefix="loadgen.")
+    use_data_directory(data_directory)
+    server = None
+    base_url = options.base_url
+    if base_url is None:
+        server, base_url = start_standin(
+            config=StandInConfig(
+                options.latency_ms,
+                options.jitter_ms,
+                options.error_rate,
+                options.seed_records,
+            )
+        )
+    try:
+        generator = LoadGenerator(
+            base_url, options.scenario, options.books, options.use_cache
+        )
+        results, elapsed = generator.run(
+            options.rate, options.duration, options.workers
+        )
+        print("target: {} ({} at {:g}/s)".format(base_url, options.scenario, options.rate))
+        print(report(results, elapsed))
+        from xc_common.utils import http_stats
+
+        print("client endpoint stats:")
+        for endpoint, stats in sorted(http_stats().items()):
+            print(
+                "  {}: requests={requests} errors={errors} retries={retries} "
+                "p50={p50_ms:.1f}ms p99={p99_ms:.1f}ms".format(endpoint, **stats)
+            )
+    finally:
+        if server is not None:
+            server.shutdown()
+        shutil.rmtree(data_directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""
+本地编辑器API替身服务器, 用于离线测试和压测AccountService/BookService.
+实现 /api/editor/login, /api/editor/book/content_replace_add,
+/api/editor/book/content_replace_list, 可配置延迟、错误率和返回数据大小.
+只依赖标准库.
+
+Usage:
+    python utilities/editor_api_standin.py --port 8765 --latency-ms 40 --error-rate 0.01
+    (then set "editor_api_base_url" to http://127.0.0.1:8765)
+"""
+
+import argparse
+import gzip
+import hashlib
+import itertools
+import json
+import random
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+API_LOGIN = "/api/editor/login"
+API_REPLACE_ADD = "/api/editor/book/content_replace_add"
+API_REPLACE_LIST = "/api/editor/book/content_replace_list"
+# Responses larger than this are gzip compressed when the client accepts it
+GZIP_MIN_SIZE = 1024
+
+
+class StandInConfig:
+    def __init__(
+        self,
+        latency_ms=0.0,
+        jitter_ms=0.0,
+        error_rate=0.0,
+        seed_records=0,
+        seed_text_size=8,
+    ):
+        # Added to every response
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        # Fraction of the requests answered with HTTP 503
+        self.error_rate = error_rate
+        # Records every new book starts with, for large list payloads
+        self.seed_records = seed_records
+        self.seed_text_size = seed_text_size
+
+
+class StandInState:
+    """The records of the stand-in, shared by the handler threads"""
+
+    def __init__(self, config):
+        self.config = config
+        self.lock = threading.Lock()
+        self.ids = itertools.count(1)
+        self.books = {}
+        self.idempotency_keys = {}
+        self.counters = {}
+
+    def count(self, path):
+        with self.lock:
+            self.counters[path] = self.counters.get(path, 0) + 1
+
+    def book(self, cp_book_id, book_title):
+        key = (cp_book_id, book_title)
+        records = self.books.get(key)
+        if records is None:
+            records = self.books[key] = []
+            for i in range(self.config.seed_records):
+                records.append(
+                    self.new_record(
+                        cp_book_id,
+                        "seed",
+                        book_title,
+                        "旧{}".format(i).ljust(self.config.seed_text_size, "字"),
+                        "新{}".format(i).ljust(self.config.seed_text_size, "字"),
+                    )
+                )
+        return records
+
+    def new_record(self, cp_book_id, account_id, book_title, old_text, new_text):
+        return {
+            "id": next(self.ids),
+            "cp_book_id": cp_book_id,
+            "account_id": account_id,
+            "book_title": book_title,
+            "old_text": old_text,
+            "new_text": new_text,
+            "create_time": int(time.time()),
+        }
+
+    def add(self, form, idempotency_key):
+        with self.lock:
+            if idempotency_key and idempotency_key in self.idempotency_keys:
+                return self.idempotency_keys[idempotency_key]
+            records = self.book(form.get("cp_book_id", ""), form.get("book_title", ""))
+            record = self.new_record(
+                form.get("cp_book_id", ""),
+                form.get("account_id", ""),
+                form.get("book_title", ""),
+                form.get("old_text", ""),
+                form.get("new_text", ""),
+            )
+            records.append(record)
+            if idempotency_key:
+                self.idempotency_keys[idempotency_key] = record
+            return record
+
+    def list(self, cp_book_id, book_title):
+        with self.lock:
+            records = list(self.book(cp_book_id, book_title))
+        max_id = records[-1]["id"] if records else 0
+        etag = '"{}"'.format(
+            hashlib.sha1("{}:{}".format(len(records), max_id).encode()).hexdigest()[:16]
+        )
+        return records, etag
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    # Keep-alive, so the pooled client connections are reused
+    protocol_version = "HTTP/1.1"
+    state = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, payload, status=200, headers=None):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        if len(body) >= GZIP_MIN_SIZE and "gzip" in self.headers.get(
+            "Accept-Encoding", ""
+        ):
+            body = gzip.compress(body, compresslevel=5)
+            self.send_header("Content-Encoding", "gzip")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_empty(self, status, headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _read_form(self):
+        length = int(self.headers.get("Content-Length", 0) or 0)
+        raw = self.rfile.read(length).decode("utf-8") if length else ""
+        return dict(urllib.parse.parse_qsl(raw, keep_blank_values=True))
+
+    def do_POST(self):
+        config = self.state.config
+        path = urllib.parse.urlsplit(self.path).path.replace("//", "/")
+        form = self._read_form()
+        self.state.count(path)
+        delay = config.latency_ms + random.uniform(0, config.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000)
+        if config.error_rate > 0 and random.random() < config.error_rate:
+            self._send_json({"code": 500, "message": "stand-in error"}, status=503)
+            return
+        if path == API_LOGIN:
+            self._login(form)
+        elif path == API_REPLACE_ADD:
+            self._replace_add(form)
+        elif path == API_REPLACE_LIST:
+            self._replace_list(form)
+        else:
+            self._send_json({"code": 404, "message": "not found"}, status=404)
+
+    def _login(self, form):
+        if not form.get("editor_name") or not form.get("editor_password"):
+            self._send_json({"code": 1, "message": "用户名或密码错误"})
+            return
+        self._send_json(
+            {
+                "code": 0,
+                "message": "ok",
+                "body": {
+                    "token": hashlib.sha1(form["editor_name"].encode()).hexdigest(),
+                    "user_id": "1",
+                    "user_name": form["editor_name"],
+                    "is_webeditor": "1",
+                    "permissions": [],
+                },
+            }
+        )
+
+    def _replace_add(self, form):
+        idempotency_key = self.headers.get("Idempotency-Key") or form.get(
+            "idempotency_key"
+        )
+        record = self.state.add(form, idempotency_key)
+        self._send_json({"code": 0, "message": "ok", "body": [record]})
+
+    def _replace_list(self, form):
+        records, etag = self.state.list(
+            form.get("cp_book_id", ""), form.get("book_title", "")
+        )
+        if self.headers.get("If-None-Match") == etag:
+            self._send_empty(304, {"ETag": etag})
+            return
+        self._send_json(
+            {"code": 0, "message": "ok", "body": records}, headers={"ETag": etag}
+        )
+
+
+def start_standin(host="127.0.0.1", port=0, config=None):
+    """
+    Start the stand-in in a background thread.
+    Returns (server, base_url), stop it with server.shutdown().
+    """
+    state = StandInState(config or StandInConfig())
+    handler = type("BoundStandInHandler", (StandInHandler,), {"state": state})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.state = state
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, "http://{}:{}".format(*server.server_address[:2])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the editor API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed-records", type=int, default=0)
+    parser.add_argument("--seed-text-size", type=int, default=8)
+    options = parser.parse_args()
+    config = StandInConfig(
+        options.latency_ms,
+        options.jitter_ms,
+        options.error_rate,
+        options.seed_records,
+        options.seed_text_size,
+    )
+    server, base_url = start_standin(options.host, options.port, config)
+    print("Editor API stand-in listening on {}".format(base_url))
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
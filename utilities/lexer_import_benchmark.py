@@ -0,0 +1,81 @@
+"""
+词法分析器导入耗时测试: 比较延迟加载(只导入lexers包)和
+加载全部词法分析器(旧的启动方式)所需的时间.
+每次测量都在新的Python进程中进行, 使用offscreen的Qt平台插件.
+
+Usage:
+    python utilities/lexer_import_benchmark.py --runs 7
+"""
+
+import argparse
+import inspect
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# 工程根目录
+application_directory = os.path.abspath(
+    os.path.join(
+        os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe()))), ".."
+    )
+)
+
+MEASURE_SCRIPT = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+import qt
+import settings
+start = time.perf_counter()
+import lexers
+imported = time.perf_counter()
+if {load_all!r}:
+    for name in lexers.LEXER_MODULES:
+        lexers.get_lexer_class(name)
+finished = time.perf_counter()
+print(json.dumps({{
+    "import": (imported - start) * 1000,
+    "total": (finished - start) * 1000,
+    "modules": sorted(m for m in sys.modules if m.startswith("lexers")),
+}}))
+"""
+
+
+def measure(load_all):
+    environment = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    script = MEASURE_SCRIPT.format(root=application_directory, load_all=load_all)
+    output = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=application_directory,
+        env=environment,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lexer import time benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    options = parser.parse_args()
+
+    results = {}
+    for mode, load_all in (("lazy", False), ("all lexers", True)):
+        runs = [measure(load_all) for _ in range(options.runs)]
+        results[mode] = statistics.median(r["total"] for r in runs)
+        print(
+            "{:<12} median {:8.1f} ms  ({} lexers modules loaded)".format(
+                mode, results[mode], len(runs[-1]["modules"])
+            )
+        )
+    print(
+        "startup delta: {:.1f} ms saved by the lazy registry".format(
+            results["all lexers"] - results["lazy"]
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,586 @@
+"""
+词法分析器吞吐量测试: 在offscreen的Qt平台下用QsciScintilla为生成的代码和真实的文件着色,
+每个词法分析器和语料都在新的Python进程中测量
+  - 第一次为整个文档着色的速度 (MB/s, 包括空闲时间分段着色)
+  - 在文档中间逐个输入字符时每次按键到重绘完成的延迟 (p50/p95)
+  - 着色时Python分配的内存峰值 (tracemalloc, 不包括Qt/Scintilla的内存)
+与保存的基准比较, 超过阈值时以退出码1结束, 可以在CI中使用.
+
+Usage:
+    python utilities/lexer_throughput_benchmark.py --save-baseline
+    python utilities/lexer_throughput_benchmark.py --lexers Nim CustomPython --size-kb 256
+    python utilities/lexer_throughput_benchmark.py --corpus Zig=path/to/main.zig
+"""
+
+import argparse
+import inspect
+import json
+import os
+import subprocess
+import sys
+
+# 工程根目录
+application_directory = os.path.abspath(
+    os.path.join(
+        os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe()))), ".."
+    )
+)
+
+DEFAULT_BASELINE = os.path.join(
+    application_directory, "utilities", "lexer_throughput_baseline.json"
+)
+# A regression has to be larger than this fraction and the minimums below
+DEFAULT_THRESHOLD = 0.15
+MIN_REGRESSION_MB_S = 0.1
+MIN_REGRESSION_MS = 0.5
+MIN_REGRESSION_KB = 256
+# Seconds a child process may take for one lexer and corpus
+CHILD_TIMEOUT = 900
+
+# Lexers that are not in the 'lexers' registry
+TREE_SITTER_LEXERS = {
+    "TreeSitterPython": "lexers.treesitterpython",
+    "TreeSitterMakefile": "lexers.treesittermake",
+}
+# QScintilla lexer wrappers measured by default, as a reference for the custom lexers
+DEFAULT_BUILTIN_LEXERS = ("CPP", "HTML", "Bash")
+
+# Synthetic corpora: the snippet is repeated with 'NUM' replaced by a counter
+SNIPPETS = {
+    "python": '''\
+# Comment NUM
+@decorator
+class WidgetNUM(object):
+    """Docstring of the widget NUM"""
+    def method_NUM(self, value=0xff, *args):
+        if value > NUM and not args:
+            return "string NUM" + 'other'
+        for item in range(NUM):
+            print(item, 3.14, [1, 2], {"key": None})
+        return None
+''',
+    "nim": '''\
+# Comment NUM
+## Documentation comment
+type
+    ObjectNUM = object
+        name: string
+        value: int
+proc process_NUM(data: seq[int], limit: int = NUM): int =
+    var total = 0
+    for i in 0 .. limit:
+        if i mod 2 == 0 and not false:
+            inc total
+    echo "result NUM", total
+    #[ multiline
+       comment ]#
+    result = total
+''',
+    "ada": """\
+-- Comment NUM
+package body StackNUM is
+   procedure PushNUM (S : in out Stack; X : Integer) is
+   begin
+      S.Top := S.Top + NUM;
+      Put_Line ("pushed NUM");
+   end PushNUM;
+end StackNUM;
+""",
+    "oberon": """\
+MODULE ListNUM; (* comment NUM *)
+IMPORT Out;
+VAR count: INTEGER;
+PROCEDURE AddNUM*(VAR l: List; v: INTEGER);
+BEGIN
+  count := count + NUM;
+  Out.String("added NUM"); Out.Ln
+END AddNUM;
+END ListNUM.
+""",
+    "c": """\
+/* Comment NUM */
+#include <stdio.h>
+static int function_NUM(int value, const char *text)
+{
+    int result = value * NUM + 0x1F; // line comment
+    if (result > 10 && text != NULL) {
+        printf("%s %d\\n", text, result);
+    }
+    return result;
+}
+""",
+    "zig": """\
+// Comment NUM
+const std = @import("std");
+pub fn function_NUM(value: u32) !u32 {
+    var result: u32 = value * NUM;
+    if (result > 10) {
+        std.debug.print("result {d}\\n", .{result});
+    }
+    return result;
+}
+""",
+    "php": """\
+<?php
+// Comment NUM
+function function_NUM($value, $text = "default") {
+    $result = $value * NUM;
+    if ($result > 10) {
+        echo "result: " . $text;
+    }
+    return $result;
+}
+?>
+""",
+    "awk": """\
+# Comment NUM
+BEGIN { FS = ","; total = 0 }
+$1 > NUM && $2 != "" {
+    total += $3
+    printf("%s %d\\n", $2, NUM)
+}
+END { print "total", total }
+""",
+    "cicode": """\
+// Comment NUM
+INT FUNCTION CalculateNUM(INT iValue, STRING sText)
+    INT iResult = iValue * NUM;
+    IF iResult > 10 THEN
+        Message("Result", sText, 0);
+    END
+    RETURN iResult;
+END
+""",
+    "routeros": """\
+# Comment NUM
+/ip address add address=10.0.0.1/24 interface=ether1 comment="lan NUM"
+/ip firewall filter add chain=input protocol=tcp dst-port=NUM action=accept
+:local counter NUM
+:if ($counter > 10) do={ :put "counter $counter" }
+""",
+    "spice": """\
+* Comment NUM
+.subckt amplifierNUM in out vcc gnd
+R1 in base 10k
+C1 out gnd 100n
+Q1 vcc base out npn_model
+.model npn_model npn (bf=NUM)
+.ends amplifierNUM
+.tran 1u 10m
+""",
+    "skill": """\
+; Comment NUM
+procedure( functionNUM(value text)
+    let( ((result value * NUM))
+        if( result > 10 then
+            printf("%s %d\\n" text result)
+        )
+        result
+    )
+)
+""",
+    "smallbasic": """\
+' Comment NUM
+For i = 1 To NUM
+    If Math.Remainder(i, 2) = 0 Then
+        TextWindow.WriteLine("Even " + i)
+    Else
+        TextWindow.WriteLine("Odd NUM")
+    EndIf
+EndFor
+""",
+    "html": """\
+<!-- Comment NUM -->
+<div class="section" id="sectionNUM">
+    <h2>Title NUM</h2>
+    <p>Paragraph with a <a href="https://example.com/NUM">link</a> &amp; text.</p>
+    <script>var value = NUM; console.log("value", value);</script>
+</div>
+""",
+    "bash": """\
+# Comment NUM
+for i in $(seq 1 NUM); do
+    if [ "$i" -gt 10 ]; then
+        echo "value $i" >> /tmp/output_NUM.txt
+    fi
+done
+export VARIABLE_NUM="text"
+""",
+    "make": """\
+# Comment NUM
+TARGET_NUM = program_NUM
+$(TARGET_NUM): main.o util.o
+\t$(CC) -o $@ $^ $(LDFLAGS)
+%.o: %.c
+\t$(CC) -c $< -o $@
+""",
+    "text": """\
+Paragraph NUM: the quick brown fox jumps over the lazy dog, again and again,
+while the night was long and the story went on for many more pages.
+
+""",
+}
+# Lexer name -> snippet
+LEXER_LANGUAGES = {
+    "Ada": "ada",
+    "AWK": "awk",
+    "Bash": "bash",
+    "CiCode": "cicode",
+    "CPP": "c",
+    "CustomPython": "python",
+    "CustomSpice": "spice",
+    "Cython": "python",
+    "HTML": "html",
+    "Makefile": "make",
+    "Nim": "nim",
+    "Oberon": "oberon",
+    "Php": "php",
+    "Python": "python",
+    "RouterOS": "routeros",
+    "SKILL": "skill",
+    "SmallBasic": "smallbasic",
+    "Spice": "spice",
+    "Text": "text",
+    "TreeSitterMakefile": "make",
+    "TreeSitterPython": "python",
+    "Zig": "zig",
+}
+# Real corpora from the repository, per language
+REAL_CORPORA = {
+    "python": "gui/customeditor.py",
+    "nim": "nim/nim_lexers.nim",
+    "text": "README.md",
+}
+
+# Runs in the child process, prints the result as JSON on the last line
+MEASURE_SCRIPT = r"""
+import importlib, json, statistics, sys, time, tracemalloc
+sys.path.insert(0, {root!r})
+import qt
+import data
+application = qt.QApplication(sys.argv)
+data.application = application
+import lexers
+
+config = json.loads(sys.stdin.read())
+name = config["lexer"]
+if name in config["tree_sitter_lexers"]:
+    lexer_class = getattr(importlib.import_module(config["tree_sitter_lexers"][name]), name)
+else:
+    lexer_class = lexers.get_lexer_class(name)
+text = config["text"]
+send = None
+
+def create_editor():
+    global send
+    editor = qt.QsciScintilla()
+    editor.setUtf8(True)
+    editor.resize(900, 700)
+    editor.show()
+    editor.setText(text)
+    if hasattr(lexer_class, "TREE_SITTER_LEXER"):
+        lexer = lexer_class(lexer_class.NAME, lexer_class.TREE_SITTER_LEXER, editor)
+    else:
+        lexer = lexer_class(editor)
+    # Like CustomEditor.set_lexer, otherwise Python deletes the lexer
+    lexer.setParent(editor)
+    # CustomEditor passes the modifications to the lexer
+    if hasattr(lexer, "text_modified_callback"):
+        editor.SCN_MODIFIED.connect(lexer.text_modified_callback)
+    send = editor.SendScintilla
+    return editor, lexer
+
+def style_document(editor, lexer):
+    # Setting the lexer already styles the visible text (and parses the whole
+    # document for tree-sitter), SCI_COLOURISE calls styleText of the custom
+    # lexers for the rest, the idle styling runs in the event loop
+    length = send(editor.SCI_GETLENGTH)
+    deadline = time.perf_counter() + config["style_timeout"]
+    editor.setLexer(lexer)
+    send(editor.SCI_COLOURISE, 0, -1)
+    while send(editor.SCI_GETENDSTYLED) < length:
+        if time.perf_counter() > deadline:
+            return False
+        application.processEvents()
+    return True
+
+def type_keystrokes(editor, count, pause=True):
+    line = send(editor.SCI_GETLINECOUNT) // 2
+    send(editor.SCI_GOTOPOS, send(editor.SCI_POSITIONFROMLINE, line))
+    send(editor.SCI_SCROLLCARET)
+    editor.viewport().repaint()
+    application.processEvents()
+    keys = config["keystroke_text"].encode("utf-8")
+    samples = []
+    for i in range(count):
+        start = time.perf_counter()
+        send(editor.SCI_ADDTEXT, 1, keys[i % len(keys) : i % len(keys) + 1])
+        editor.viewport().repaint()
+        samples.append((time.perf_counter() - start) * 1000)
+        if pause:
+            # The pause between keystrokes, idle styling may continue
+            application.processEvents()
+    return samples
+
+result = {{"bytes": len(text.encode("utf-8")), "complete": True}}
+initial = []
+keystrokes = []
+for _ in range(config["runs"]):
+    editor, lexer = create_editor()
+    start = time.perf_counter()
+    result["complete"] = style_document(editor, lexer) and result["complete"]
+    initial.append((time.perf_counter() - start) * 1000)
+    keystrokes.extend(type_keystrokes(editor, config["keystrokes"]))
+    editor.close()
+    editor.deleteLater()
+    application.processEvents()
+keystrokes.sort()
+result["initial_ms"] = statistics.median(initial)
+result["initial_mb_s"] = result["bytes"] / (1024 * 1024) / (result["initial_ms"] / 1000)
+result["keystroke_p50_ms"] = keystrokes[len(keystrokes) // 2]
+result["keystroke_p95_ms"] = keystrokes[min(int(len(keystrokes) * 0.95), len(keystrokes) - 1)]
+
+# Allocations are measured separately, tracemalloc slows down the styling
+editor, lexer = create_editor()
+tracemalloc.start()
+style_document(editor, lexer)
+result["initial_peak_kb"] = tracemalloc.get_traced_memory()[1] / 1024
+# Only the memory above what the styled document already holds, and without
+# the pauses, the idle styling under tracemalloc would take most of the time
+retained = tracemalloc.get_traced_memory()[0]
+tracemalloc.reset_peak()
+type_keystrokes(editor, min(config["keystrokes"], 50), pause=False)
+result["keystroke_peak_kb"] = (tracemalloc.get_traced_memory()[1] - retained) / 1024
+tracemalloc.stop()
+
+print("LEXER-RESULT " + json.dumps(result))
+sys.stdout.flush()
+import os
+os._exit(0)
+"""
+
+# Typed in the middle of the document, opens and closes a string and a call
+KEYSTROKE_TEXT = 'value = call(1, "text") + 2 '
+
+
+def synthetic_corpus(language, size_kb):
+    snippet = SNIPPETS[language]
+    parts = []
+    size = 0
+    number = 0
+    while size < size_kb * 1024:
+        part = snippet.replace("NUM", str(number))
+        parts.append(part)
+        size += len(part.encode("utf-8"))
+        number += 1
+    return "".join(parts)
+
+
+def real_corpus(path, size_kb):
+    """The file repeated up to the size, so the throughput is comparable"""
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        text = f.read()
+    if not text:
+        return text
+    repeats = max(1, (size_kb * 1024) // max(len(text.encode("utf-8")), 1))
+    return text * repeats
+
+
+def corpora_for(lexer, size_kb, extra_corpora):
+    """List of (corpus name, text) for the lexer"""
+    result = []
+    language = LEXER_LANGUAGES.get(lexer, "c")
+    result.append(("synthetic", synthetic_corpus(language, size_kb)))
+    if language in REAL_CORPORA:
+        path = os.path.join(application_directory, REAL_CORPORA[language])
+        if os.path.isfile(path):
+            result.append((REAL_CORPORA[language], real_corpus(path, size_kb)))
+    for name, path in extra_corpora:
+        if name == lexer:
+            result.append((os.path.basename(path), real_corpus(path, size_kb)))
+    return result
+
+
+def measure(lexer, text, runs, keystrokes, style_timeout):
+    config = {
+        "lexer": lexer,
+        "text": text,
+        "runs": runs,
+        "keystrokes": keystrokes,
+        "keystroke_text": KEYSTROKE_TEXT,
+        "style_timeout": style_timeout,
+        "tree_sitter_lexers": TREE_SITTER_LEXERS,
+    }
+    script = MEASURE_SCRIPT.format(root=application_directory)
+    environment = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    try:
+        completed = subprocess.run(
+            [sys.executable, "-c", script],
+            # The corpus is too large for the command line
+            input=json.dumps(config),
+            cwd=application_directory,
+            env=environment,
+            capture_output=True,
+            text=True,
+            timeout=CHILD_TIMEOUT,
+        )
+    except subprocess.TimeoutExpired:
+        return {"error": "timeout after {} s".format(CHILD_TIMEOUT)}
+    for line in completed.stdout.splitlines():
+        if line.startswith("LEXER-RESULT "):
+            return json.loads(line[len("LEXER-RESULT ") :])
+    error = completed.stderr.strip().splitlines()
+    return {
+        "error": error[-1]
+        if error
+        else "exit code {}".format(completed.returncode)
+    }
+
+
+def default_lexers():
+    import importlib
+
+    sys.path.insert(0, application_directory)
+    lexers = importlib.import_module("lexers")
+    names = [
+        name
+        for name, module in lexers.LEXER_MODULES.items()
+        if module != "lexers.builtin"
+    ]
+    return names + list(DEFAULT_BUILTIN_LEXERS) + list(TREE_SITTER_LEXERS)
+
+
+def compare(results, baseline, threshold):
+    """Return the list of regressions against the baseline"""
+    regressions = []
+    for key, result in results.items():
+        reference = baseline.get(key)
+        if reference is None or "error" in reference:
+            continue
+        if "error" in result:
+            regressions.append("{}: {}".format(key, result["error"]))
+            continue
+        # Lower throughput is worse, fast lexers need a measurable slowdown too
+        value, before = result["initial_mb_s"], reference["initial_mb_s"]
+        slower_ms = result["initial_ms"] - reference["initial_ms"]
+        if (
+            before - value > max(before * threshold, MIN_REGRESSION_MB_S)
+            and slower_ms > MIN_REGRESSION_MS
+        ):
+            regressions.append(
+                "{} initial_mb_s: {:.2f} -> {:.2f} (-{:.0f}%)".format(
+                    key, before, value, (1 - value / before) * 100
+                )
+            )
+        for metric, minimum in (
+            ("keystroke_p50_ms", MIN_REGRESSION_MS),
+            ("keystroke_p95_ms", MIN_REGRESSION_MS),
+            ("initial_peak_kb", MIN_REGRESSION_KB),
+            ("keystroke_peak_kb", MIN_REGRESSION_KB),
+        ):
+            value, before = result[metric], reference[metric]
+            if value - before > max(before * threshold, minimum):
+                regressions.append(
+                    "{} {}: {:.2f} -> {:.2f} (+{:.0f}%)".format(
+                        key, metric, before, value, (value / max(before, 1e-9) - 1) * 100
+                    )
+                )
+    return regressions
+
+
+def format_result(key, result):
+    if "error" in result:
+        return "{:<44} skipped: {}".format(key, result["error"])
+    return (
+        "{:<44}{:7.0f} KB {:8.2f} MB/s{}  keystroke p50 {:6.2f} ms  p95 {:7.2f} ms  "
+        "peak {:8.0f} KB / {:6.0f} KB".format(
+            key,
+            result["bytes"] / 1024,
+            result["initial_mb_s"],
+            "" if result["complete"] else " (incomplete)",
+            result["keystroke_p50_ms"],
+            result["keystroke_p95_ms"],
+            result["initial_peak_kb"],
+            result["keystroke_peak_kb"],
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lexer throughput benchmark")
+    parser.add_argument("--lexers", nargs="*", default=None, help="default: all custom lexers")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--size-kb", type=int, default=256, help="size of every corpus")
+    parser.add_argument("--keystrokes", type=int, default=200)
+    parser.add_argument(
+        "--style-timeout",
+        type=float,
+        default=120,
+        help="seconds for styling a whole document",
+    )
+    parser.add_argument(
+        "--corpus",
+        action="append",
+        default=[],
+        metavar="LEXER=PATH",
+        help="additional real corpus for a lexer",
+    )
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="allowed relative regression (default: %(default)s)",
+    )
+    parser.add_argument("--json", default=None, help="also write the results here")
+    options = parser.parse_args()
+
+    extra_corpora = []
+    for corpus in options.corpus:
+        if "=" not in corpus:
+            parser.error("--corpus needs the form LEXER=PATH")
+        extra_corpora.append(tuple(corpus.split("=", 1)))
+    lexer_names = options.lexers or default_lexers()
+
+    results = {}
+    for lexer in lexer_names:
+        for corpus_name, text in corpora_for(lexer, options.size_kb, extra_corpora):
+            key = "{}/{}".format(lexer, corpus_name)
+            results[key] = measure(
+                lexer, text, options.runs, options.keystrokes, options.style_timeout
+            )
+            print(format_result(key, results[key]))
+            sys.stdout.flush()
+    if options.json:
+        with open(options.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+
+    if options.save_baseline:
+        baseline = {}
+        if os.path.isfile(options.baseline):
+            # Keep the lexers that were not measured this time
+            with open(options.baseline, "r", encoding="utf-8") as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(options.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=4)
+        print("Baseline saved to {}".format(options.baseline))
+        return 0
+    if not os.path.isfile(options.baseline):
+        print("No baseline at {}, run with --save-baseline".format(options.baseline))
+        return 0
+    with open(options.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, options.threshold)
+    if regressions:
+        print("Lexer regressions (threshold {:.0%}):".format(options.threshold))
+        for regression in regressions:
+            print("    " + regression)
+        return 1
+    print("No lexer regressions (threshold {:.0%})".format(options.threshold))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
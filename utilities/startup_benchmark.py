@@ -0,0 +1,325 @@
+"""
+启动性能测试: 在offscreen的Qt平台下无界面运行, 测量
+  - 冷启动和热启动到主窗口可编辑的时间 (冷启动使用空的字节码缓存目录)
+  - 各个模块的导入时间 (解析 python -X importtime 的输出)
+  - 峰值内存 (RSS)
+与保存的基准比较, 超过阈值时以退出码1结束, 可以在CI中使用.
+
+Usage:
+    python utilities/startup_benchmark.py --save-baseline
+    python utilities/startup_benchmark.py --runs 5 --threshold 0.15
+"""
+
+import argparse
+import inspect
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# 工程根目录
+application_directory = os.path.abspath(
+    os.path.join(
+        os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe()))), ".."
+    )
+)
+
+DEFAULT_BASELINE = os.path.join(
+    application_directory, "utilities", "startup_benchmark_baseline.json"
+)
+# Modules whose import time is measured separately
+IMPORT_MODULES = (
+    "qt",
+    "settings",
+    "settings.old",
+    "themes",
+    "lexers",
+    "codequality",
+    "gui.customeditor",
+    "gui.mainwindow",
+)
+# A regression has to be larger than this fraction and this many milliseconds
+DEFAULT_THRESHOLD = 0.15
+MIN_REGRESSION_MS = 20.0
+MIN_REGRESSION_KB = 4096
+
+# Runs first in the child processes: the settings, the local databases and
+# the other data files go into a temporary directory instead of '.exco'
+DATA_DIRECTORY_SCRIPT = r"""
+import data
+data.settings_directory = {data_directory!r}
+data.replace_backup_directory = data.settings_directory + "/replace_backups"
+data.replace_record_database = data.settings_directory + "/replace_records.sqlite"
+data.config_file = data.settings_directory + "/userfunctions.cfg"
+data.temp_file_directory = data.settings_directory + "/temp_file"
+"""
+
+# Runs in the child process: build the main window like exco.py does after
+# the login and report when the event loop is idle (the window is editable)
+STARTUP_SCRIPT = r"""
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {root!r})
+sys.argv = ["exco.py"]
+{data_directory_script}
+import qt
+import data
+application = qt.QApplication(sys.argv)
+data.application = application
+application.setStyle("Fusion")
+import components.signaldispatcher
+data.signal_dispatcher = components.signaldispatcher.GlobalSignalDispatcher()
+imported_start = time.perf_counter()
+import gui.mainwindow
+imported = time.perf_counter()
+main_window = gui.mainwindow.MainWindow(new_document=True)
+built = time.perf_counter()
+main_window.show()
+result = {{}}
+
+def editable():
+    result["editable"] = time.perf_counter()
+    application.quit()
+
+qt.QTimer.singleShot(0, editable)
+application.exec()
+try:
+    import resource
+    peak_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        peak_rss_kb //= 1024
+except ImportError:
+    peak_rss_kb = None
+print("STARTUP-RESULT " + json.dumps({{
+    "import_ms": (imported - imported_start) * 1000,
+    "build_ms": (built - imported) * 1000,
+    "editable_ms": (result["editable"] - start) * 1000,
+    "peak_rss_kb": peak_rss_kb,
+}}))
+sys.stdout.flush()
+import os
+os._exit(0)
+"""
+
+
+def child_environment(pycache_prefix):
+    environment = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    environment["PYTHONPYCACHEPREFIX"] = pycache_prefix
+    environment.pop("EXCO_TRACE", None)
+    return environment
+
+
+def data_directory_script(data_directory):
+    return DATA_DIRECTORY_SCRIPT.format(
+        data_directory=data_directory.replace("\\", "/")
+    )
+
+
+def run_startup(pycache_prefix, data_directory):
+    """One startup in a new process, wall time includes interpreter start"""
+    script = STARTUP_SCRIPT.format(
+        root=application_directory,
+        data_directory_script=data_directory_script(data_directory),
+    )
+    began = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=application_directory,
+        env=child_environment(pycache_prefix),
+        capture_output=True,
+        text=True,
+        timeout=300,
+    )
+    wall_ms = (time.perf_counter() - began) * 1000
+    for line in completed.stdout.splitlines():
+        if line.startswith("STARTUP-RESULT "):
+            result = json.loads(line[len("STARTUP-RESULT ") :])
+            result["wall_ms"] = wall_ms
+            return result
+    raise RuntimeError(
+        "Startup failed (exit code {}):\n{}".format(
+            completed.returncode, completed.stderr[-4000:]
+        )
+    )
+
+
+def parse_importtime(stderr):
+    """Cumulative import time in ms per module from 'python -X importtime'"""
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:") :].split("|")
+        if len(parts) != 3:
+            continue
+        try:
+            cumulative = int(parts[1].strip())
+        except ValueError:
+            # The header line
+            continue
+        times[parts[2].strip()] = cumulative / 1000
+    return times
+
+
+def measure_import(module, pycache_prefix, data_directory):
+    completed = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            "import sys; sys.path.insert(0, {!r})\n{}\nimport {}".format(
+                application_directory, data_directory_script(data_directory), module
+            ),
+        ],
+        cwd=application_directory,
+        env=child_environment(pycache_prefix),
+        capture_output=True,
+        text=True,
+        timeout=300,
+    )
+    if completed.returncode != 0:
+        return None
+    return parse_importtime(completed.stderr).get(module)
+
+
+def run_suite(runs, modules, data_directory):
+    results = {"cold": {}, "warm": {}, "imports_ms": {}}
+    with tempfile.TemporaryDirectory() as warm_cache:
+        # Cold: every run compiles all modules into an empty bytecode cache
+        cold_runs = []
+        for _ in range(runs):
+            with tempfile.TemporaryDirectory() as cold_cache:
+                cold_runs.append(run_startup(cold_cache, data_directory))
+        # Warm: the bytecode cache of the first run is reused
+        run_startup(warm_cache, data_directory)
+        warm_runs = [run_startup(warm_cache, data_directory) for _ in range(runs)]
+        for name, samples in (("cold", cold_runs), ("warm", warm_runs)):
+            for key in ("wall_ms", "editable_ms", "import_ms", "build_ms"):
+                results[name][key] = statistics.median(s[key] for s in samples)
+            rss = [s["peak_rss_kb"] for s in samples if s["peak_rss_kb"] is not None]
+            results[name]["peak_rss_kb"] = max(rss) if rss else None
+        for module in modules:
+            samples = [
+                measure_import(module, warm_cache, data_directory) for _ in range(runs)
+            ]
+            samples = [s for s in samples if s is not None]
+            results["imports_ms"][module] = (
+                statistics.median(samples) if samples else None
+            )
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Return the list of regressions against the baseline"""
+    regressions = []
+
+    def check(label, value, reference, minimum):
+        if value is None or reference is None:
+            return
+        if value - reference > max(reference * threshold, minimum):
+            regressions.append(
+                "{}: {:.1f} -> {:.1f} (+{:.0f}%)".format(
+                    label, reference, value, (value / reference - 1) * 100
+                )
+            )
+
+    for phase in ("cold", "warm"):
+        for key in ("editable_ms", "wall_ms"):
+            check(
+                "{} {}".format(phase, key),
+                results[phase].get(key),
+                baseline.get(phase, {}).get(key),
+                MIN_REGRESSION_MS,
+            )
+        check(
+            "{} peak_rss_kb".format(phase),
+            results[phase].get("peak_rss_kb"),
+            baseline.get(phase, {}).get("peak_rss_kb"),
+            MIN_REGRESSION_KB,
+        )
+    for module, value in results["imports_ms"].items():
+        check(
+            "import {}".format(module),
+            value,
+            baseline.get("imports_ms", {}).get(module),
+            MIN_REGRESSION_MS,
+        )
+    return regressions
+
+
+def format_results(results):
+    lines = []
+    for phase in ("cold", "warm"):
+        r = results[phase]
+        lines.append(
+            "{:<5} start: wall {:8.1f} ms  editable {:8.1f} ms  "
+            "(import {:.1f} ms, build {:.1f} ms)  peak RSS {}".format(
+                phase,
+                r["wall_ms"],
+                r["editable_ms"],
+                r["import_ms"],
+                r["build_ms"],
+                "{:.1f} MB".format(r["peak_rss_kb"] / 1024)
+                if r["peak_rss_kb"] is not None
+                else "n/a",
+            )
+        )
+    lines.append("import time (cumulative, warm bytecode cache):")
+    for module, value in results["imports_ms"].items():
+        lines.append(
+            "    {:<24}{}".format(
+                module, "{:8.1f} ms".format(value) if value is not None else "   failed"
+            )
+        )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ex.Co. startup benchmark")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="allowed relative regression (default: %(default)s)",
+    )
+    parser.add_argument("--modules", nargs="*", default=list(IMPORT_MODULES))
+    parser.add_argument("--json", default=None, help="also write the results here")
+    options = parser.parse_args()
+
+    # The runs keep their settings and databases apart from the application's
+    with tempfile.TemporaryDirectory() as data_directory:
+        results = run_suite(options.runs, options.modules, data_directory)
+    print(format_results(results))
+    if options.json:
+        with open(options.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+
+    if options.save_baseline:
+        with open(options.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+        print("Baseline saved to {}".format(options.baseline))
+        return 0
+    if not os.path.isfile(options.baseline):
+        print("No baseline at {}, run with --save-baseline".format(options.baseline))
+        return 0
+    with open(options.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, options.threshold)
+    if regressions:
+        print("Startup regressions (threshold {:.0%}):".format(options.threshold))
+        for regression in regressions:
+            print("    " + regression)
+        return 1
+    print("No startup regressions (threshold {:.0%})".format(options.threshold))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+"""
+纯文本着色性能测试: 在offscreen的Qt平台下用lexers.Text打开一本生成的小说,
+测量打开, 逐页滚动和输入文字的时间以及调用Python着色函数(styleText)的次数,
+比较容器着色(null_lexer = False)和Scintilla的空词法分析器(null_lexer = True).
+每种模式都在新的Python进程中测量.
+
+Usage:
+    python utilities/text_styling_benchmark.py --size-mb 20 --runs 3
+"""
+
+import argparse
+import inspect
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# 工程根目录
+application_directory = os.path.abspath(
+    os.path.join(
+        os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe()))), ".."
+    )
+)
+
+MEASURE_SCRIPT = r"""
+import json, random, sys, time
+sys.path.insert(0, {root!r})
+import qt
+import data
+application = qt.QApplication(sys.argv)
+data.application = application
+import lexers
+
+lexers.Text.null_lexer = {null_lexer!r}
+calls = [0]
+idle_styling_styletext = lexers.Text.styleText
+
+def counted_style_text(self, start, end):
+    calls[0] += 1
+    idle_styling_styletext(self, start, end)
+
+lexers.Text.styleText = counted_style_text
+
+random.seed(1)
+words = ["他们", "走进了", "夜色", "之中", "the", "night", "was", "long", "，", "。"]
+paragraph = "".join(random.choice(words) for _ in range(200))
+text = "\n".join(
+    paragraph for _ in range(int({size_mb} * 1024 * 1024 / len(paragraph.encode("utf-8"))))
+)
+
+editor = qt.QsciScintilla()
+editor.setUtf8(True)
+editor.resize(900, 700)
+editor.show()
+result = {{}}
+
+def phase(name, function):
+    calls[0] = 0
+    start = time.perf_counter()
+    function()
+    application.processEvents()
+    result[name] = {{"ms": (time.perf_counter() - start) * 1000, "callbacks": calls[0]}}
+
+def open_document():
+    editor.setText(text)
+    lexer = lexers.Text(editor)
+    # Like CustomEditor.set_lexer, otherwise Python deletes the lexer
+    lexer.setParent(editor)
+    editor.setLexer(lexer)
+    editor.viewport().repaint()
+
+def scroll():
+    page = editor.SendScintilla(editor.SCI_LINESONSCREEN)
+    for _ in range({pages}):
+        editor.SendScintilla(editor.SCI_LINESCROLL, 0, page)
+        editor.viewport().repaint()
+    editor.SendScintilla(editor.SCI_DOCUMENTEND)
+    editor.viewport().repaint()
+
+def type_text():
+    editor.SendScintilla(editor.SCI_GOTOPOS, len(text.encode("utf-8")) // 2)
+    for i in range({keystrokes}):
+        editor.SendScintilla(editor.SCI_ADDTEXT, 3, "字".encode("utf-8"))
+        if i % 10 == 0:
+            editor.viewport().repaint()
+
+phase("open", open_document)
+phase("scroll", scroll)
+phase("typing", type_text)
+print(json.dumps(result))
+sys.stdout.flush()
+import os
+os._exit(0)
+"""
+
+
+def measure(null_lexer, size_mb, pages, keystrokes):
+    environment = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    script = MEASURE_SCRIPT.format(
+        root=application_directory,
+        null_lexer=null_lexer,
+        size_mb=size_mb,
+        pages=pages,
+        keystrokes=keystrokes,
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=application_directory,
+        env=environment,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Plain text styling benchmark")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--size-mb", type=float, default=20)
+    parser.add_argument("--pages", type=int, default=200, help="pages scrolled")
+    parser.add_argument("--keystrokes", type=int, default=500)
+    options = parser.parse_args()
+
+    for mode, null_lexer in (("container", False), ("null lexer", True)):
+        runs = [
+            measure(null_lexer, options.size_mb, options.pages, options.keystrokes)
+            for _ in range(options.runs)
+        ]
+        print(
+            "  ".join(
+                ["{:<11}".format(mode)]
+                + [
+                    "{} {:8.1f} ms ({} callbacks)".format(
+                        phase,
+                        statistics.median(r[phase]["ms"] for r in runs),
+                        runs[-1][phase]["callbacks"],
+                    )
+                    for phase in ("open", "scroll", "typing")
+                ]
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
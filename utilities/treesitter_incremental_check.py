@@ -0,0 +1,193 @@
+"""
+Tree-sitter增量着色检查: 在offscreen的Qt平台下对文档做随机的编辑 (插入和删除),
+每次编辑后用增量解析和着色的结果和新的词法分析器为同一段文本完整解析着色的结果比较.
+  - 每次编辑后的样式必须和完整着色的样式相同
+  - 最后用 recolor() 请求重新着色整个文档, 也必须和完整着色相同
+有差异时打印差异的位置并以退出码1结束, 可以在CI中使用.
+需要 tree_sitter 模块和 resources/lexers/treesitter_parsers_<平台>.so 解析器库.
+
+Usage:
+    python utilities/treesitter_incremental_check.py
+    python utilities/treesitter_incremental_check.py --file Makefile --edits 500 --seed 3
+"""
+
+import argparse
+import importlib
+import importlib.util
+import inspect
+import os
+import random
+import sys
+
+# 工程根目录
+application_directory = os.path.abspath(
+    os.path.join(
+        os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe()))), ".."
+    )
+)
+
+DEFAULT_FILES = ("lexers/treesitter.py",)
+# Only the start of the files is used, every edit is compared to a full styling
+MAX_CORPUS_BYTES = 8000
+# Inserted text, chosen to open and close strings, comments and blocks
+INSERTIONS = ("x", "(", ")", '"', "'", "#", "\n", " ", "def ", "class ", ":", "1", "é", '"""')
+# Mismatches printed per check
+MAX_REPORTED = 10
+
+
+def lexer_for_file(path):
+    name = os.path.basename(path).lower()
+    if name in ("makefile", "gnumakefile") or name.endswith(".mk"):
+        return "lexers.treesittermake", "TreeSitterMakefile"
+    return "lexers.treesitterpython", "TreeSitterPython"
+
+
+def create_editor(lexer_class, text):
+    """Editor with the lexer, the edits are passed to it like in CustomEditor"""
+    import qt
+
+    editor = qt.QsciScintilla()
+    editor.setUtf8(True)
+    editor.resize(900, 700)
+    editor.show()
+    editor.setText(text)
+    lexer = lexer_class(lexer_class.NAME, lexer_class.TREE_SITTER_LEXER, editor)
+    # Like CustomEditor.set_lexer, otherwise Python deletes the lexer
+    lexer.setParent(editor)
+    editor.SCN_MODIFIED.connect(lexer.text_modified_callback)
+    editor.setLexer(lexer)
+    editor.SendScintilla(editor.SCI_COLOURISE, 0, -1)
+    return editor
+
+
+def document_styles(editor):
+    send = editor.SendScintilla
+    return bytes(
+        send(editor.SCI_GETSTYLEAT, position)
+        for position in range(send(editor.SCI_GETLENGTH))
+    )
+
+
+def compare(title, editor, lexer_class):
+    """Compare the styles with a full styling of the same text, returns True if equal"""
+    fresh = create_editor(lexer_class, editor.text())
+    expected = document_styles(fresh)
+    fresh.close()
+    fresh.deleteLater()
+    actual = document_styles(editor)
+    if expected == actual:
+        return True
+    mismatches = [
+        position
+        for position, (first, second) in enumerate(zip(expected, actual))
+        if first != second
+    ]
+    print("{}: {} bytes differ".format(title, len(mismatches)))
+    data = editor.text().encode("utf-8")
+    for position in mismatches[:MAX_REPORTED]:
+        line = data.count(b"\n", 0, position) + 1
+        print(
+            "    line {}, byte {}: expected style {}, got {}".format(
+                line, position, expected[position], actual[position]
+            )
+        )
+    return False
+
+
+def random_edit(editor, rng):
+    send = editor.SendScintilla
+    length = send(editor.SCI_GETLENGTH)
+    position = rng.randrange(0, length + 1)
+    if position < length:
+        # Move to a character boundary
+        position = send(editor.SCI_POSITIONBEFORE, send(editor.SCI_POSITIONAFTER, position))
+    if length < 10 or rng.random() < 0.6:
+        text = rng.choice(INSERTIONS).encode("utf-8")
+        send(editor.SCI_INSERTTEXT, position, text)
+        return "insert {!r} at {}".format(text, position)
+    end = position
+    for _ in range(rng.randrange(1, 6)):
+        end = send(editor.SCI_POSITIONAFTER, end)
+    send(editor.SCI_DELETERANGE, position, end - position)
+    return "delete {}..{}".format(position, end)
+
+
+def check(module_name, class_name, title, text, edits, seed):
+    lexer_class = getattr(importlib.import_module(module_name), class_name)
+    rng = random.Random(seed)
+    editor = create_editor(lexer_class, text)
+    failures = 0
+    for i in range(edits):
+        description = random_edit(editor, rng)
+        # Style like Scintilla does after an edit
+        editor.SendScintilla(editor.SCI_COLOURISE, 0, -1)
+        if not compare(
+            "{} edit {} ({})".format(title, i + 1, description), editor, lexer_class
+        ):
+            failures += 1
+    # Invalidate the styles from outside and ask for a full restyle
+    send = editor.SendScintilla
+    send(editor.SCI_STARTSTYLING, 0)
+    send(editor.SCI_SETSTYLING, send(editor.SCI_GETLENGTH), 31)
+    editor.recolor()
+    if not compare("{} recolor".format(title), editor, lexer_class):
+        failures += 1
+    print("{}: {} of {} edits differ".format(title, failures, edits))
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tree-sitter incremental styling check")
+    parser.add_argument(
+        "--file",
+        action="append",
+        default=[],
+        help="file to edit, Makefiles use the Makefile lexer, other files Python",
+    )
+    parser.add_argument("--edits", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=1)
+    options = parser.parse_args()
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    sys.path.insert(0, application_directory)
+    import qt
+    import data
+
+    application = qt.QApplication(sys.argv)
+    data.application = application
+
+    if importlib.util.find_spec("tree_sitter") is None:
+        print("The tree_sitter module could not be imported")
+        sys.exit(1)
+    library = os.path.join(
+        data.resources_directory,
+        "lexers/treesitter_parsers_{}.so".format(data.platform.lower()),
+    )
+    if not os.path.isfile(library):
+        print("The tree-sitter parser library '{}' does not exist".format(library))
+        sys.exit(1)
+
+    paths = options.file or [
+        os.path.join(application_directory, path) for path in DEFAULT_FILES
+    ]
+    failures = 0
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()[:MAX_CORPUS_BYTES]
+        module_name, class_name = lexer_for_file(path)
+        failures += check(
+            module_name,
+            class_name,
+            os.path.basename(path),
+            text,
+            options.edits,
+            options.seed,
+        )
+    if failures:
+        print("INCREMENTAL STYLING FAILED")
+        sys.exit(1)
+    print("Incremental styling matches full styling")
+
+
+if __name__ == "__main__":
+    main()
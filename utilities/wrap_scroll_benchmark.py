@@ -0,0 +1,130 @@
+"""
+自动换行滚动性能测试: 在offscreen的Qt平台下打开由很长的段落组成的文档,
+打开自动换行, 逐页滚动并改变窗口大小, 比较关闭和打开换行性能模式时
+每一帧的重绘时间. 每种模式都在新的Python进程中测量.
+
+Usage:
+    python utilities/wrap_scroll_benchmark.py --paragraphs 2000 --length 3000
+"""
+
+import argparse
+import inspect
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# 工程根目录
+application_directory = os.path.abspath(
+    os.path.join(
+        os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe()))), ".."
+    )
+)
+
+MEASURE_SCRIPT = r"""
+import json, random, sys, time
+sys.path.insert(0, {root!r})
+import qt
+import components.wrapperformance
+
+application = qt.QApplication(sys.argv)
+random.seed(1)
+words = ["他们", "走进了", "夜色", "之中", "the", "night", "was", "long", "，", "。"]
+paragraphs = [
+    "".join(random.choice(words) for _ in range({length} // 2))
+    for _ in range({paragraphs})
+]
+editor = qt.QsciScintilla()
+editor.setUtf8(True)
+editor.resize(900, 700)
+editor.show()
+editor.setText("\n".join(paragraphs))
+editor.setWrapMode(qt.QsciScintilla.WrapMode.WrapWord)
+components.wrapperformance.configure(editor, {enabled!r})
+application.processEvents()
+
+def frame():
+    start = time.perf_counter()
+    editor.viewport().repaint()
+    return (time.perf_counter() - start) * 1000
+
+page = editor.SendScintilla(editor.SCI_LINESONSCREEN)
+scroll = []
+# Down and back up, the second pass hits the layout cache
+for lines in [page] * {pages} + [-page] * {pages}:
+    editor.SendScintilla(editor.SCI_LINESCROLL, 0, lines)
+    scroll.append(frame())
+resize = []
+for width in (700, 900, 1100, 900) * 3:
+    start = time.perf_counter()
+    editor.resize(width, 700)
+    application.processEvents()
+    editor.viewport().repaint()
+    resize.append((time.perf_counter() - start) * 1000)
+print(json.dumps({{"scroll": scroll, "resize": resize}}))
+sys.stdout.flush()
+import os
+os._exit(0)
+"""
+
+
+def measure(enabled, paragraphs, length, pages):
+    environment = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    script = MEASURE_SCRIPT.format(
+        root=application_directory,
+        enabled=enabled,
+        paragraphs=paragraphs,
+        length=length,
+        pages=pages,
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=application_directory,
+        env=environment,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Wrapped scrolling benchmark")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--paragraphs", type=int, default=2000)
+    parser.add_argument("--length", type=int, default=3000, help="characters per line")
+    parser.add_argument("--pages", type=int, default=40, help="pages scrolled per pass")
+    options = parser.parse_args()
+
+    results = {}
+    for mode, enabled in (("default", False), ("performance", True)):
+        scroll = []
+        resize = []
+        for _ in range(options.runs):
+            result = measure(enabled, options.paragraphs, options.length, options.pages)
+            scroll.extend(result["scroll"])
+            resize.extend(result["resize"])
+        results[mode] = statistics.median(scroll)
+        print(
+            "{:<12} scroll frame: median {:7.2f} ms  p95 {:7.2f} ms   "
+            "resize: median {:7.2f} ms".format(
+                mode,
+                statistics.median(scroll),
+                percentile(scroll, 0.95),
+                statistics.median(resize),
+            )
+        )
+    if results["performance"] > 0:
+        print(
+            "scroll speedup: {:.2f}x".format(results["default"] / results["performance"])
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,400 @@
+"""
+EPUB/DOCX 与 TXT 互相转换
+导入: 增量解析EPUB XHTML (expat) / DOCX XML (iterparse) 提取文本, 逐行写入UTF-8文本文件
+导出: 按章节索引逐章写入EPUB压缩包, 每次只有一个章节在内存中
+"""
+
+import html
+import html.entities
+import os
+import posixpath
+import tempfile
+import time
+import uuid
+import xml.etree.ElementTree as ElementTree
+import zipfile
+from xml.parsers import expat
+
+from xc_common.chapter_index import ChapterIndex
+
+# 支持导入的文件扩展名
+IMPORT_EXTENSIONS = (".epub", ".docx")
+
+CONTAINER_PATH = "META-INF/container.xml"
+CONTAINER_NAMESPACE = "{urn:oasis:names:tc:opendocument:xmlns:container}"
+OPF_NAMESPACE = "{http://www.idpf.org/2007/opf}"
+WORD_NAMESPACE = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+# XHTML中作为单独一行的块级元素
+XHTML_BLOCK_TAGS = {
+    "p",
+    "div",
+    "li",
+    "h1",
+    "h2",
+    "h3",
+    "h4",
+    "h5",
+    "h6",
+    "blockquote",
+    "pre",
+    "tr",
+    "dt",
+    "dd",
+    "title",
+}
+# 不输出文本的XHTML元素
+XHTML_SKIP_TAGS = {"head", "script", "style"}
+
+
+def _local_name(tag):
+    return tag.rsplit("}", 1)[-1].lower()
+
+
+def is_importable(file_path):
+    """Check if the file is an EPUB/DOCX that has to be converted to text"""
+    return os.path.splitext(file_path)[1].lower() in IMPORT_EXTENSIONS
+
+
+"""
+Import
+"""
+
+
+def _epub_spine(archive):
+    """Return the archive paths of the EPUB content documents in reading order"""
+    with archive.open(CONTAINER_PATH) as container:
+        root = ElementTree.parse(container).getroot()
+    rootfile = root.find(".//{}rootfile".format(CONTAINER_NAMESPACE))
+    opf_path = rootfile.get("full-path")
+    opf_dir = posixpath.dirname(opf_path)
+    with archive.open(opf_path) as opf:
+        package = ElementTree.parse(opf).getroot()
+    manifest = {}
+    for item in package.iter("{}item".format(OPF_NAMESPACE)):
+        manifest[item.get("id")] = item.get("href")
+    spine = []
+    for itemref in package.iter("{}itemref".format(OPF_NAMESPACE)):
+        href = manifest.get(itemref.get("idref"))
+        if href is None:
+            continue
+        href = html.unescape(href).split("#", 1)[0]
+        spine.append(posixpath.normpath(posixpath.join(opf_dir, href)))
+    return spine
+
+
+class _XhtmlTextCollector:
+    """
+    Collects the text of the block elements of a XHTML document in document
+    order from the expat callbacks. The start/data/end callbacks arrive in
+    order, which iterparse does not guarantee for the text of an element.
+    """
+
+    def __init__(self):
+        self.lines = []
+        self.parts = []
+        self.skip_depth = 0
+
+    def flush(self):
+        text = "".join(self.parts)
+        self.parts = []
+        for line in text.split("\n"):
+            line = line.strip()
+            if line:
+                self.lines.append(line)
+
+    def start(self, tag, attributes):
+        name = _local_name(tag)
+        if name in XHTML_SKIP_TAGS:
+            self.skip_depth += 1
+        elif name in XHTML_BLOCK_TAGS:
+            self.flush()
+
+    def end(self, tag):
+        name = _local_name(tag)
+        if name in XHTML_SKIP_TAGS:
+            self.skip_depth -= 1
+        elif name in XHTML_BLOCK_TAGS:
+            self.flush()
+        elif name == "br":
+            self.parts.append("\n")
+
+    def data(self, data):
+        if self.skip_depth == 0:
+            self.parts.append(data)
+
+    def entity(self, name, is_parameter_entity):
+        # XHTML named entities (&nbsp; ...) are not defined without the DTD
+        if not is_parameter_entity:
+            self.data(html.entities.entitydefs.get(name, ""))
+
+
+def _iter_xhtml_lines(stream, chunk_size=64 * 1024):
+    """Yield the text of the block elements of a XHTML document"""
+    collector = _XhtmlTextCollector()
+    parser = expat.ParserCreate(namespace_separator="}")
+    # Report undefined entities instead of failing on them
+    parser.UseForeignDTD(True)
+    parser.StartElementHandler = collector.start
+    parser.EndElementHandler = collector.end
+    parser.CharacterDataHandler = collector.data
+    parser.SkippedEntityHandler = collector.entity
+    while True:
+        chunk = stream.read(chunk_size)
+        parser.Parse(chunk, not chunk)
+        # Hand over the finished lines while parsing
+        if collector.lines:
+            yield from collector.lines
+            collector.lines = []
+        if not chunk:
+            break
+    collector.flush()
+    yield from collector.lines
+
+
+def iter_epub_lines(file_path):
+    """Yield the text lines of an EPUB book in reading order"""
+    with zipfile.ZipFile(file_path) as archive:
+        for content_path in _epub_spine(archive):
+            try:
+                stream = archive.open(content_path)
+            except KeyError:
+                continue
+            with stream:
+                yield from _iter_xhtml_lines(stream)
+
+
+def iter_docx_lines(file_path):
+    """Yield the paragraphs of a DOCX document"""
+    paragraph = WORD_NAMESPACE + "p"
+    text = WORD_NAMESPACE + "t"
+    tab = WORD_NAMESPACE + "tab"
+    breaks = (WORD_NAMESPACE + "br", WORD_NAMESPACE + "cr")
+    with zipfile.ZipFile(file_path) as archive:
+        with archive.open("word/document.xml") as stream:
+            parts = []
+            for event, element in ElementTree.iterparse(stream, events=("end",)):
+                if element.tag == text:
+                    parts.append(element.text or "")
+                elif element.tag == tab:
+                    parts.append("\t")
+                elif element.tag in breaks:
+                    parts.append("\n")
+                elif element.tag == paragraph:
+                    yield from "".join(parts).split("\n")
+                    parts = []
+                    # Free the finished paragraph
+                    element.clear()
+
+
+def iter_book_lines(file_path):
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension == ".epub":
+        return iter_epub_lines(file_path)
+    elif extension == ".docx":
+        return iter_docx_lines(file_path)
+    raise ValueError("Unsupported book format: {}".format(extension))
+
+
+def import_book_to_text(src_file_path, dst_file_path):
+    """
+    Convert an EPUB/DOCX book into a UTF-8 text file with '\\n' line endings.
+    The lines are written as they are parsed, returns dst_file_path.
+    """
+    dst_dir = os.path.dirname(dst_file_path)
+    if dst_dir:
+        os.makedirs(dst_dir, exist_ok=True)
+    handle, temp_path = tempfile.mkstemp(
+        prefix=".{}.".format(os.path.basename(dst_file_path)),
+        suffix=".tmp",
+        dir=dst_dir or None,
+    )
+    try:
+        with os.fdopen(handle, "w", encoding="utf-8", newline="\n") as dst:
+            for line in iter_book_lines(src_file_path):
+                dst.write(line.replace("\r", ""))
+                dst.write("\n")
+        os.replace(temp_path, dst_file_path)
+    except:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return dst_file_path
+
+
+"""
+Export
+"""
+
+EPUB_CONTAINER = """<?xml version="1.0" encoding="UTF-8"?>
+<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">
+  <rootfiles>
+    <rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/>
+  </rootfiles>
+</container>
+"""
+EPUB_CHAPTER_HEAD = """<?xml version="1.0" encoding="utf-8"?>
+<!DOCTYPE html>
+<html xmlns="http://www.w3.org/1999/xhtml" xmlns:epub="http://www.idpf.org/2007/ops">
+<head><meta charset="utf-8"/><title>{0}</title></head>
+<body>
+<h2>{0}</h2>
+"""
+EPUB_CHAPTER_TAIL = "</body>\n</html>\n"
+
+
+def _epub_chapter_name(number):
+    return "chapter_{:05d}.xhtml".format(number)
+
+
+def _write_epub_chapter(archive, source, number, title, start, end, title_line=True):
+    """
+    Write a single chapter entry, the chapter text is streamed line by line.
+    The first line is skipped if it is the chapter title line.
+    """
+    with archive.open("OEBPS/" + _epub_chapter_name(number), "w") as entry:
+        entry.write(EPUB_CHAPTER_HEAD.format(html.escape(title)).encode("utf-8"))
+        source.seek(start)
+        remaining = end - start
+        first_line = True
+        while remaining > 0:
+            line_bytes = source.readline(remaining)
+            if not line_bytes:
+                break
+            remaining -= len(line_bytes)
+            line = line_bytes.decode("utf-8", errors="replace").strip()
+            # The title line is already the heading
+            if first_line and title_line:
+                first_line = False
+                continue
+            first_line = False
+            if line:
+                entry.write("<p>{}</p>\n".format(html.escape(line)).encode("utf-8"))
+        entry.write(EPUB_CHAPTER_TAIL.encode("utf-8"))
+
+
+def _epub_package(title, language, identifier, modified, chapters):
+    manifest = [
+        '<item id="nav" href="nav.xhtml" media-type="application/xhtml+xml" properties="nav"/>'
+    ]
+    spine = []
+    for number, _ in chapters:
+        manifest.append(
+            '<item id="c{0}" href="{1}" media-type="application/xhtml+xml"/>'.format(
+                number, _epub_chapter_name(number)
+            )
+        )
+        spine.append('<itemref idref="c{}"/>'.format(number))
+    return """<?xml version="1.0" encoding="utf-8"?>
+<package xmlns="http://www.idpf.org/2007/opf" version="3.0" unique-identifier="book-id">
+  <metadata xmlns:dc="http://purl.org/dc/elements/1.1/">
+    <dc:identifier id="book-id">{}</dc:identifier>
+    <dc:title>{}</dc:title>
+    <dc:language>{}</dc:language>
+    <meta property="dcterms:modified">{}</meta>
+  </metadata>
+  <manifest>
+    {}
+  </manifest>
+  <spine>
+    {}
+  </spine>
+</package>
+""".format(
+        identifier,
+        html.escape(title),
+        language,
+        modified,
+        "\n    ".join(manifest),
+        "\n    ".join(spine),
+    )
+
+
+def _epub_navigation(title, chapters):
+    items = "\n".join(
+        '<li><a href="{}">{}</a></li>'.format(
+            _epub_chapter_name(number), html.escape(chapter_title)
+        )
+        for number, chapter_title in chapters
+    )
+    return """<?xml version="1.0" encoding="utf-8"?>
+<!DOCTYPE html>
+<html xmlns="http://www.w3.org/1999/xhtml" xmlns:epub="http://www.idpf.org/2007/ops">
+<head><meta charset="utf-8"/><title>{0}</title></head>
+<body>
+<nav epub:type="toc" id="toc"><h1>{0}</h1>
+<ol>
+{1}
+</ol>
+</nav>
+</body>
+</html>
+""".format(
+        html.escape(title), items
+    )
+
+
+def export_epub(src_file_path, dst_file_path, title=None, language="zh", index=None):
+    """
+    Export a UTF-8 book into an EPUB 3 file, one zip entry per chapter of the
+    chapter index. Only one chapter is in memory at a time, returns dst_file_path.
+    """
+    if index is None or index.is_stale():
+        index = ChapterIndex(src_file_path)
+    if title is None:
+        title = os.path.splitext(os.path.basename(src_file_path))[0]
+    dst_dir = os.path.dirname(dst_file_path)
+    if dst_dir:
+        os.makedirs(dst_dir, exist_ok=True)
+    handle, temp_path = tempfile.mkstemp(
+        prefix=".{}.".format(os.path.basename(dst_file_path)),
+        suffix=".tmp",
+        dir=dst_dir or None,
+    )
+    os.close(handle)
+    try:
+        with zipfile.ZipFile(temp_path, "w") as archive, open(
+            src_file_path, "rb"
+        ) as source:
+            # The mimetype has to be the first, uncompressed entry
+            archive.writestr(
+                "mimetype", "application/epub+zip", compress_type=zipfile.ZIP_STORED
+            )
+            archive.writestr(
+                CONTAINER_PATH, EPUB_CONTAINER, compress_type=zipfile.ZIP_DEFLATED
+            )
+            archive.compression = zipfile.ZIP_DEFLATED
+            chapters = []
+            for chapter in index:
+                if chapter.end <= chapter.start:
+                    continue
+                number = len(chapters) + 1
+                # The untitled text before the first chapter gets the book title
+                chapter_title = chapter.title or title
+                _write_epub_chapter(
+                    archive,
+                    source,
+                    number,
+                    chapter_title,
+                    chapter.start,
+                    chapter.end,
+                    title_line=bool(chapter.title),
+                )
+                chapters.append((number, chapter_title))
+            archive.writestr("OEBPS/nav.xhtml", _epub_navigation(title, chapters))
+            archive.writestr(
+                "OEBPS/content.opf",
+                _epub_package(
+                    title,
+                    language,
+                    "urn:uuid:{}".format(uuid.uuid4()),
+                    # EPUB 3 requires the last modification time, in UTC
+                    time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                    chapters,
+                ),
+            )
+        os.replace(temp_path, dst_file_path)
+    except:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return dst_file_path
@@ -0,0 +1,240 @@
+"""
+章节索引: 记录UTF-8书籍文件中每个章节的字节偏移和行号,
+按章节读取/写回文本时不需要把整本书读入内存
+"""
+
+import bisect
+import io
+import os
+import re
+import tempfile
+
+# 章节标题: 第X章/节/回/卷/集/部/篇, 序章/楔子/尾声/番外, Chapter N
+CHAPTER_TITLE_PATTERN = re.compile(
+    r"^[ \t　]*(第[0-9０-９零〇一二三四五六七八九十百千万两]+[章节回卷集部篇]"
+    r"|序章|楔子|尾声|番外|chapter\s*\d+)",
+    re.IGNORECASE,
+)
+# 卷标题, 按卷导出时用来分组
+VOLUME_TITLE_PATTERN = re.compile(
+    r"^[ \t　]*第[0-9０-９零〇一二三四五六七八九十百千万两]+[卷集部]"
+)
+# 超过这个字节长度的行不可能是标题, 不需要解码
+MAX_TITLE_BYTES = 200
+# 流式复制的块大小
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+class Chapter:
+    """
+    一个章节在文件中的位置
+    start/end: 字节偏移 [start, end)
+    line: 章节第一行的行号(从0开始)
+    line_count: 章节的行数
+    """
+
+    def __init__(self, title, start, line, is_volume=False):
+        self.title = title
+        self.start = start
+        self.end = start
+        self.line = line
+        self.line_count = 0
+        self.is_volume = is_volume
+
+    def __repr__(self):
+        return "<Chapter '{}' bytes:{}-{} line:{}>".format(
+            self.title, self.start, self.end, self.line
+        )
+
+
+def match_title(line_bytes):
+    """Return the decoded title if the line is a chapter title, otherwise None"""
+    if len(line_bytes) > MAX_TITLE_BYTES:
+        return None
+    try:
+        line = line_bytes.decode("utf-8")
+    except UnicodeDecodeError:
+        return None
+    if CHAPTER_TITLE_PATTERN.match(line) is None:
+        return None
+    return line.strip()
+
+
+def index_lines(byte_lines, base_offset=0, base_line=0):
+    """
+    Build the chapter list from an iterable of byte lines (a binary file object
+    or io.BytesIO). Text before the first title becomes a chapter without a title.
+    """
+    chapters = []
+    offset = base_offset
+    line_number = base_line
+    current = None
+    for line_bytes in byte_lines:
+        title = match_title(line_bytes)
+        if title is not None or current is None:
+            if current is not None:
+                current.end = offset
+                current.line_count = line_number - current.line
+            current = Chapter(
+                title if title is not None else "",
+                offset,
+                line_number,
+                is_volume=(
+                    title is not None and VOLUME_TITLE_PATTERN.match(title) is not None
+                ),
+            )
+            chapters.append(current)
+        offset += len(line_bytes)
+        if line_bytes.endswith(b"\n"):
+            line_number += 1
+    if current is not None:
+        current.end = offset
+        current.line_count = line_number - current.line
+        # The last line has no newline character
+        if offset > current.start and not line_bytes.endswith(b"\n"):
+            current.line_count += 1
+    return chapters
+
+
+def copy_range(source, destination, start, length, chunk_size=COPY_CHUNK_SIZE):
+    """Stream a byte range from one binary file object into another"""
+    source.seek(start)
+    while length > 0:
+        chunk = source.read(min(chunk_size, length))
+        if not chunk:
+            break
+        destination.write(chunk)
+        length -= len(chunk)
+
+
+class ChapterIndex:
+    """
+    Offset index of the chapters in a UTF-8 text file.
+    The file is read line by line, so building the index
+    never holds the whole book in memory.
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.chapters = []
+        self.size = 0
+        self.mtime = None
+        self.rebuild()
+
+    def __len__(self):
+        return len(self.chapters)
+
+    def __iter__(self):
+        return iter(self.chapters)
+
+    def __getitem__(self, index):
+        return self.chapters[index]
+
+    def rebuild(self):
+        """Re-scan the whole file"""
+        with open(self.file_path, "rb") as file:
+            self.chapters = index_lines(file)
+        if not self.chapters:
+            self.chapters = [Chapter("", 0, 0)]
+        self.__update_file_status()
+
+    def __update_file_status(self):
+        file_stat = os.stat(self.file_path)
+        self.size = file_stat.st_size
+        self.mtime = file_stat.st_mtime_ns
+
+    def is_stale(self):
+        """Check if the file was changed outside of the index"""
+        try:
+            file_stat = os.stat(self.file_path)
+        except OSError:
+            return True
+        return file_stat.st_size != self.size or file_stat.st_mtime_ns != self.mtime
+
+    def chapter_at_line(self, line):
+        """Return the index of the chapter that contains the line"""
+        lines = [c.line for c in self.chapters]
+        return max(bisect.bisect_right(lines, line) - 1, 0)
+
+    def chapter_at_offset(self, offset):
+        """Return the index of the chapter that contains the byte offset"""
+        starts = [c.start for c in self.chapters]
+        return max(bisect.bisect_right(starts, offset) - 1, 0)
+
+    def read_bytes(self, first, last=None):
+        """Read the bytes of the chapters from first to last (inclusive)"""
+        if last is None:
+            last = first
+        start = self.chapters[first].start
+        end = self.chapters[last].end
+        with open(self.file_path, "rb") as file:
+            file.seek(start)
+            return file.read(end - start)
+
+    def read_text(self, first, last=None):
+        """Read the text of the chapters from first to last (inclusive)"""
+        return self.read_bytes(first, last).decode("utf-8", errors="replace")
+
+    def volumes(self):
+        """
+        Group the chapter indexes by volume titles.
+        Returns a list of (volume-chapter-index or None, [chapter-indexes]).
+        """
+        groups = []
+        for i, chapter in enumerate(self.chapters):
+            if chapter.is_volume or not groups:
+                groups.append((i if chapter.is_volume else None, []))
+            groups[-1][1].append(i)
+        return groups
+
+    def splice(self, first, last, new_bytes):
+        """
+        Replace the bytes of the chapters from first to last (inclusive)
+        in the backing file with new_bytes. The file is rewritten through a
+        temporary file and an atomic rename, only the new bytes are re-indexed
+        and the following chapters are shifted. Empty new_bytes remove the chapters.
+        """
+        start = self.chapters[first].start
+        end = self.chapters[last].end
+        first_line = self.chapters[first].line
+        old_line_count = sum(c.line_count for c in self.chapters[first: last + 1])
+        # Keep the next chapter title at the start of its own line
+        if (
+            new_bytes
+            and last < len(self.chapters) - 1
+            and not new_bytes.endswith(b"\n")
+        ):
+            new_bytes += b"\n"
+        directory = os.path.dirname(self.file_path)
+        handle, temp_path = tempfile.mkstemp(
+            prefix=".{}.".format(os.path.basename(self.file_path)),
+            suffix=".tmp",
+            dir=directory or None,
+        )
+        try:
+            with os.fdopen(handle, "wb") as destination, open(
+                self.file_path, "rb"
+            ) as source:
+                copy_range(source, destination, 0, start)
+                destination.write(new_bytes)
+                copy_range(source, destination, end, self.size - end)
+                destination.flush()
+                os.fsync(destination.fileno())
+            os.replace(temp_path, self.file_path)
+        except:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        new_chapters = index_lines(io.BytesIO(new_bytes), start, first_line)
+        # Shift the chapters after the spliced range
+        byte_delta = len(new_bytes) - (end - start)
+        line_delta = sum(c.line_count for c in new_chapters) - old_line_count
+        for chapter in self.chapters[last + 1:]:
+            chapter.start += byte_delta
+            chapter.end += byte_delta
+            chapter.line += line_delta
+        self.chapters[first: last + 1] = new_chapters
+        if not self.chapters:
+            self.chapters = [Chapter("", 0, 0)]
+        self.__update_file_status()
+        return len(new_chapters)
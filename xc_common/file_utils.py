@@ -1,8 +1,11 @@
+import codecs
 import os
 import functions
 from pathlib import Path
 import shutil
+import tempfile
 import chardet
+from xc_common.book_convert import import_book_to_text, is_importable
 from datetime import datetime
 # from charset_normalizer import from_bytes
 # from charset_normalizer import detect
@@ -33,6 +36,10 @@ def copy_file_and_save_utf(platform, src_file_path, dst_dir):
     """复制需要打开的文件，并按utf-8编码统一保存"""
 
     file_name = os.path.basename(src_file_path)
+    # EPUB/DOCX 先转换为文本文件
+    is_book = is_importable(src_file_path)
+    if is_book:
+        file_name = os.path.splitext(file_name)[0] + ".txt"
     dst_dir_path = os.path.join(dst_dir, file_name)
 
     # Replace back-slashes to forward-slashes on Windows
@@ -58,6 +65,10 @@ def copy_file_and_save_utf(platform, src_file_path, dst_dir):
         # 重命名原文件
         dst_path.rename(new_dst_path)
 
+    if is_book:
+        import_book_to_text(src_file_path, dst_dir_path)
+        return dst_dir_path
+
     shutil.copy2(src_file_path, dst_dir_path)
 
     save_as_utf(dst_dir_path)
@@ -120,3 +131,49 @@ def save_as_utf(file_with_path, encoding='utf-8'):
     except Exception as ex:
         # Catch any other potential errors and print a message
         raise Exception(f"无法识别的编码: encoding={encoding}, {str(ex)}")
+
+
+def is_utf8_file(file_path, chunk_size=1024 * 1024):
+    """
+    按块检查文件是否是有效的UTF-8编码, 不把整个文件读入内存
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    try:
+        with open(file_path, "rb") as f:
+            while True:
+                chunk = f.read(chunk_size)
+                decoder.decode(chunk, final=not chunk)
+                if not chunk:
+                    return True
+    except UnicodeDecodeError:
+        return False
+
+
+def copy_file_reencoded(src_file_path, dst_file_path, encoding="utf-8", line_ending=None, chunk_size=1024 * 1024):
+    """
+    流式复制UTF-8文件并转换编码/换行符, 不把整个文件读入内存
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    encoder = codecs.getincrementalencoder(encoding)(errors="replace")
+    dst_dir = os.path.dirname(dst_file_path)
+    if dst_dir:
+        os.makedirs(dst_dir, exist_ok=True)
+    handle, temp_path = tempfile.mkstemp(
+        prefix=".{}.".format(os.path.basename(dst_file_path)), suffix=".tmp", dir=dst_dir or None
+    )
+    try:
+        with open(src_file_path, "rb") as src, os.fdopen(handle, "wb") as dst:
+            while True:
+                chunk = src.read(chunk_size)
+                text = decoder.decode(chunk, final=not chunk)
+                if line_ending is not None and line_ending != "\n":
+                    text = text.replace("\n", line_ending)
+                dst.write(encoder.encode(text, final=not chunk))
+                if not chunk:
+                    break
+        os.replace(temp_path, dst_file_path)
+    except:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return dst_file_path
@@ -0,0 +1,122 @@
+"""
+分章导出: 按章节索引把书籍拆分成每章/每卷一个文件,
+每个文件直接从保存的UTF-8文件按字节范围流式复制, 不把整本书读入内存
+"""
+
+import codecs
+import concurrent.futures
+import os
+import re
+
+from xc_common.chapter_index import COPY_CHUNK_SIZE, ChapterIndex, copy_range
+
+# 文件名中不允许的字符
+INVALID_FILE_NAME_CHARACTERS = re.compile(r'[\\/:*?"<>|\r\n\t]')
+# 标题在文件名中的最大长度
+MAX_FILE_NAME_TITLE_LENGTH = 60
+# 没有标题的章节(第一个标题之前的文本)使用的名称
+UNTITLED_CHAPTER_NAME = "前言"
+
+
+def make_export_file_name(number, title, width, extension=".txt"):
+    """Numbered, file system safe file name for an exported chapter/volume"""
+    title = INVALID_FILE_NAME_CHARACTERS.sub("_", title).strip(" .")
+    title = title[:MAX_FILE_NAME_TITLE_LENGTH] or UNTITLED_CHAPTER_NAME
+    return "{:0{}d}_{}{}".format(number, width, title, extension)
+
+
+def copy_range_reencoded(
+    source,
+    destination,
+    start,
+    length,
+    encoding="utf-8",
+    line_ending=None,
+    chunk_size=COPY_CHUNK_SIZE,
+):
+    """
+    Stream a UTF-8 byte range from one binary file object into another,
+    converting the encoding and line endings on the fly
+    """
+    if encoding.replace("_", "-").lower() in ("utf-8", "utf8") and line_ending in (
+        None,
+        "\n",
+    ):
+        copy_range(source, destination, start, length, chunk_size)
+        return
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    encoder = codecs.getincrementalencoder(encoding)(errors="replace")
+    source.seek(start)
+    while True:
+        chunk = source.read(min(chunk_size, length)) if length > 0 else b""
+        length -= len(chunk)
+        text = decoder.decode(chunk, final=not chunk)
+        if line_ending is not None and line_ending != "\n":
+            text = text.replace("\n", line_ending)
+        destination.write(encoder.encode(text, final=not chunk))
+        if not chunk:
+            break
+
+
+def split_export_jobs(index, by_volume=False):
+    """
+    Group the chapters of the index into export jobs.
+    Returns a list of (title, start, end) byte ranges, the chapters of a volume
+    are always consecutive in the file, so a volume is a single range.
+    """
+    jobs = []
+    if by_volume:
+        for volume, chapter_indexes in index.volumes():
+            first = index[chapter_indexes[0]]
+            last = index[chapter_indexes[-1]]
+            title = index[volume].title if volume is not None else ""
+            jobs.append((title, first.start, last.end))
+    else:
+        for chapter in index:
+            jobs.append((chapter.title, chapter.start, chapter.end))
+    # Skip the empty text before the first title
+    return [j for j in jobs if j[2] > j[1]]
+
+
+def _export_range(job):
+    src_file_path, dst_file_path, start, end, encoding, line_ending = job
+    with open(src_file_path, "rb") as source, open(dst_file_path, "wb") as destination:
+        copy_range_reencoded(
+            source, destination, start, end - start, encoding, line_ending
+        )
+    return dst_file_path
+
+
+def export_split_book(
+    src_file_path,
+    dst_dir,
+    by_volume=False,
+    encoding="utf-8",
+    line_ending=None,
+    index=None,
+    max_workers=None,
+):
+    """
+    Export a UTF-8 book into one numbered file per chapter (or per volume)
+    in dst_dir. An up-to-date ChapterIndex of the file can be passed in,
+    otherwise the file is indexed first. The files are written in parallel
+    with a thread pool, file IO and the codecs release the GIL.
+    Returns the list of the written files in chapter order.
+    """
+    if index is None or index.is_stale():
+        index = ChapterIndex(src_file_path)
+    jobs = split_export_jobs(index, by_volume)
+    os.makedirs(dst_dir, exist_ok=True)
+    width = max(len(str(len(jobs))), 3)
+    export_jobs = []
+    for number, (title, start, end) in enumerate(jobs, start=1):
+        dst_file_path = os.path.join(
+            dst_dir, make_export_file_name(number, title, width)
+        ).replace("\\", "/")
+        export_jobs.append(
+            (src_file_path, dst_file_path, start, end, encoding, line_ending)
+        )
+    if max_workers is None:
+        max_workers = min(8, (os.cpu_count() or 1) + 4)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(_export_range, export_jobs))
@@ -1,6 +1,183 @@
 # http post 获取get 请求
-import requests
+import collections
 import json
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+"""
+共享HTTP客户端: 复用连接(keep-alive), 幂等请求有限次重试,
+gzip压缩, 按接口统计延迟和错误次数
+"""
+
+# 连接池
+HTTP_POOL_CONNECTIONS = 4
+HTTP_POOL_MAXSIZE = 16
+# 幂等请求的重试次数和退避时间(秒): backoff * 2^(n-1)
+HTTP_MAX_RETRIES = 3
+HTTP_BACKOFF_FACTOR = 0.3
+# 需要重试的服务器状态码
+HTTP_RETRY_STATUS_CODES = (429, 502, 503, 504)
+HTTP_IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+# 每个接口保留的最近延迟样本数
+HTTP_LATENCY_SAMPLES = 512
+
+
+class EndpointStats:
+    """延迟和错误计数"""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.last_error = None
+        self.latencies = collections.deque(maxlen=HTTP_LATENCY_SAMPLES)
+
+    def snapshot(self):
+        latencies = sorted(self.latencies)
+
+        def percentile(p):
+            if not latencies:
+                return 0.0
+            return latencies[min(int(len(latencies) * p), len(latencies) - 1)]
+
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "retries": self.retries,
+            "avg_ms": (self.total_time / self.requests * 1000) if self.requests else 0.0,
+            "p50_ms": percentile(0.50) * 1000,
+            "p99_ms": percentile(0.99) * 1000,
+            "max_ms": self.max_time * 1000,
+            "last_error": self.last_error,
+        }
+
+
+class HttpClient:
+    """
+    requests.Session的封装, 所有服务共用一个实例(get_http_client),
+    同一个主机的请求复用连接池中的连接
+    """
+
+    def __init__(
+        self,
+        pool_connections=HTTP_POOL_CONNECTIONS,
+        pool_maxsize=HTTP_POOL_MAXSIZE,
+        max_retries=HTTP_MAX_RETRIES,
+        backoff_factor=HTTP_BACKOFF_FACTOR,
+    ):
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=0
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Accept-Encoding": "gzip, deflate"})
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def endpoint(url):
+        return urlsplit(url).path or url
+
+    def _record(self, url, elapsed, error=None, retried=False):
+        with self._lock:
+            stats = self._stats.get(self.endpoint(url))
+            if stats is None:
+                stats = self._stats[self.endpoint(url)] = EndpointStats()
+            if retried:
+                stats.retries += 1
+                return
+            stats.requests += 1
+            stats.total_time += elapsed
+            stats.max_time = max(stats.max_time, elapsed)
+            stats.latencies.append(elapsed)
+            if error is not None:
+                stats.errors += 1
+                stats.last_error = error
+
+    def request(self, method, url, idempotent=None, **kwargs):
+        """
+        Send a request through the pooled session.
+        Idempotent requests (GET/HEAD/... or idempotent=True) are retried with
+        exponential backoff on connection errors, timeouts and 429/5xx responses.
+        Raises requests.exceptions.RequestException on failure.
+        """
+        method = method.upper()
+        if idempotent is None:
+            idempotent = method in HTTP_IDEMPOTENT_METHODS
+        attempts = (self.max_retries if idempotent else 0) + 1
+        start = time.perf_counter()
+        for attempt in range(attempts):
+            last_attempt = attempt == attempts - 1
+            try:
+                response = self.session.request(method, url, **kwargs)
+                if not last_attempt and response.status_code in HTTP_RETRY_STATUS_CODES:
+                    response.close()
+                    raise requests.exceptions.RetryError(
+                        "HTTP {}".format(response.status_code)
+                    )
+                response.raise_for_status()
+                self._record(url, time.perf_counter() - start)
+                return response
+            except (
+                requests.exceptions.ConnectionError,
+                requests.exceptions.Timeout,
+                requests.exceptions.RetryError,
+            ) as ex:
+                if last_attempt:
+                    self._record(url, time.perf_counter() - start, str(ex))
+                    raise
+                self._record(url, 0.0, retried=True)
+                time.sleep(self.backoff_factor * (2**attempt))
+            except requests.exceptions.RequestException as ex:
+                self._record(url, time.perf_counter() - start, str(ex))
+                raise
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def stats(self):
+        """Per-endpoint latency/error counters"""
+        with self._lock:
+            return {k: v.snapshot() for k, v in self._stats.items()}
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = {}
+
+    def close(self):
+        self.session.close()
+
+
+_http_client = None
+_http_client_lock = threading.Lock()
+
+
+def get_http_client():
+    """Return the shared HttpClient instance"""
+    global _http_client
+    if _http_client is None:
+        with _http_client_lock:
+            if _http_client is None:
+                _http_client = HttpClient()
+    return _http_client
+
+
+def http_stats():
+    """Per-endpoint latency/error counters of the shared HttpClient"""
+    return get_http_client().stats()
 
 
 # HTTP 请求相关工具函数
@@ -19,13 +196,12 @@ def http_get(url, headers=None, params=None, timeout=60):
         字典格式的响应数据，如果请求失败则返回None
     """
     try:
-        response = requests.get(
+        response = get_http_client().get(
             url,
             headers=headers,
             params=params,
             timeout=timeout
         )
-        response.raise_for_status()  # 如果状态码不是200，抛出异常
         return response.json()
     except requests.exceptions.RequestException as e:
         print(f"HTTP GET 请求失败: {url}, 错误: {str(e)}")
@@ -35,7 +211,7 @@ def http_get(url, headers=None, params=None, timeout=60):
         return None
 
 
-def http_post(url, data=None, json_data=None, headers=None, timeout=60):
+def http_post(url, data=None, json_data=None, headers=None, timeout=60, idempotent=False):
     """
     发送HTTP POST请求
 
@@ -45,19 +221,20 @@ def http_post(url, data=None, json_data=None, headers=None, timeout=60):
         json_data: JSON数据（字典）
         headers: 请求头字典
         timeout: 请求超时时间（秒）
+        idempotent: 只读接口可以设为True, 失败时自动重试
 
     Returns:
         字典格式的响应数据，如果请求失败则返回None
     """
     try:
-        response = requests.post(
+        response = get_http_client().post(
             url,
             data=data,
             json=json_data,
             headers=headers,
-            timeout=timeout
+            timeout=timeout,
+            idempotent=idempotent
         )
-        response.raise_for_status()  # 如果状态码不是200，抛出异常
         return response.json()
     except requests.exceptions.RequestException as e:
         print(f"HTTP POST 请求失败: {url}, 错误: {str(e)}")
@@ -68,7 +245,7 @@ def http_post(url, data=None, json_data=None, headers=None, timeout=60):
 
 
 # 添加专门的表单请求函数
-def http_form_post(url, form_data, headers=None, timeout=60):
+def http_form_post(url, form_data, headers=None, timeout=60, idempotent=False):
     """
     专门用于发送表单请求的函数
 
@@ -77,6 +254,7 @@ def http_form_post(url, form_data, headers=None, timeout=60):
         form_data: 表单数据（字典）
         headers: 额外的请求头字典
         timeout: 请求超时时间（秒）
+        idempotent: 只读接口可以设为True, 失败时自动重试
 
     Returns:
         字典格式的响应数据，如果请求失败则返回None
@@ -98,16 +276,14 @@ def http_form_post(url, form_data, headers=None, timeout=60):
         request_headers['Content-Type'] = 'application/x-www-form-urlencoded'
 
         # 发送请求
-        response = requests.post(
+        response = get_http_client().post(
             url,
             data=form_data,
             headers=request_headers,
-            timeout=timeout
+            timeout=timeout,
+            idempotent=idempotent
         )
 
-        # 检查响应状态码
-        response.raise_for_status()
-
         # 尝试解析JSON响应
         try:
             return response.json()
@@ -10,7 +10,7 @@ import os
 import qt
 import data
 import settings
-from xc_service.account_service import AccountService
+from xc_service.async_service import AsyncAccountService
 
 
 class LoginWindow(qt.QDialog):
@@ -19,6 +19,8 @@ class LoginWindow(qt.QDialog):
     """
     # Signals
     login_successful = qt.pyqtSignal()
+    # Login request that is still running in the service thread pool
+    login_call = None
 
     def __init__(self, parent=None):
         """
@@ -250,29 +252,28 @@ class LoginWindow(qt.QDialog):
             self.show_error("请输入账号密码......")
             return
 
-        try:
-            # 禁用所有交互控件，防止重复提交
-            self.login_button.setEnabled(False)
-            self.cancel_button.setEnabled(False)
-            self.username_edit.setEnabled(False)
-            self.password_edit.setEnabled(False)
-            self.remember_checkbox.setEnabled(False)
-
-            # 更改登录按钮文本
-            original_button_text = self.login_button.text()
-            self.login_button.setText("登录中...")
-
-            # 强制刷新UI，确保用户看到状态变化
-            qt.QApplication.processEvents()
-
-            # 显示遮罩层和进度条
-            self.show_loading_mask()
+        # 登录请求已经在进行中
+        if self.login_call is not None:
+            return
 
-            # 使用AccountService进行登录
-            success, message = AccountService().login(username, password)
+        # 禁用所有交互控件，防止重复提交
+        self.set_inputs_enabled(False)
+        # 更改登录按钮文本
+        self.login_button_text = self.login_button.text()
+        self.login_button.setText("登录中...")
+        # 显示遮罩层和进度条
+        self.show_loading_mask()
+
+        # 使用AccountService在后台线程登录, UI线程不等待网络请求
+        remember = self.remember_checkbox.isChecked()
+
+        def login_finished(result):
+            self.login_call = None
+            self.restore_inputs()
+            success, message = result
             if success:
                 # 如果勾选了记住账号密码，则保存；否则清除已保存的凭据
-                if self.remember_checkbox.isChecked():
+                if remember:
                     self.save_credentials(username, password)
                 else:
                     self.clear_saved_credentials()
@@ -282,20 +283,42 @@ class LoginWindow(qt.QDialog):
             else:
                 # 登录失败，显示错误信息
                 self.show_error("登录失败，请重试")
-        except Exception as e:
-            # 处理异常
-            self.show_error(f"登录过程中发生错误: {str(e)}")
-        finally:
-            # 恢复控件状态
-            self.login_button.setEnabled(True)
-            self.cancel_button.setEnabled(True)
-            self.username_edit.setEnabled(True)
-            self.password_edit.setEnabled(True)
-            self.remember_checkbox.setEnabled(True)
-            self.login_button.setText(original_button_text)
-
-            # 隐藏遮罩层
-            self.hide_loading_mask()
+
+        def login_failed(error):
+            self.login_call = None
+            self.restore_inputs()
+            self.show_error(f"登录过程中发生错误: {error}")
+
+        self.login_call = AsyncAccountService().login(username, password)
+        self.login_call.on_finished(login_finished)
+        self.login_call.on_failed(login_failed)
+
+    def set_inputs_enabled(self, enabled):
+        self.login_button.setEnabled(enabled)
+        self.username_edit.setEnabled(enabled)
+        self.password_edit.setEnabled(enabled)
+        self.remember_checkbox.setEnabled(enabled)
+
+    def restore_inputs(self):
+        """恢复控件状态"""
+        self.set_inputs_enabled(True)
+        self.login_button.setText(self.login_button_text)
+        # 隐藏遮罩层
+        self.hide_loading_mask()
+
+    def cancel_login(self):
+        """取消还在进行中的登录请求"""
+        if self.login_call is not None:
+            self.login_call.cancel()
+            self.login_call = None
+
+    def reject(self):
+        self.cancel_login()
+        super().reject()
+
+    def closeEvent(self, event):
+        self.cancel_login()
+        super().closeEvent(event)
 
     def clear_saved_credentials(self):
         """
@@ -1,4 +1,4 @@
-from xc_common.utils import http_post, http_form_post
+from xc_common.utils import http_form_post
 from xc_entity.account import user_info
 import settings
 
@@ -52,7 +52,7 @@ class AccountService:
                 return True, None
             else:
                 # 登录失败，返回错误信息
-                error_message = response.get("message", "登录失败，请检查用户名和密码")
+                error_message = (response or {}).get("message", "登录失败，请检查用户名和密码")
                 return False, error_message
         except Exception as e:
             # 处理其他异常
@@ -0,0 +1,186 @@
+"""
+非阻塞服务调用: 在QThreadPool中执行AccountService/BookService的网络请求,
+结果通过Qt信号回到UI线程. 相同的请求在完成之前只执行一次,
+窗口关闭时取消还没有返回的请求
+"""
+
+import threading
+
+import qt
+from xc_service.account_service import AccountService
+from xc_service.book_service import BookService
+
+# 服务调用的线程数
+SERVICE_THREAD_COUNT = 4
+
+
+class ServiceCall(qt.QObject):
+    """
+    Handle of a service call running in the thread pool.
+    Connect to 'finished' for the return value of the service method and
+    to 'failed' for the error message. A cancelled call emits nothing.
+    """
+
+    finished = qt.pyqtSignal(object)
+    failed = qt.pyqtSignal(str)
+
+    def __init__(self, key):
+        super().__init__()
+        self.key = key
+        self.done = False
+        self.cancelled = False
+        self.result = None
+        self.error = None
+        # Guards 'done' against callbacks connected while the call finishes
+        self._lock = threading.Lock()
+
+    def cancel(self):
+        self.cancelled = True
+
+    def on_finished(self, function):
+        """Connect a callback, it is called immediately if the call is already done"""
+        with self._lock:
+            if not self.done:
+                self.finished.connect(function)
+                return self
+        if not self.cancelled and self.error is None:
+            function(self.result)
+        return self
+
+    def on_failed(self, function):
+        with self._lock:
+            if not self.done:
+                self.failed.connect(function)
+                return self
+        if not self.cancelled and self.error is not None:
+            function(self.error)
+        return self
+
+
+class _ServiceRunnable(qt.QRunnable):
+    def __init__(self, executor, call, function, args, kwargs):
+        super().__init__()
+        self.executor = executor
+        self.call = call
+        self.function = function
+        self.args = args
+        self.kwargs = kwargs
+
+    def run(self):
+        call = self.call
+        try:
+            if call.cancelled:
+                return
+            try:
+                call.result = self.function(*self.args, **self.kwargs)
+            except Exception as ex:
+                call.error = str(ex)
+        finally:
+            self.executor._remove(call)
+            with call._lock:
+                call.done = True
+        # The signals are queued to the UI thread that owns the call object
+        if call.cancelled:
+            return
+        if call.error is None:
+            call.finished.emit(call.result)
+        else:
+            call.failed.emit(call.error)
+
+
+class ServiceExecutor:
+    """
+    Runs service functions in a dedicated QThreadPool.
+    Calls with the same key that are still in flight are merged into one call.
+    """
+
+    def __init__(self, thread_count=SERVICE_THREAD_COUNT):
+        self.pool = qt.QThreadPool()
+        self.pool.setMaxThreadCount(thread_count)
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key, function, *args, **kwargs):
+        with self._lock:
+            call = self._in_flight.get(key) if key is not None else None
+            if call is not None and not call.cancelled:
+                return call
+            call = ServiceCall(key)
+            if key is not None:
+                self._in_flight[key] = call
+        self.pool.start(_ServiceRunnable(self, call, function, args, kwargs))
+        return call
+
+    def _remove(self, call):
+        with self._lock:
+            if self._in_flight.get(call.key) is call:
+                del self._in_flight[call.key]
+
+    def in_flight(self):
+        with self._lock:
+            return list(self._in_flight.values())
+
+    def cancel(self, key):
+        with self._lock:
+            call = self._in_flight.pop(key, None)
+        if call is not None:
+            call.cancel()
+
+    def cancel_all(self):
+        """Cancel all calls, the queued ones never start"""
+        self.pool.clear()
+        with self._lock:
+            calls = list(self._in_flight.values())
+            self._in_flight = {}
+        for call in calls:
+            call.cancel()
+
+    def shutdown(self, wait_msecs=2000):
+        self.cancel_all()
+        return self.pool.waitForDone(wait_msecs)
+
+
+_service_executor = None
+
+
+def get_service_executor():
+    """Return the shared ServiceExecutor, has to be first called from the UI thread"""
+    global _service_executor
+    if _service_executor is None:
+        _service_executor = ServiceExecutor()
+    return _service_executor
+
+
+class AsyncAccountService:
+    """AccountService methods that return a ServiceCall instead of blocking"""
+
+    def __init__(self, executor=None):
+        self.executor = executor or get_service_executor()
+        self.service = AccountService()
+
+    def login(self, username, password):
+        return self.executor.submit(
+            ("login", username, password), self.service.login, username, password
+        )
+
+
+class AsyncBookService:
+    """
+    BookService methods that return a ServiceCall instead of blocking.
+    Replace records are saved with replace_record_store.queue_replace_record,
+    which keeps them while the API is not reachable.
+    """
+
+    def __init__(self, executor=None):
+        self.executor = executor or get_service_executor()
+        self.service = BookService()
+
+    def replace_record_list(self, form_data, **kwargs):
+        key = (
+            "content_replace_list",
+            form_data.get("cp_book_id"),
+            form_data.get("book_title"),
+        )
+        return self.executor.submit(
+            key, self.service.replace_record_list, dict(form_data), **kwargs
+        )
@@ -1,7 +1,26 @@
-from xc_common.utils import http_form_post
+import time
+
+from xc_common.utils import http_form_post, get_http_client
 from xc_entity.account import user_info
+from xc_service.replace_record_cache import (
+    REPLACE_RECORD_CACHE_TTL,
+    CacheEntry,
+    get_replace_record_cache,
+)
 import settings
 
+# 替换词记录中使用的字段
+REPLACE_RECORD_FIELDS = ("id", "cp_book_id", "account_id", "book_title", "old_text", "new_text")
+
+
+def extract_replace_records(response):
+    """从响应的body列表中提取替换词记录"""
+    body = response.get("body")
+    if not isinstance(body, list):
+        return []
+    return [{field: item.get(field) for field in REPLACE_RECORD_FIELDS} for item in body]
+
+
 class BookService:
     # 加入初始化方法
     def __init__(self):
@@ -15,64 +34,88 @@ class BookService:
 
     # 保存替换词记录
     # 保存替换词记录
-    def save_replace_record(self, form_data):
+    def save_replace_record(self, form_data, idempotency_key=None):
         """
         保存替换词记
         :param :form_data 包含的key: book_title,old_text,new_text,cp_book_id
+        :param :idempotency_key 记录的幂等键, 重复发送同一条记录时服务器不会重复保存
         :return:
         """
-        account_id = user_info.user_id()
-        form_data["account_id"] = account_id
+        if not form_data.get("account_id"):
+            form_data["account_id"] = user_info.user_id
+        headers = None
+        if idempotency_key:
+            form_data["idempotency_key"] = idempotency_key
+            headers = {"Idempotency-Key": idempotency_key}
         # 发送请求
-        response = http_form_post(self.api_replace_add, form_data=form_data)
+        response = http_form_post(
+            self.api_replace_add, form_data=form_data, headers=headers
+        )
         # 检查响应
         if response and "code" in response and response["code"] == 0:
-            # 解析数据
-            result_list = []
-            # 检查是否有body字段且是列表
-            if "body" in response and isinstance(response["body"], list):
-                # 遍历body中的每个元素
-                for item in response["body"]:
-                    # 提取所需字段，创建新的字典对象
-                    extracted_item = {
-                        "id": item.get("id"),
-                        "cp_book_id": item.get("cp_book_id"),
-                        "account_id": item.get("account_id"),
-                        "book_title": item.get("book_title"),
-                        "old_text": item.get("old_text"),
-                        "new_text": item.get("new_text")
-                    }
-                    result_list.append(extracted_item)
-            return result_list
+            # 新记录会出现在列表中, 让缓存的列表在下次使用时重新验证
+            get_replace_record_cache().invalidate(
+                form_data.get("cp_book_id"), form_data.get("book_title")
+            )
+            return extract_replace_records(response)
         return False
 
-    def replace_record_list(self, form_data):
+    def replace_record_list(self, form_data, max_age=REPLACE_RECORD_CACHE_TTL, force=False):
         """
         获取替换词记录列表
+        列表按(cp_book_id, book_title)缓存, 在max_age秒内直接返回缓存,
+        过期后发送条件请求(If-None-Match/If-Modified-Since),
+        服务器返回304时继续使用缓存, 否则用返回的完整列表替换缓存.
+        网络不可用或请求失败时返回过期的缓存
         :param :form_data 包含的key: cp_book_id,book_title
         :return:
         """
-        # 发送请求
-        response = http_form_post(self.api_replace_list, form_data=form_data)
-        # 检查响应
-        if response and "code" in response and response["code"] == 0:
-            # 解析数据
-            result_list = []
-            # 检查是否有body字段且是列表
-            if "body" in response and isinstance(response["body"], list):
-                # 遍历body中的每个元素
-                for item in response["body"]:
-                    # 提取所需字段，创建新的字典对象
-                    extracted_item = {
-                        "id": item.get("id"),
-                        "cp_book_id": item.get("cp_book_id"),
-                        "account_id": item.get("account_id"),
-                        "book_title": item.get("book_title"),
-                        "old_text": item.get("old_text"),
-                        "new_text": item.get("new_text")
-                    }
-                    result_list.append(extracted_item)
-            return result_list
-        return False
+        cache = get_replace_record_cache()
+        cp_book_id = form_data.get("cp_book_id")
+        book_title = form_data.get("book_title")
+        entry = cache.get(cp_book_id, book_title)
+        if entry is not None and not force and entry.is_fresh(max_age):
+            return list(entry.records)
 
+        request_data = dict(form_data)
+        headers = {"Content-Type": "application/x-www-form-urlencoded"}
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+        try:
+            # 只读接口, 失败时可以重试
+            response = get_http_client().post(
+                self.api_replace_list,
+                data=request_data,
+                headers=headers,
+                timeout=60,
+                idempotent=True,
+            )
+        except Exception as e:
+            print(f"获取替换词记录列表失败: {str(e)}")
+            return list(entry.records) if entry is not None else False
 
+        if response.status_code == 304 and entry is not None:
+            cache.touch(cp_book_id, book_title)
+            return list(entry.records)
+        try:
+            result = response.json()
+        except ValueError:
+            return list(entry.records) if entry is not None else False
+        # 检查响应
+        if not (result and "code" in result and result["code"] == 0):
+            return list(entry.records) if entry is not None else False
+        records = extract_replace_records(result)
+        cache.put(
+            cp_book_id,
+            book_title,
+            CacheEntry(
+                records,
+                time.time(),
+                response.headers.get("ETag"),
+                response.headers.get("Last-Modified"),
+            ),
+        )
+        return list(records)
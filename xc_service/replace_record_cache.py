@@ -0,0 +1,150 @@
+"""
+替换词记录列表的本地缓存, 按(cp_book_id, book_title)保存.
+缓存在有效期(TTL)内直接返回, 过期后用ETag/Last-Modified
+发送条件请求, 列表没有变化时服务器只需要返回304
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import data
+
+# 缓存有效期(秒), 在有效期内不发送请求
+REPLACE_RECORD_CACHE_TTL = 300
+
+
+class CacheEntry:
+    def __init__(self, records, fetched, etag=None, last_modified=None):
+        self.records = records
+        self.fetched = fetched
+        self.etag = etag
+        self.last_modified = last_modified
+
+    def is_fresh(self, ttl):
+        return time.time() - self.fetched < ttl
+
+
+class ReplaceRecordCache:
+    """
+    In-memory cache of the replace record lists, persisted to SQLite
+    so the lists are available right after the start of the application
+    """
+
+    def __init__(self, database_path=None):
+        if database_path is None:
+            database_path = data.replace_record_database
+        directory = os.path.dirname(database_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            database_path, check_same_thread=False, isolation_level=None
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS replace_record_cache (
+                cp_book_id TEXT NOT NULL,
+                book_title TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched REAL NOT NULL,
+                records TEXT NOT NULL,
+                PRIMARY KEY (cp_book_id, book_title)
+            )
+            """
+        )
+
+    @staticmethod
+    def key(cp_book_id, book_title):
+        return (str(cp_book_id), book_title or "")
+
+    def get(self, cp_book_id, book_title):
+        key = self.key(cp_book_id, book_title)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                return entry
+            row = self._connection.execute(
+                "SELECT etag, last_modified, fetched, records FROM replace_record_cache "
+                "WHERE cp_book_id = ? AND book_title = ?",
+                key,
+            ).fetchone()
+            if row is None:
+                return None
+            entry = CacheEntry(json.loads(row[3]), row[2], row[0], row[1])
+            self._entries[key] = entry
+            return entry
+
+    def put(self, cp_book_id, book_title, entry):
+        key = self.key(cp_book_id, book_title)
+        with self._lock:
+            self._entries[key] = entry
+            self._connection.execute(
+                "INSERT OR REPLACE INTO replace_record_cache "
+                "(cp_book_id, book_title, etag, last_modified, fetched, records) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                key
+                + (
+                    entry.etag,
+                    entry.last_modified,
+                    entry.fetched,
+                    json.dumps(entry.records, ensure_ascii=False),
+                ),
+            )
+
+    def touch(self, cp_book_id, book_title):
+        """The server confirmed that the cached list is still valid"""
+        entry = self.get(cp_book_id, book_title)
+        if entry is None:
+            return
+        entry.fetched = time.time()
+        with self._lock:
+            self._connection.execute(
+                "UPDATE replace_record_cache SET fetched = ? "
+                "WHERE cp_book_id = ? AND book_title = ?",
+                (entry.fetched,) + self.key(cp_book_id, book_title),
+            )
+
+    def known_books(self, limit=None):
+        """(cp_book_id, book_title) of the cached lists, most recently fetched first"""
+        query = "SELECT cp_book_id, book_title FROM replace_record_cache ORDER BY fetched DESC"
+        parameters = ()
+        if limit is not None:
+            query += " LIMIT ?"
+            parameters = (limit,)
+        with self._lock:
+            return [tuple(row) for row in self._connection.execute(query, parameters)]
+
+    def invalidate(self, cp_book_id=None, book_title=None):
+        """Expire one list, or all lists when no book is given"""
+        with self._lock:
+            for key, entry in self._entries.items():
+                if cp_book_id is None or key == self.key(cp_book_id, book_title):
+                    entry.fetched = 0
+            if cp_book_id is None:
+                self._connection.execute("UPDATE replace_record_cache SET fetched = 0")
+            else:
+                self._connection.execute(
+                    "UPDATE replace_record_cache SET fetched = 0 "
+                    "WHERE cp_book_id = ? AND book_title = ?",
+                    self.key(cp_book_id, book_title),
+                )
+
+
+_replace_record_cache = None
+_replace_record_cache_lock = threading.Lock()
+
+
+def get_replace_record_cache():
+    """Return the shared ReplaceRecordCache"""
+    global _replace_record_cache
+    if _replace_record_cache is None:
+        with _replace_record_cache_lock:
+            if _replace_record_cache is None:
+                _replace_record_cache = ReplaceRecordCache()
+    return _replace_record_cache
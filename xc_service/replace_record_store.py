@@ -0,0 +1,303 @@
+"""
+替换词记录的本地队列: 每条被接受的替换先写入本地SQLite数据库,
+后台定时器按批次同步到content_replace_add接口.
+每条记录有一个幂等键, 重试不会在服务器上产生重复记录, 离线时记录不会丢失
+"""
+
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+import data
+import qt
+from xc_entity.account import user_info
+from xc_service.async_service import get_service_executor
+from xc_service.book_service import BookService
+
+# 同步定时器间隔(毫秒)
+SYNC_INTERVAL = 5000
+# 每批同步的记录数
+SYNC_BATCH_SIZE = 50
+# 失败重试的退避时间(秒): base * 2^(attempts - 1), 不超过最大值
+RETRY_BASE_DELAY = 5
+RETRY_MAX_DELAY = 600
+# 超过这个次数的记录标记为失败, 不再自动重试
+MAX_ATTEMPTS = 20
+# 已同步的记录在本地保留的时间(秒), 超过后删除, 数据库不会无限增长
+SYNCED_RETENTION = 7 * 24 * 3600
+
+STATE_PENDING = "pending"
+STATE_SYNCED = "synced"
+STATE_FAILED = "failed"
+
+RECORD_FIELDS = (
+    "idempotency_key",
+    "cp_book_id",
+    "account_id",
+    "book_title",
+    "old_text",
+    "new_text",
+    "state",
+    "attempts",
+    "created",
+    "last_error",
+)
+
+
+class ReplaceRecordStore:
+    """SQLite backed queue of the replace records, keyed by cp_book_id"""
+
+    def __init__(self, database_path=None):
+        if database_path is None:
+            database_path = data.replace_record_database
+        directory = os.path.dirname(database_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.database_path = database_path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            database_path, check_same_thread=False, isolation_level=None
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS replace_records (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                idempotency_key TEXT NOT NULL UNIQUE,
+                cp_book_id TEXT NOT NULL,
+                account_id TEXT,
+                book_title TEXT,
+                old_text TEXT,
+                new_text TEXT,
+                state TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt REAL NOT NULL DEFAULT 0,
+                created REAL NOT NULL,
+                last_error TEXT
+            )
+            """
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS replace_records_book "
+            "ON replace_records (cp_book_id)"
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS replace_records_queue "
+            "ON replace_records (state, next_attempt)"
+        )
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def add(self, form_data):
+        """
+        Queue a replace record, returns its idempotency key.
+        form_data keys: cp_book_id, book_title, old_text, new_text
+        """
+        idempotency_key = uuid.uuid4().hex
+        with self._lock:
+            self._connection.execute(
+                "INSERT INTO replace_records (idempotency_key, cp_book_id, "
+                "account_id, book_title, old_text, new_text, created) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    idempotency_key,
+                    str(form_data.get("cp_book_id", "")),
+                    form_data.get("account_id", user_info.user_id),
+                    form_data.get("book_title", ""),
+                    form_data.get("old_text", ""),
+                    form_data.get("new_text", ""),
+                    time.time(),
+                ),
+            )
+        return idempotency_key
+
+    def due_batch(self, limit=SYNC_BATCH_SIZE):
+        """The pending records whose retry time has come, oldest first"""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT {} FROM replace_records WHERE state = ? AND next_attempt <= ? "
+                "ORDER BY id LIMIT ?".format(", ".join(RECORD_FIELDS)),
+                (STATE_PENDING, time.time(), limit),
+            ).fetchall()
+        return [dict(zip(RECORD_FIELDS, row)) for row in rows]
+
+    def mark_synced(self, idempotency_keys):
+        """Mark the records as synced and prune the synced records past the retention"""
+        if not idempotency_keys:
+            return
+        with self._lock:
+            self._connection.execute("BEGIN")
+            self._connection.executemany(
+                "UPDATE replace_records SET state = ?, last_error = NULL "
+                "WHERE idempotency_key = ?",
+                [(STATE_SYNCED, key) for key in idempotency_keys],
+            )
+            self._connection.execute(
+                "DELETE FROM replace_records WHERE state = ? AND created < ?",
+                (STATE_SYNCED, time.time() - SYNCED_RETENTION),
+            )
+            self._connection.execute("COMMIT")
+
+    def mark_retry(self, idempotency_key, error):
+        """Schedule the record for another attempt with exponential backoff"""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT attempts FROM replace_records WHERE idempotency_key = ?",
+                (idempotency_key,),
+            ).fetchone()
+            if row is None:
+                return
+            attempts = row[0] + 1
+            delay = min(RETRY_BASE_DELAY * (2 ** min(attempts - 1, 16)), RETRY_MAX_DELAY)
+            self._connection.execute(
+                "UPDATE replace_records SET attempts = ?, next_attempt = ?, "
+                "last_error = ?, state = ? WHERE idempotency_key = ?",
+                (
+                    attempts,
+                    time.time() + delay,
+                    str(error),
+                    STATE_FAILED if attempts >= MAX_ATTEMPTS else STATE_PENDING,
+                    idempotency_key,
+                ),
+            )
+
+    def retry_failed(self, cp_book_id=None):
+        """Put the records that gave up back into the queue"""
+        query = (
+            "UPDATE replace_records SET state = ?, attempts = 0, next_attempt = 0 "
+            "WHERE state = ?"
+        )
+        parameters = [STATE_PENDING, STATE_FAILED]
+        if cp_book_id is not None:
+            query += " AND cp_book_id = ?"
+            parameters.append(str(cp_book_id))
+        with self._lock:
+            self._connection.execute(query, parameters)
+
+    def records(self, cp_book_id, state=None):
+        """All local records of a book, including the ones not synced yet"""
+        query = "SELECT {} FROM replace_records WHERE cp_book_id = ?".format(
+            ", ".join(RECORD_FIELDS)
+        )
+        parameters = [str(cp_book_id)]
+        if state is not None:
+            query += " AND state = ?"
+            parameters.append(state)
+        with self._lock:
+            rows = self._connection.execute(query + " ORDER BY id", parameters)
+            return [dict(zip(RECORD_FIELDS, row)) for row in rows.fetchall()]
+
+    def counts(self):
+        """Number of records per state"""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT state, COUNT(*) FROM replace_records GROUP BY state"
+            ).fetchall()
+        return dict(rows)
+
+
+class ReplaceRecordSync(qt.QObject):
+    """
+    Periodically sends the queued replace records to the editor API
+    in the service thread pool, one batch at a time
+    """
+
+    # Number of records synced in the last batch, number of records still pending
+    synced = qt.pyqtSignal(int, int)
+
+    def __init__(self, store, parent=None, interval=SYNC_INTERVAL):
+        super().__init__(parent)
+        self.store = store
+        self.book_service = BookService()
+        self.executor = get_service_executor()
+        self.sync_call = None
+        self.timer = qt.QTimer(self)
+        self.timer.setInterval(interval)
+        self.timer.timeout.connect(self.flush)
+
+    def start(self):
+        self.timer.start()
+        self.flush()
+
+    def stop(self):
+        self.timer.stop()
+
+    def flush(self):
+        """Start syncing the next batch if no batch is running"""
+        if self.sync_call is not None:
+            return
+        # Records are only sent after the login
+        if not user_info.token:
+            return
+        batch = self.store.due_batch()
+        if not batch:
+            return
+        self.sync_call = self.executor.submit(
+            "replace_record_sync", self._sync_batch, batch
+        )
+        self.sync_call.on_finished(self._batch_finished)
+        self.sync_call.on_failed(self._batch_failed)
+
+    def _sync_batch(self, batch):
+        # Runs in the service thread pool, the pooled HTTP connection is reused
+        synced_keys = []
+        for record in batch:
+            form_data = {
+                "cp_book_id": record["cp_book_id"],
+                "book_title": record["book_title"],
+                "old_text": record["old_text"],
+                "new_text": record["new_text"],
+            }
+            if record["account_id"]:
+                form_data["account_id"] = record["account_id"]
+            try:
+                result = self.book_service.save_replace_record(
+                    form_data, idempotency_key=record["idempotency_key"]
+                )
+            except Exception as ex:
+                result = False
+                error = str(ex)
+            else:
+                error = "content_replace_add failed"
+            if result is False:
+                self.store.mark_retry(record["idempotency_key"], error)
+                # The API is not reachable, keep the rest for the next round
+                break
+            synced_keys.append(record["idempotency_key"])
+        self.store.mark_synced(synced_keys)
+        return len(synced_keys)
+
+    def _batch_finished(self, synced_count):
+        self.sync_call = None
+        pending = self.store.counts().get(STATE_PENDING, 0)
+        self.synced.emit(synced_count, pending)
+        # Continue right away while full batches go through
+        if synced_count == SYNC_BATCH_SIZE:
+            qt.QTimer.singleShot(0, self.flush)
+
+    def _batch_failed(self, error):
+        self.sync_call = None
+
+
+_replace_record_store = None
+
+
+def get_replace_record_store():
+    """Return the shared ReplaceRecordStore"""
+    global _replace_record_store
+    if _replace_record_store is None:
+        _replace_record_store = ReplaceRecordStore()
+    return _replace_record_store
+
+
+def queue_replace_record(form_data):
+    """
+    Store an accepted replacement locally, it is sent to the API in the background.
+    form_data keys: cp_book_id, book_title, old_text, new_text
+    """
+    return get_replace_record_store().add(form_data)